@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+בקרת קבלה לשרת הגירוד: תקציב גירודים במקביל, תור המתנה הוגן בין לקוחות ומכסות
+גירוד יחיד (אינטראקטיבי) עוקף את תור האצוות ויש לו slots שמורים; אצוות מקבלות slot
+לכל URL בנפרד בסבב בין הלקוחות, כך שרשימה ארוכה של לקוח אחד לא מרעיבה את האחרים.
+כשהשרת רווי הבקשה נדחית מיד (429 / 503 עם Retry-After) במקום להמתין בלי סוף
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+MAX_CONCURRENT = 8  # גירודים בפועל במקביל (תוצאות מהמטמון לא תופסות slot)
+INTERACTIVE_RESERVE = 2  # slots שאצוות לא יכולות לתפוס - גירוד יחיד לא ממתין מאחורי רשימות
+MAX_BATCH_URLS = 500  # URLs לבקשה אחת
+CLIENT_MAX_PENDING = 1000  # URLs שהתקבלו ועוד לא הסתיימו, לכל לקוח
+MAX_PENDING = 5000  # URLs שהתקבלו ועוד לא הסתיימו, בכל השרת
+MAX_INTERACTIVE_QUEUE = 32  # גירודים יחידים שממתינים ל-slot
+QUEUE_TIMEOUT = 10  # שניות המתנה מקסימליות של גירוד יחיד ל-slot
+MAX_RETRY_AFTER = 120
+INITIAL_SCRAPE_SECONDS = 2.0  # הערכת משך גירוד עד שנמדד גירוד אמיתי
+
+
+class Rejected(Exception):
+    """הבקשה לא התקבלה - status (413/429/503) ו-retry_after בשניות (או None)"""
+
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('granted',)
+
+    def __init__(self):
+        self.granted = False
+
+
+class Admission:
+    """
+    מכסה שהתקבלה ללקוח (count URLs) - slot() לכל גירוד בפועל, completed() לכל URL שהסתיים,
+    והיתרה (למשל URLs שלא רצו אחרי ניתוק) משוחררת ביציאה מה-with
+    """
+
+    def __init__(self, controller, client, count, interactive, timeout):
+        self.controller = controller
+        self.client = client
+        self.remaining = count
+        self.interactive = interactive
+        self.timeout = timeout
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.controller._finish(self.client, self.remaining)
+        self.remaining = 0
+
+    @contextmanager
+    def slot(self):
+        """slot לגירוד אחד - ממתין בתור ההוגן; Rejected(503) אם ההמתנה ארכה מ-timeout"""
+        self.controller._acquire(self.client, self.interactive, self.timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.controller._release(time.monotonic() - started)
+
+    def completed(self):
+        """URL אחד הסתיים (גירוד או תוצאה מהמטמון) - מפנה מקום במכסת הלקוח"""
+        if self.remaining > 0:
+            self.remaining -= 1
+            self.controller._finish(self.client, 1)
+
+
+class AdmissionController:
+    """
+    Args:
+        max_concurrent (int): גירודים בפועל במקביל
+        interactive_reserve (int): slots ששמורים לגירוד יחיד
+        max_batch (int): URLs לבקשה אחת (413 מעבר לזה)
+        client_max_pending (int): URLs פתוחים ללקוח (429 מעבר לזה)
+        max_pending (int): URLs פתוחים בשרת כולו (503 מעבר לזה)
+        max_interactive_queue (int): גירודים יחידים בהמתנה (503 מעבר לזה)
+        queue_timeout (float): המתנה מקסימלית של גירוד יחיד ל-slot
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, interactive_reserve=INTERACTIVE_RESERVE,
+                 max_batch=MAX_BATCH_URLS, client_max_pending=CLIENT_MAX_PENDING, max_pending=MAX_PENDING,
+                 max_interactive_queue=MAX_INTERACTIVE_QUEUE, queue_timeout=QUEUE_TIMEOUT):
+        if not 0 <= interactive_reserve < max_concurrent:
+            raise ValueError("interactive_reserve must be smaller than max_concurrent")
+        self.max_concurrent = max_concurrent
+        self.interactive_reserve = interactive_reserve
+        self.max_batch = max_batch
+        self.client_max_pending = client_max_pending
+        self.max_pending = max_pending
+        self.max_interactive_queue = max_interactive_queue
+        self.queue_timeout = queue_timeout
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._interactive = deque()  # ממתינים לגירוד יחיד - קודמים לאצוות
+        self._batch = OrderedDict()  # client -> deque של ממתינים; הלקוח שקיבל slot עובר לסוף
+        self._pending = {}  # client -> URLs שהתקבלו ועוד לא הסתיימו
+        self._total_pending = 0
+        self._scrape_seconds = INITIAL_SCRAPE_SECONDS  # ממוצע נע של משך גירוד (להערכת Retry-After)
+        self._stats = {'admitted': 0, 'rejected_batch_size': 0, 'rejected_client': 0,
+                       'rejected_busy': 0, 'queue_timeouts': 0}
+
+    def admit(self, client, count=1, interactive=False):
+        """
+        קבלת count URLs עבור הלקוח - נדחה מיד אם הבקשה גדולה מדי או שהמכסה מלאה
+
+        Returns:
+            Admission: לשימוש ב-with, עם slot() לכל URL
+        Raises:
+            Rejected: 413 (אצווה גדולה מדי), 429 (מכסת הלקוח), 503 (השרת רווי)
+        """
+        with self._cond:
+            if count > self.max_batch:
+                self._stats['rejected_batch_size'] += 1
+                raise Rejected(413, f"Too many URLs in one request (max {self.max_batch})")
+
+            client_pending = self._pending.get(client, 0)
+            if client_pending + count > self.client_max_pending:
+                self._stats['rejected_client'] += 1
+                # הלקוח מקבל בערך slot אחד בכל סבב - עד שיתפנה מקום למכסה שביקש
+                excess = client_pending + count - self.client_max_pending
+                raise Rejected(429, f"Client quota exceeded ({client_pending} URLs in progress, "
+                                    f"max {self.client_max_pending})", self._retry_after(excess, share=1))
+
+            if interactive:
+                if len(self._interactive) >= self.max_interactive_queue:
+                    self._stats['rejected_busy'] += 1
+                    raise Rejected(503, "Server is busy", self._retry_after(len(self._interactive)))
+            elif self._total_pending + count > self.max_pending:
+                self._stats['rejected_busy'] += 1
+                raise Rejected(503, "Server is busy", self._retry_after(self._total_pending + count - self.max_pending))
+
+            self._pending[client] = client_pending + count
+            self._total_pending += count
+            self._stats['admitted'] += count
+        timeout = self.queue_timeout if interactive else None
+        return Admission(self, client, count, interactive, timeout)
+
+    def _retry_after(self, units, share=None):
+        """שניות עד שיתפנו units גירודים - לפי משך הגירוד הממוצע ומספר ה-slots"""
+        slots = share or self.max_concurrent
+        return max(1, min(MAX_RETRY_AFTER, math.ceil(units * self._scrape_seconds / slots)))
+
+    def _acquire(self, client, interactive, timeout):
+        waiter = _Waiter()
+        with self._cond:
+            if interactive:
+                self._interactive.append(waiter)
+            else:
+                self._batch.setdefault(client, deque()).append(waiter)
+            self._grant_locked()
+
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not waiter.granted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._remove_waiter_locked(waiter, client, interactive)
+                    self._stats['queue_timeouts'] += 1
+                    raise Rejected(503, "Timed out waiting for a free scraping slot",
+                                   self._retry_after(len(self._interactive) + 1))
+                self._cond.wait(remaining)
+
+    def _grant_locked(self):
+        """מתן slots פנויים: קודם גירוד יחיד, אחר כך אצוות בסבב בין לקוחות"""
+        granted = False
+        while self._active < self.max_concurrent:
+            if self._interactive:
+                waiter = self._interactive.popleft()
+            elif self._batch and self._active < self.max_concurrent - self.interactive_reserve:
+                client, waiters = next(iter(self._batch.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    self._batch.move_to_end(client)
+                else:
+                    del self._batch[client]
+            else:
+                break
+            waiter.granted = True
+            self._active += 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _remove_waiter_locked(self, waiter, client, interactive):
+        if interactive:
+            self._interactive.remove(waiter)
+            return
+        waiters = self._batch.get(client)
+        if waiters is not None:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._batch[client]
+
+    def _release(self, seconds):
+        with self._cond:
+            self._active -= 1
+            self._scrape_seconds = 0.8 * self._scrape_seconds + 0.2 * seconds
+            self._grant_locked()
+
+    def _finish(self, client, count):
+        """count URLs של הלקוח הסתיימו (או לא ירוצו) - מפנים את המכסה"""
+        if count <= 0:
+            return
+        with self._cond:
+            pending = self._pending.get(client, 0) - count
+            if pending > 0:
+                self._pending[client] = pending
+            else:
+                self._pending.pop(client, None)
+            self._total_pending -= count
+
+    def stats(self):
+        with self._cond:
+            return dict(self._stats,
+                        active=self._active,
+                        max_concurrent=self.max_concurrent,
+                        waiting_interactive=len(self._interactive),
+                        waiting_batch=sum(len(waiters) for waiters in self._batch.values()),
+                        pending=self._total_pending,
+                        clients=len(self._pending),
+                        mean_scrape_seconds=round(self._scrape_seconds, 3))
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מצב הגשה אסינכרוני (ASGI) ל-API הגירוד
+אותו חוזה כמו real_scraper_server.py (/api/scrape, /api/scrape_multiple, /api/test),
+אבל ההמתנה לאתרים איטיים לא תופסת thread - תהליך אחד מחזיק מאות גירודים במקביל.
+הבקשות נעשות עם httpx.AsyncClient, והחילוץ (BeautifulSoup) רץ במאגר threads קטן וקבוע.
+
+הפעלה:
+    python async_scraper_server.py --port 5000 --workers 4
+או ישירות עם uvicorn:
+    uvicorn async_scraper_server:app --host 0.0.0.0 --port 5000 --workers 4
+"""
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.robotparser import RobotFileParser
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.staticfiles import StaticFiles
+
+# חילוץ, מטמון, מאגר התוצאות ואינדקס החיפוש משותפים עם השרת הרגיל
+from real_scraper_server import (scraper, result_cache, static_assets, _cache_key, _persist, _invalid_fields, _cache_ttl,
+                                 _ms_since, logger)
+from scrape_events import BatchProgress, format_sse, format_heartbeat, SSE_HEADERS, HEARTBEAT_INTERVAL
+from low_memory import measure_peak_memory
+from head_metadata import aread_head
+from http_transport import HOP_BY_HOP_HEADERS, HTTP2_AVAILABLE
+
+MAX_CONNECTIONS = 500
+MAX_KEEPALIVE_CONNECTIONS = 100
+FETCH_TIMEOUT = 15
+ROBOTS_TTL = 3600
+PARSE_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+
+class AsyncScraper:
+    """גירוד אסינכרוני - רשת ב-httpx, חילוץ דרך RealWebScraper במאגר threads"""
+
+    def __init__(self, sync_scraper, max_connections=MAX_CONNECTIONS, parse_workers=PARSE_WORKERS):
+        self.sync_scraper = sync_scraper
+        self.max_connections = max_connections
+        self.parse_pool = ThreadPoolExecutor(max_workers=parse_workers, thread_name_prefix='parse')
+        self.client = None
+        self._robots = {}  # robots_url -> (Task של RobotFileParser, תוקף)
+
+    async def start(self):
+        self.client = httpx.AsyncClient(
+            headers={name: value for name, value in self.sync_scraper.session.headers.items()
+                     if name.lower() not in HOP_BY_HOP_HEADERS},
+            http2=self.sync_scraper.transport == 'http2' and HTTP2_AVAILABLE,
+            timeout=FETCH_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS)
+        )
+
+    async def close(self):
+        await self.client.aclose()
+        self.parse_pool.shutdown(wait=False)
+
+    async def run_sync(self, func, *args):
+        """הרצת עבודה סינכרונית (חילוץ, SQLite) במאגר ה-threads"""
+        return await asyncio.get_running_loop().run_in_executor(self.parse_pool, func, *args)
+
+    async def scrape_url(self, url, settings=None, progress=None):
+        """גירוד URL - אותה תוצאה כמו RealWebScraper.scrape_url (כולל דיווח progress)"""
+        if not settings:
+            settings = {
+                'delay': 1,
+                'maxLinks': 20,
+                'maxImages': 10,
+                'textLength': 1000,
+                'respectRobots': True
+            }
+
+        try:
+            logger.info(f"מתחיל גירוד אסינכרוני: {url}")
+
+            if settings.get('respectRobots', True) and not await self._check_robots_txt(url):
+                return {
+                    'url': url,
+                    'error': 'Access denied by robots.txt',
+                    'status': 'error',
+                    'scrapedAt': datetime.now().isoformat()
+                }
+
+            await asyncio.sleep(settings.get('delay', 1))
+
+            if settings.get('headOnly', False):
+                result = await self._fetch_head(url, progress)
+                logger.info(f"גירוד הושלם בהצלחה: {url}")
+                return result
+
+            fetch_started = time.perf_counter()
+            response = await self.client.get(url)
+            response.raise_for_status()
+            if progress:
+                progress('fetched', statusCode=response.status_code, bytes=len(response.content),
+                         fetchMs=_ms_since(fetch_started))
+
+            parse_started = time.perf_counter()
+            if settings.get('reportMemory', False):
+                result, peak_memory = await self.run_sync(
+                    measure_peak_memory, self.sync_scraper.extract_response, url, settings, response.content, response
+                )
+                result['peakMemory'] = peak_memory
+            else:
+                result = await self.run_sync(self.sync_scraper.extract_response, url, settings,
+                                             response.content, response)
+            if progress and not result.get('unchanged'):
+                progress('parsed', parseMs=_ms_since(parse_started))
+
+            logger.info(f"גירוד הושלם בהצלחה: {url}")
+            return result
+
+        except httpx.HTTPError as e:
+            logger.error(f"שגיאה בגירוד {url}: {e}")
+            return {
+                'url': url,
+                'error': str(e),
+                'status': 'error',
+                'scrapedAt': datetime.now().isoformat()
+            }
+        except Exception as e:
+            logger.error(f"שגיאה כללית בגירוד {url}: {e}")
+            return {
+                'url': url,
+                'error': f"Internal error: {str(e)}",
+                'status': 'error',
+                'scrapedAt': datetime.now().isoformat()
+            }
+
+    async def _fetch_head(self, url, progress=None):
+        """מצב מטא-דאטה: קריאה בזרימה עד </head>; יציאה מ-stream סוגרת את התגובה בלי להוריד את השאר"""
+        fetch_started = time.perf_counter()
+        async with self.client.stream('GET', url) as response:
+            response.raise_for_status()
+            if progress:
+                progress('fetched', statusCode=response.status_code, bytes=None, fetchMs=_ms_since(fetch_started))
+            parse_started = time.perf_counter()
+            parser = await aread_head(response)
+        result = self.sync_scraper.head_result(url, parser, response)
+        if progress:
+            progress('parsed', parseMs=_ms_since(parse_started))
+        return result
+
+    async def _check_robots_txt(self, url):
+        """בדיקת robots.txt - קובץ אחד לכל דומיין (נשמר ROBOTS_TTL שניות, בקשות במקביל מאוחדות)"""
+        parsed_url = urllib.parse.urlparse(url)
+        robots_url = f"{parsed_url.scheme}://{parsed_url.netloc}/robots.txt"
+
+        entry = self._robots.get(robots_url)
+        if entry is None or entry[1] < time.monotonic():
+            entry = (asyncio.ensure_future(self._fetch_robots(robots_url)), time.monotonic() + ROBOTS_TTL)
+            self._robots[robots_url] = entry
+
+        rp = await asyncio.shield(entry[0])
+        if rp is None:
+            return True  # במקרה של שגיאה, נאפשר גירוד
+        return rp.can_fetch(self.client.headers.get('User-Agent', '*'), url)
+
+    async def _fetch_robots(self, robots_url):
+        """הורדת robots.txt (אותם כללים כמו RobotFileParser.read)"""
+        try:
+            response = await self.client.get(robots_url)
+        except httpx.HTTPError:
+            return None
+
+        rp = RobotFileParser()
+        rp.set_url(robots_url)
+        if response.status_code in (401, 403):
+            rp.disallow_all = True
+        elif 400 <= response.status_code < 500:
+            rp.allow_all = True
+        elif response.status_code >= 500:
+            return None
+        else:
+            rp.parse(response.text.splitlines())
+        return rp
+
+
+async_scraper = AsyncScraper(scraper)
+
+
+async def _scrape_cached(url, settings, bypass=False, ttl=None, progress=None):
+    """גירוד דרך המטמון המשותף - מחזיר (תוצאה, סטטוס מטמון)"""
+    settings = settings or {}
+
+    async def scrape_and_store():
+        result = await async_scraper.scrape_url(url, settings, progress)
+        stored = await async_scraper.run_sync(_persist, url, result)
+        if stored is None:
+            result = await async_scraper.scrape_url(url, dict(settings, skipUnchanged=False), progress)
+            stored = await async_scraper.run_sync(_persist, url, result)
+        return stored
+
+    return await result_cache.get_or_compute_async(_cache_key(url, settings), scrape_and_store,
+                                                   bypass=bypass, ttl=ttl)
+
+
+static_files = StaticFiles(directory='.')
+
+
+async def _asset_response(request, filename):
+    """קובץ מהזיכרון (ETag, 304, גרסה דחוסה) או מהדיסק אם לא נטען מראש"""
+    served = static_assets.respond(filename, request.headers, request.query_params.get('v'))
+    if served is None:
+        return await static_files.get_response(filename, request.scope)
+    status, headers, body = served
+    return Response(body, status_code=status, headers=headers)
+
+
+async def home(request):
+    """דף בית עם ממשק הגירוד"""
+    return await _asset_response(request, 'scraper-app.html')
+
+
+async def static_asset(request):
+    """קבצים סטטיים"""
+    return await _asset_response(request, request.path_params['filename'])
+
+
+async def api_scrape(request):
+    """API לגירוד אתר יחיד"""
+    try:
+        data = await request.json()
+        url = data.get('url')
+        settings = data.get('settings', {})
+
+        if not url:
+            return JSONResponse({'error': 'URL is required'}, status_code=400)
+        fields_error = _invalid_fields(settings)
+        if fields_error:
+            return JSONResponse({'error': fields_error}, status_code=400)
+        try:
+            ttl = _cache_ttl(data)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, status_code=400)
+
+        result, cache_status = await _scrape_cached(url, settings, data.get('bypassCache', False), ttl)
+        return JSONResponse(result, headers={'X-Cache': cache_status})
+
+    except Exception as e:
+        logger.error(f"שגיאה ב-API: {e}")
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def api_scrape_multiple(request):
+    """API לגירוד מרובה - כל ה-URLs נגרדים במקביל, התוצאות לפי סדר הבקשה"""
+    try:
+        data = await request.json()
+        urls = data.get('urls', [])
+        settings = data.get('settings', {})
+
+        if not urls:
+            return JSONResponse({'error': 'URLs are required'}, status_code=400)
+        fields_error = _invalid_fields(settings)
+        if fields_error:
+            return JSONResponse({'error': fields_error}, status_code=400)
+        try:
+            ttl = _cache_ttl(data)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, status_code=400)
+
+        bypass = data.get('bypassCache', False)
+        scraped = await asyncio.gather(*(_scrape_cached(url, settings, bypass, ttl) for url in urls))
+
+        return JSONResponse({'results': [result for result, _ in scraped]})
+
+    except Exception as e:
+        logger.error(f"שגיאה ב-API מרובה: {e}")
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def api_scrape_stream(request):
+    """
+    גירוד מרובה עם התקדמות חיה (text/event-stream) - כל ה-URLs במקביל,
+    האירועים נשלחים לפי סדר התרחשותם (index מזהה את ה-URL)
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    urls = data.get('urls', [])
+    settings = data.get('settings', {})
+    if not urls:
+        return JSONResponse({'error': 'URLs are required'}, status_code=400)
+    fields_error = _invalid_fields(settings)
+    if fields_error:
+        return JSONResponse({'error': fields_error}, status_code=400)
+    try:
+        ttl = _cache_ttl(data)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    bypass = data.get('bypassCache', False)
+    events = asyncio.Queue()
+    batch = BatchProgress(len(urls), lambda event, payload: events.put_nowait(format_sse(event, payload)))
+
+    async def scrape_one(index, url):
+        reporter = batch.url_started(index, url)
+        try:
+            result, cache_status = await _scrape_cached(url, settings, bypass, ttl, reporter)
+        except Exception as e:
+            logger.error(f"שגיאה בגירוד זורם {url}: {e}")
+            result, cache_status = {'url': url, 'error': str(e), 'status': 'error',
+                                    'scrapedAt': datetime.now().isoformat()}, 'MISS'
+        batch.url_done(index, url, result, cache_status, reporter)
+
+    async def run_batch():
+        batch.begin()
+        try:
+            await asyncio.gather(*(scrape_one(index, url) for index, url in enumerate(urls)))
+        finally:
+            batch.end(stopped=batch.completed < batch.total)
+            events.put_nowait(None)
+
+    async def stream():
+        task = asyncio.ensure_future(run_batch())
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(events.get(), HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield format_heartbeat()
+                    continue
+                if event is None:
+                    break
+                yield event
+        finally:
+            # הלקוח התנתק - ביטול הגירודים שעוד לא הסתיימו
+            task.cancel()
+
+    return StreamingResponse(stream(), media_type='text/event-stream', headers=SSE_HEADERS)
+
+
+async def api_test(request):
+    """בדיקת חיבור API"""
+    return JSONResponse({
+        'status': 'OK',
+        'message': 'Real Web Scraper API is running (async)',
+        'timestamp': datetime.now().isoformat(),
+        'cache': result_cache.stats()
+    })
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    await async_scraper.start()
+    try:
+        yield
+    finally:
+        await async_scraper.close()
+
+
+app = Starlette(
+    routes=[
+        Route('/', home),
+        Route('/api/scrape', api_scrape, methods=['POST']),
+        Route('/api/scrape_multiple', api_scrape_multiple, methods=['POST']),
+        Route('/api/scrape_stream', api_scrape_stream, methods=['POST']),
+        Route('/api/test', api_test),
+        Route('/{filename:path}', static_asset, methods=['GET', 'HEAD'])
+    ],
+    lifespan=lifespan
+)
+
+
+def main(argv=None):
+    """הפעלה עם uvicorn (מספר תהליכים, uvloop/httptools אם מותקנים)"""
+    parser = argparse.ArgumentParser(description="שרת גירוד אסינכרוני (ASGI)")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='מספר תהליכים (לכל תהליך מטמון משלו)')
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args(argv)
+
+    print("🕷️ מפעיל שרת גירוד אסינכרוני...")
+    print(f"📡 השרת יהיה זמין בכתובת: http://localhost:{args.port}")
+    print("🔄 לעצירה: Ctrl+C")
+
+    logging.getLogger().setLevel(args.log_level.upper())
+    uvicorn.run('async_scraper_server:app', host=args.host, port=args.port, workers=args.workers,
+                log_level=args.log_level, proxy_headers=True, timeout_keep_alive=30)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מצב אצווה לא-אינטראקטיבי לסקריפטי הגירוד
+קריאת URLs בזרימה מקובץ או מ-stdin, גירוד מקבילי עם הגבלת קצב לכל דומיין,
+כתיבה מיידית לקובץ פלט (JSONL/CSV), המשך מנקודת עצירה ודיווח התקדמות
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from result_store import ResultStore
+from search_index import SearchIndex
+from dns_cache import DnsCache, ConnectionPrewarmer, format_connect_stats, DEFAULT_TTL, PREWARM_LOOKAHEAD
+from columnar_export import ParquetResultWriter
+from scrape_logging import add_logging_arguments, output_handlers
+from host_concurrency import AdaptiveHostLimiter, HostLimitStore, result_status, HOST_LIMITS_PATH, MAX_LIMIT
+from work_queue import WorkQueue, QueueSink, LeaseKeeper, worker_id, format_counts, LEASE_SECONDS
+
+CSV_FIELDS = ['url', 'title', 'meta_description', 'meta_keywords',
+              'text_content', 'page_size', 'scraped_at', 'error']
+DEFERRED_PER_WORKER = 64  # URLs שממתינים למקום אצל ה-host שלהם (--adaptive) לכל worker
+DEFERRED_POLL = 0.2  # שניות בין בדיקות של hosts ממתינים
+
+
+def build_arg_parser(description, selectors=True, low_memory=True, robots=True, sitemap=False,
+                     fingerprints=False, transport=False):
+    """פרסר ארגומנטים משותף למצב אצווה"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('-i', '--input', default='-',
+                        help="קובץ URLs (שורה לכל כתובת, '-' עבור stdin)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="קובץ פלט ('-' עבור stdout)")
+    parser.add_argument('-f', '--format', choices=['jsonl', 'csv', 'sqlite', 'parquet'], default='jsonl',
+                        help='פורמט הפלט (sqlite - מאגר תוצאות עם אינדקסים, parquet - עמודתי, דורש pyarrow)')
+    parser.add_argument('-c', '--concurrency', type=int, default=8,
+                        help='מספר גירודים מקבילים')
+    parser.add_argument('--per-host-rate', type=float, default=1.0,
+                        help='מקסימום בקשות לשנייה לכל דומיין (0 - ללא הגבלה)')
+    parser.add_argument('--resume', action='store_true',
+                        help='דילוג על URLs שכבר קיימים בקובץ הפלט והוספה לסופו')
+    if robots:
+        parser.add_argument('--no-robots', action='store_true',
+                            help='לא לבדוק robots.txt')
+    parser.add_argument('--progress-interval', type=float, default=2.0,
+                        help='שניות בין דיווחי התקדמות')
+    parser.add_argument('--dns-ttl', type=float, default=DEFAULT_TTL,
+                        help='שניות לשמירת תוצאות DNS במטמון (0 - ללא מטמון)')
+    parser.add_argument('--prewarm', action='store_true',
+                        help='פתרון DNS ופתיחת חיבורים ל-hosts הבאים ברשימה מראש')
+    parser.add_argument('--prewarm-lookahead', type=int, default=PREWARM_LOOKAHEAD,
+                        help='כמה URLs לקרוא קדימה לחימום')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='מקביליות אדפטיבית לכל host: עולה כשה-latency יציב, יורדת ב-429/503 ובקפיצות latency '
+                             '(מומלץ יחד עם --per-host-rate 0)')
+    parser.add_argument('--host-limits', default=HOST_LIMITS_PATH, metavar='PATH',
+                        help="קובץ המגבלות שנלמדו לכל host, נטען בריצה הבאה ('' - ללא שמירה)")
+    parser.add_argument('--max-per-host', type=int, default=MAX_LIMIT,
+                        help='תקרת בקשות במקביל לכל host במצב --adaptive')
+    parser.add_argument('--queue', metavar='PATH',
+                        help='worker של תור משותף (work_queue.py): URLs נחכרים מהתור והתוצאות נשמרות בו '
+                             '(--input / --output / --resume לא בשימוש)')
+    parser.add_argument('--lease-seconds', type=float, default=LEASE_SECONDS,
+                        help='זמן חכירה - URLs של worker שלא חידש חכירה בזמן הזה עוברים לאחרים')
+    add_logging_arguments(parser)
+    parser.add_argument('--search-index', metavar='PATH',
+                        help='עדכון אינדקס חיפוש טקסט מלא (SQLite FTS5) עם כל תוצאה מוצלחת')
+    if selectors:
+        parser.add_argument('--selectors',
+                            help='קובץ JSON של CSS selectors מותאמים ({"שם": "selector"})')
+    if low_memory:
+        parser.add_argument('--low-memory', action='store_true',
+                            help='מצב זיכרון נמוך לדפים גדולים')
+        parser.add_argument('--report-memory', action='store_true',
+                            help='שדה peak_memory לכל דף (tracemalloc - מאט, ומודד את כל התהליך: '
+                                 'דפים שרצים במקביל נכללים במדידה)')
+    if fingerprints:
+        parser.add_argument('--fingerprints', metavar='PATH',
+                            help='אינדקס טביעות אצבע - סימון כמעט-כפילויות (near_duplicate_of)')
+        parser.add_argument('--skip-unchanged', action='store_true',
+                            help='דילוג על חילוץ ושמירה של דפים שלא השתנו מאז הגירוד הקודם')
+    if transport:
+        parser.add_argument('--transport', choices=['requests', 'http2'], default='requests',
+                            help='תעבורת HTTP (http2 - חיבור אחד לכל host ודחיסת brotli/zstd, דורש httpx[http2])')
+    if sitemap:
+        parser.add_argument('--sitemap', metavar='SITE',
+                            help='גירוד כל ה-URLs ממפות האתר של SITE (במקום --input)')
+        parser.add_argument('--sitemap-state', default='sitemap_state.db',
+                            help='קובץ מצב - URLs שה-lastmod שלהם לא השתנה מדולגים')
+    return parser
+
+
+def normalize_url(line):
+    """ניקוי שורת קלט ל-URL (None לשורות ריקות/הערות)"""
+    url = line.strip()
+    if not url or url.startswith('#'):
+        return None
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+
+def iter_urls(stream, skip=None):
+    """URLs מהקלט בזרימה - בלי לטעון את כל הרשימה לזיכרון"""
+    for line in stream:
+        url = normalize_url(line)
+        if url and (not skip or url not in skip):
+            yield url
+
+
+def count_urls(path):
+    """ספירת השורות בקובץ הקלט (לחישוב ETA) - מעבר זורם אחד"""
+    if path == '-':
+        return None
+    with open(path, 'rb') as f:
+        return sum(1 for line in f if line.strip() and not line.lstrip().startswith(b'#'))
+
+
+def load_done_urls(path, fmt):
+    """URLs שכבר נכתבו לקובץ הפלט (עבור --resume)"""
+    done = set()
+    if path == '-' or not os.path.exists(path) or fmt == 'parquet':  # parquet - ראו open_sink
+        return done
+    if fmt == 'sqlite':
+        store = ResultStore(path)
+        done.update(store.urls())
+        store.close()
+        return done
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if fmt == 'csv':
+            for row in csv.DictReader(f):
+                if row.get('url'):
+                    done.add(row['url'])
+        else:
+            for line in f:
+                try:
+                    done.add(json.loads(line)['url'])
+                except (ValueError, KeyError, TypeError):
+                    continue  # שורה חלקית מריצה שנקטעה
+    return done
+
+
+class JsonlSink:
+    """כתיבת תוצאה לכל שורה - בזרימה"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, record):
+        self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+    def close(self):
+        if self.stream not in (sys.stdout, sys.stderr):
+            self.stream.close()
+
+
+class CsvSink:
+    """כתיבת CSV בזרימה (אותן עמודות כמו save_to_csv)"""
+
+    def __init__(self, stream, write_header=True):
+        self.stream = stream
+        self.writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        if write_header:
+            self.writer.writeheader()
+
+    def write(self, record):
+        self.writer.writerow({name: record.get(name, '') for name in CSV_FIELDS})
+        self.stream.flush()
+
+    def close(self):
+        if self.stream not in (sys.stdout, sys.stderr):
+            self.stream.close()
+
+
+class StoreSink:
+    """כתיבה למאגר SQLite באצוות טרנזקציוניות"""
+
+    def __init__(self, path):
+        self.store = ResultStore(path)
+
+    def write(self, record):
+        self.store.add(record)
+
+    def close(self):
+        self.store.close()
+
+
+def open_sink(path, fmt, append=False):
+    """פתיחת יעד הפלט"""
+    if fmt == 'sqlite':
+        if path == '-':
+            raise SystemExit("פורמט sqlite דורש קובץ פלט (-o results.db)")
+        return StoreSink(path)  # upsert - תמיד מוסיף למאגר הקיים
+    if fmt == 'parquet':
+        if path == '-':
+            raise SystemExit("פורמט parquet דורש קובץ פלט (-o results.parquet)")
+        if append:
+            raise SystemExit("לא ניתן להוסיף לקובץ parquet קיים - השתמשו ב---resume עם jsonl/csv/sqlite")
+        try:
+            return ParquetResultWriter(path)
+        except RuntimeError as e:
+            raise SystemExit(str(e))
+    if path == '-':
+        stream = sys.stdout
+        existing = False
+    else:
+        existing = append and os.path.exists(path) and os.path.getsize(path) > 0
+        encoding = 'utf-8' if existing else ('utf-8-sig' if fmt == 'csv' else 'utf-8')
+        stream = open(path, 'a' if append else 'w', encoding=encoding, newline='')
+    if fmt == 'csv':
+        return CsvSink(stream, write_header=not existing)
+    return JsonlSink(stream)
+
+
+class HostRateLimiter:
+    """הגבלת קצב לכל דומיין - לכל היותר rate בקשות לשנייה"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url):
+        """המתנה עד שמותר לשלוח בקשה לדומיין של url"""
+        if not self.interval:
+            return
+        host = urllib.parse.urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ProgressReporter:
+    """דיווח תפוקה ו-ETA במקום הדפסה לכל URL"""
+
+    def __init__(self, total=None, interval=2.0, stream=None):
+        self.total = total
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.started = time.monotonic()
+        self.last_report = 0
+        self.done = 0
+        self.failed = 0
+        self.unchanged = 0
+
+    def record(self, result):
+        self.done += 1
+        if 'error' in result:
+            self.failed += 1
+        elif result.get('unchanged'):
+            self.unchanged += 1
+        now = time.monotonic()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report()
+
+    def report(self, final=False):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        rate = self.done / elapsed
+        line = f"{self.done} URLs ({self.failed} נכשלו) | {rate:.1f} URLs/שנייה | {elapsed:.0f}s"
+        if self.unchanged:
+            line += f" | {self.unchanged} ללא שינוי"
+        if self.total:
+            remaining = max(self.total - self.done, 0)
+            eta = remaining / rate if rate else float('inf')
+            line += f" | {self.done / self.total * 100:.1f}% | ETA {eta:.0f}s"
+        self.stream.write(('\n' if final else '\r') + line + ('\n' if final else ''))
+        self.stream.flush()
+
+
+def run_batch(urls, scrape, sink, concurrency=8, rate_limiter=None, progress=None, on_result=None,
+              host_limiter=None):
+    """
+    גירוד זורם של URLs עם מספר מוגבל של בקשות בביצוע
+
+    Args:
+        urls (iterable): מקור URLs (נצרך בהדרגה)
+        scrape (callable): פונקציה שמקבלת URL ומחזירה dict תוצאה (נקראת מכמה threads)
+        sink: יעד הפלט (write/close)
+        concurrency (int): מספר גירודים מקבילים
+        rate_limiter (HostRateLimiter): הגבלת קצב לכל דומיין
+        progress (ProgressReporter): דיווח התקדמות
+        on_result (callable): נקרא עם כל תוצאה לפני הכתיבה (מה-thread הראשי)
+        host_limiter (AdaptiveHostLimiter): מקביליות אדפטיבית לכל host - URLs של host מלא
+            ממתינים בצד (לא תופסים worker) עד שמתפנה אצלו מקום
+    """
+    def guarded_scrape(url):
+        # חריגה בגירוד URL אחד (למשל ValueError מ-urljoin על קישור פגום) היא תוצאה שנכשלה, לא סוף הריצה
+        try:
+            return scrape(url)
+        except Exception as e:
+            logging.error(f"שגיאה בגירוד {url}: {e}", extra={'url': url})
+            return {
+                'url': url,
+                'error': str(e) or type(e).__name__,
+                'scraped_at': datetime.now().isoformat()
+            }
+
+    def task(url):
+        if rate_limiter:
+            rate_limiter.acquire(url)
+        if host_limiter is None:
+            return guarded_scrape(url)
+        started = time.monotonic()
+        result = None
+        try:
+            result = guarded_scrape(url)
+            return result
+        finally:
+            host_limiter.release(url, time.monotonic() - started, result is None or 'error' in result,
+                                 result_status(result) if result is not None else None)
+
+    concurrency = max(1, concurrency)
+    # עם מגבלה לכל host לא מחזיקים תור בתוך ה-executor - מקום שנתפס הוא בקשה שרצה
+    max_pending = concurrency if host_limiter is not None else concurrency * 2
+    max_deferred = concurrency * DEFERRED_PER_WORKER
+    pending = set()
+    deferred = {}  # host -> URLs שממתינים למקום אצל ה-host
+    deferred_count = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        def admit(url):
+            nonlocal deferred_count
+            if host_limiter is None or host_limiter.try_acquire(url):
+                pending.add(executor.submit(task, url))
+            else:
+                deferred.setdefault(urllib.parse.urlparse(url).netloc.lower(), deque()).append(url)
+                deferred_count += 1
+
+        def admit_deferred():
+            nonlocal deferred_count
+            for host in list(deferred):
+                waiting = deferred[host]
+                while waiting and len(pending) < max_pending and host_limiter.try_acquire(waiting[0]):
+                    pending.add(executor.submit(task, waiting.popleft()))
+                    deferred_count -= 1
+                if not waiting:
+                    del deferred[host]
+
+        def step():
+            nonlocal pending
+            if pending:
+                timeout = DEFERRED_POLL if deferred else None
+                finished, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                _drain(finished, sink, progress, on_result)
+            else:
+                time.sleep(DEFERRED_POLL)  # כל ה-hosts הממתינים בעצירה אחרי 429 / 503
+            if deferred:
+                admit_deferred()
+
+        for url in urls:
+            admit(url)
+            while len(pending) >= max_pending or deferred_count >= max_deferred:
+                step()
+        while pending or deferred:
+            step()
+
+    if progress:
+        progress.report(final=True)
+
+
+def _drain(finished, sink, progress, on_result):
+    """כתיבת תוצאות שהסתיימו (מה-thread הראשי בלבד)"""
+    for future in finished:
+        result = future.result()
+        if on_result:
+            on_result(result)
+        # דף שלא השתנה - הרשומה הקודמת נשארת; במצב תור הרשומה נדרשת כדי לסמן את המשימה כהושלמה
+        if not result.get('unchanged') or isinstance(sink, QueueSink):
+            sink.write(result)
+        if progress:
+            progress.record(result)
+
+
+def quiet_console_logging():
+    """במצב אצווה הקונסול מציג רק אזהרות - קובץ הלוג ממשיך לקבל הכל"""
+    for handler in output_handlers():
+        if type(handler) is logging.StreamHandler:
+            handler.setLevel(logging.WARNING)
+
+
+def _chain_indexing(search_index, on_result):
+    """הוספת עדכון אינדקס החיפוש לפני on_result הקיים"""
+    def handle(result):
+        search_index.add(result)
+        if on_result:
+            on_result(result)
+    return handle
+
+def run_batch_cli(args, make_scrape, urls=None, on_result=None, session=None):
+    """
+    הרצת מצב אצווה
+
+    Args:
+        args: ארגומנטים מ-build_arg_parser
+        make_scrape (callable): יוצר פונקציית גירוד (נקרא פעם אחת לכל thread)
+        urls (iterable): מקור URLs חלופי ל---input (למשל ממפת אתר)
+        on_result (callable): נקרא עם כל תוצאה לפני הכתיבה
+        session: ה-session המשותף של ה-workers - --prewarm פותח אליו חיבורים (אחרת DNS בלבד)
+    """
+    quiet_console_logging()
+
+    # במצב תור הרשימה והפלט הם קובץ התור; מפת אתר (urls) גוברת עליו
+    work_queue = WorkQueue(args.queue) if getattr(args, 'queue', None) and urls is None else None
+    if work_queue is not None:
+        done = set()
+        total = work_queue.counts()['pending']
+    else:
+        done = load_done_urls(args.output, args.format) if args.resume else set()
+        total = None if urls is not None else count_urls(args.input)
+        if total is not None:
+            total = max(total - len(done), 0)
+
+    local = threading.local()
+
+    def scrape(url):
+        if not hasattr(local, 'scrape'):
+            local.scrape = make_scrape()
+        return local.scrape(url)
+
+    source = None
+    lease_keeper = None
+    if work_queue is not None:
+        worker = worker_id()
+        # חכירה של concurrency URLs בכל פעם - worker לא מחזיק יותר ממה שהוא מגרד בפועל
+        urls = work_queue.leased_urls(worker, max(args.concurrency, 1), args.lease_seconds)
+        sink = QueueSink(work_queue, worker)
+        lease_keeper = LeaseKeeper(work_queue, worker, args.lease_seconds).start()
+    else:
+        if urls is not None:
+            urls = (url for url in urls if url not in done)
+        else:
+            source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8-sig')
+            urls = iter_urls(source, done)
+        sink = open_sink(args.output, args.format, append=args.resume)
+    progress = ProgressReporter(total, args.progress_interval)
+    search_index = SearchIndex(args.search_index) if getattr(args, 'search_index', None) else None
+    if search_index is not None:
+        on_result = _chain_indexing(search_index, on_result)
+    dns_cache = DnsCache(args.dns_ttl) if args.dns_ttl > 0 else None
+    if dns_cache is not None:
+        dns_cache.install()
+    prewarmer = ConnectionPrewarmer(dns_cache, session, args.prewarm_lookahead) if args.prewarm else None
+    if prewarmer is not None:
+        urls = prewarmer.warm(urls)
+    limit_store = HostLimitStore(args.host_limits) if args.adaptive and args.host_limits else None
+    host_limiter = AdaptiveHostLimiter(limit_store, max_limit=args.max_per_host) if args.adaptive else None
+    rate_limiter = HostRateLimiter(args.per_host_rate)
+    try:
+        run_batch(urls, scrape, sink, args.concurrency, rate_limiter, progress, on_result, host_limiter)
+        # במצב תור: כל עוד ל-workers אחרים יש חכירות מחכים - URLs של worker שמת נמסרים לכאן בסבב נוסף
+        while work_queue is not None:
+            sink.flush()
+            if not work_queue.wait_for_work(worker):
+                break
+            urls = work_queue.leased_urls(worker, max(args.concurrency, 1), args.lease_seconds)
+            if prewarmer is not None:
+                urls = prewarmer.warm(urls)
+            run_batch(urls, scrape, sink, args.concurrency, rate_limiter, progress, on_result, host_limiter)
+    except KeyboardInterrupt:
+        progress.report(final=True)
+        if work_queue is None:
+            sys.stderr.write("הופסק - ניתן להמשיך עם --resume\n")
+    finally:
+        if prewarmer is not None:
+            prewarmer.close()
+        if dns_cache is not None:
+            dns_cache.uninstall()
+        connect_stats = format_connect_stats(dns_cache, prewarmer)
+        if connect_stats:
+            sys.stderr.write(connect_stats + '\n')
+        if host_limiter is not None:
+            host_limiter.save()
+            host_stats = host_limiter.format_stats()
+            if host_stats:
+                sys.stderr.write(host_stats + '\n')
+        if limit_store is not None:
+            limit_store.close()
+        sink.close()
+        if work_queue is not None:
+            lease_keeper.stop()
+            # מה שנחכר ולא הסתיים (הפסקה באמצע) חוזר לתור מיד
+            work_queue.release(worker)
+            sys.stderr.write(format_counts(work_queue.counts()) + '\n')
+            work_queue.close()
+        if search_index is not None:
+            search_index.close()
+        if source is not None and source is not sys.stdin:
+            source.close()
+    return progress
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ייצוא עמודתי של תוצאות גירוד ל-Parquet (pyarrow)
+התוצאות נכתבות ב-row groups תוך כדי הגירוד, קישורים / תמונות / כותרות נשמרים כעמודות רשימה
+ודומיינים חוזרים בקידוד מילון - קבצים קטנים וטעינה מהירה ל-pandas או DuckDB
+"""
+
+import importlib.util
+import urllib.parse
+from datetime import datetime
+
+# אופציונלי - נדרש רק לייצוא Parquet; נטען רק כשכותבים קובץ (טעינת pyarrow איטית)
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+ROW_GROUP_SIZE = 10000
+DEFAULT_COMPRESSION = 'zstd'
+
+
+def result_schema():
+    """סכמת Arrow לתוצאות (הסקריפט הבסיסי והמתקדם - שדות חסרים נשמרים כ-null)"""
+    import pyarrow as pa
+    dictionary_string = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('url', pa.string()),
+        ('domain', dictionary_string),
+        ('status', dictionary_string),
+        ('title', pa.string()),
+        ('meta_description', pa.string()),
+        ('meta_keywords', pa.string()),
+        ('headings', pa.list_(pa.struct([('level', pa.string()), ('text', pa.string())]))),
+        ('links', pa.list_(pa.struct([('text', pa.string()), ('url', pa.string()),
+                                      ('is_internal', pa.bool_())]))),
+        ('images', pa.list_(pa.struct([('alt', pa.string()), ('src', pa.string()), ('title', pa.string()),
+                                       ('width', pa.string()), ('height', pa.string())]))),
+        ('text_content', pa.string()),
+        ('page_size', pa.int64()),
+        ('scraped_at', pa.timestamp('us')),
+        ('error', pa.string()),
+        ('custom_data', pa.map_(pa.string(), pa.list_(pa.string()))),
+        ('content_hash', pa.string()),
+        ('simhash', pa.string()),
+        ('near_duplicate_of', pa.struct([('url', pa.string()), ('distance', pa.int8())])),
+        ('peak_memory', pa.int64()),
+        ('sitemap_lastmod', pa.string()),
+        ('body_hash', pa.string()),
+        # מצב מטא-דאטה (--head-only)
+        ('canonical', pa.string()),
+        ('open_graph', pa.map_(pa.string(), pa.string())),
+        ('lang', dictionary_string),
+        ('head_complete', pa.bool_())
+    ])
+
+
+def _parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def _to_columns(record):
+    """המרת תוצאה לערכי העמודות (לפי סדר הסכמה)"""
+    url = record.get('url', '')
+    headings = record.get('headings') or {}
+    custom_data = record.get('custom_data')
+    open_graph = record.get('open_graph')
+    return (
+        url,
+        urllib.parse.urlparse(url).netloc.lower(),
+        'error' if 'error' in record else 'success',
+        record.get('title'),
+        record.get('meta_description'),
+        record.get('meta_keywords'),
+        [{'level': level, 'text': text} for level in sorted(headings) for text in headings[level]],
+        record.get('links') or [],
+        [{name: str(value) for name, value in image.items()} for image in record.get('images') or []],
+        record.get('text_content'),
+        record.get('page_size'),
+        _parse_timestamp(record.get('scraped_at')),
+        record.get('error'),
+        list(custom_data.items()) if custom_data else None,
+        record.get('content_hash'),
+        record.get('simhash'),
+        record.get('near_duplicate_of'),
+        record.get('peak_memory'),
+        record.get('sitemap_lastmod'),
+        record.get('body_hash'),
+        record.get('canonical'),
+        list(open_graph.items()) if open_graph is not None else None,
+        record.get('lang'),
+        record.get('head_complete')
+    )
+
+
+class ParquetResultWriter:
+    """
+    כתיבת תוצאות ל-Parquet בזרימה - כל ROW_GROUP_SIZE תוצאות נכתבות כ-row group
+    (אותו ממשק write/close כמו יעדי הפלט של מצב האצווה)
+    """
+
+    def __init__(self, path, row_group_size=ROW_GROUP_SIZE, compression=DEFAULT_COMPRESSION):
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("ייצוא Parquet דורש את pyarrow: pip install pyarrow")
+        import pyarrow.parquet as pq
+        self.schema = result_schema()
+        self.row_group_size = row_group_size
+        self.writer = pq.ParquetWriter(path, self.schema, compression=compression, use_dictionary=True)
+        self._rows = []
+        self.rows_written = 0
+
+    def write(self, record):
+        self._rows.append(_to_columns(record))
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        """כתיבת התוצאות הממתינות כ-row group"""
+        if not self._rows:
+            return
+        import pyarrow as pa
+        columns = [pa.array(values, type=field.type) for values, field in zip(zip(*self._rows), self.schema)]
+        self.writer.write_table(pa.Table.from_arrays(columns, schema=self.schema),
+                                row_group_size=self.row_group_size)
+        self.rows_written += len(self._rows)
+        self._rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def write_parquet(records, path, row_group_size=ROW_GROUP_SIZE, compression=DEFAULT_COMPRESSION):
+    """כתיבת רצף תוצאות לקובץ Parquet - מחזיר את מספר השורות"""
+    writer = ParquetResultWriter(path, row_group_size, compression)
+    try:
+        for record in records:
+            writer.write(record)
+    finally:
+        writer.close()
+    return writer.rows_written
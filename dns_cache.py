@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מטמון DNS בתהליך וחימום חיבורים לרשימות URL גדולות
+DnsCache מחליף את socket.getaddrinfo (requests, httpx ו-robots.txt עוברים דרכו),
+ו-ConnectionPrewarmer קורא קדימה ברשימה ופותר DNS ופותח חיבורי TCP/TLS ל-hosts הבאים
+בזמן שה-URLs הקודמים עדיין בעבודה
+"""
+
+import ipaddress
+import socket
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# getaddrinfo לא מחזיר את ה-TTL של הרשומה - תוקף קבוע לכל רשומה
+DEFAULT_TTL = 300
+NEGATIVE_TTL = 30  # שמות שלא נמצאו - כדי שרשימה עם דומיין מת לא תחכה ל-DNS שוב ושוב
+MAX_ENTRIES = 10000
+PREWARM_LOOKAHEAD = 64
+PREWARM_WORKERS = 8
+
+_system_getaddrinfo = socket.getaddrinfo
+
+
+def _is_ip_address(host):
+    try:
+        ipaddress.ip_address(host.split('%', 1)[0])
+        return True
+    except ValueError:
+        return False
+
+
+class DnsCache:
+    """
+    מטמון לתוצאות getaddrinfo לפי (host, port), עם תוקף, מטמון שלילי וחיפוש אחד לכל שם במקביל
+    חיפושים מ-thread החימום (background) לא נספרים כחיפושים של הגירוד
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, negative_ttl=NEGATIVE_TTL, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (host, port) -> (תוקף, תוצאות או gaierror)
+        self._inflight = {}  # (host, port) -> threading.Event
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0  # זמן חיפוש שהגירוד המתין לו
+        self.background_lookups = 0
+        self.background_seconds = 0.0
+
+    @contextmanager
+    def background(self):
+        """חיפושים בתוך הבלוק הם חימום - לא נספרים בסטטיסטיקת הגירוד"""
+        self._local.background = True
+        try:
+            yield
+        finally:
+            self._local.background = False
+
+    def resolve(self, host, port):
+        """כל הכתובות (SOCK_STREAM) של host:port - מהמטמון אם בתוקף"""
+        key = (host.lower(), str(port))
+        background = getattr(self._local, 'background', False)
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    if not background:
+                        self.hits += 1
+                    return self._unwrap(entry[1])
+                event = self._inflight.get(key)
+                if event is None:
+                    self._inflight[key] = threading.Event()
+                    break
+            event.wait()  # חיפוש לאותו שם כבר בביצוע - ממתינים לתוצאה שלו
+
+        started = time.perf_counter()
+        try:
+            value = _system_getaddrinfo(key[0], port, 0, socket.SOCK_STREAM)
+            expires = time.monotonic() + self.ttl
+        except socket.gaierror as e:
+            value = e
+            # כשל זמני בשרת ה-DNS לא נשמר
+            expires = time.monotonic() + (0 if e.errno == socket.EAI_AGAIN else self.negative_ttl)
+        except BaseException:
+            with self._lock:
+                self._inflight.pop(key).set()
+            raise
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            if background:
+                self.background_lookups += 1
+                self.background_seconds += elapsed
+            else:
+                self.misses += 1
+                self.lookup_seconds += elapsed
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._inflight.pop(key).set()
+        return self._unwrap(value)
+
+    @staticmethod
+    def _unwrap(value):
+        if isinstance(value, socket.gaierror):
+            raise value
+        return value
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """תחליף ל-socket.getaddrinfo - חיבורי TCP לשמות דומיין עוברים דרך המטמון"""
+        if isinstance(host, bytes):
+            host = host.decode('idna')
+        if not host or flags or type != socket.SOCK_STREAM or _is_ip_address(host):
+            return _system_getaddrinfo(host, port, family, type, proto, flags)
+        infos = [info for info in self.resolve(host, port)
+                 if (not family or info[0] == family) and (not proto or info[2] == proto)]
+        if not infos:
+            raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+        return infos
+
+    def install(self):
+        """הפעלת המטמון לכל התהליך"""
+        socket.getaddrinfo = self.getaddrinfo
+
+    def uninstall(self):
+        if socket.getaddrinfo == self.getaddrinfo:
+            socket.getaddrinfo = _system_getaddrinfo
+
+    def mean_lookup_seconds(self):
+        lookups = self.misses + self.background_lookups
+        return (self.lookup_seconds + self.background_seconds) / lookups if lookups else 0.0
+
+    def stats(self):
+        saved = self.hits * self.mean_lookup_seconds()
+        paid = self.lookup_seconds
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'background_lookups': self.background_lookups,
+            'lookup_seconds': round(paid, 3),
+            'saved_seconds': round(saved, 3),
+            'saved_share': round(saved / (saved + paid), 3) if saved + paid else 0.0
+        }
+
+
+class ConnectionPrewarmer:
+    """
+    חימום hosts לפני שמגיעים אליהם: warm(urls) מחזיר את אותם URLs באותו סדר,
+    אבל קורא lookahead URLs קדימה ולכל host חדש פותר DNS ופותח חיבור ל-pool של ה-session
+
+    Args:
+        dns_cache (DnsCache): מטמון שיתמלא מראש (None - ללא חימום DNS)
+        session: requests.Session משותף לכל ה-workers (None או Http2Session - DNS בלבד)
+        lookahead (int): כמה URLs לקרוא קדימה
+    """
+
+    def __init__(self, dns_cache=None, session=None, lookahead=PREWARM_LOOKAHEAD, workers=PREWARM_WORKERS):
+        self.dns_cache = dns_cache
+        self.session = session if isinstance(session, requests.Session) else None
+        self.lookahead = max(1, lookahead)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prewarm')
+        self._origins = set()
+        self._pools = {}  # pool -> מספר החיבורים שנפתחו בחימום
+        self._lock = threading.Lock()
+        self.hosts_warmed = 0
+        self.failures = 0
+        self.connect_seconds = 0.0
+
+    def warm(self, urls):
+        """אותם URLs ובאותו סדר - החימום רץ lookahead URLs לפני הגירוד"""
+        window = deque()
+        for url in urls:
+            window.append(url)
+            self._schedule(url)
+            if len(window) > self.lookahead:
+                yield window.popleft()
+        while window:
+            yield window.popleft()
+
+    def _schedule(self, url):
+        parsed = urllib.parse.urlsplit(url)
+        origin = (parsed.scheme, parsed.netloc.lower())
+        if origin in self._origins or not parsed.hostname:
+            return
+        self._origins.add(origin)
+        self.executor.submit(self._warm_origin, url, parsed)
+
+    def _warm_origin(self, url, parsed):
+        try:
+            port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+            if self.dns_cache is not None:
+                with self.dns_cache.background():
+                    self.dns_cache.resolve(parsed.hostname, port)
+            if self.session is not None:
+                self._connect(url)
+            with self._lock:
+                self.hosts_warmed += 1
+        except (OSError, ValueError, requests.exceptions.RequestException):
+            with self._lock:
+                self.failures += 1  # הגירוד עצמו ידווח על השגיאה
+
+    def _connect(self, url):
+        """פתיחת חיבור (TCP + TLS) והחזרתו ל-pool שהגירוד ישתמש בו"""
+        adapter = self.session.get_adapter(url)
+        if not isinstance(adapter, HTTPAdapter):
+            return
+        pool = self._pool_for(adapter, url)
+        conn = pool._get_conn()
+        try:
+            if conn.sock is None:
+                started = time.perf_counter()
+                conn.connect()
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.connect_seconds += elapsed
+                    self._pools[pool] = self._pools.get(pool, 0) + 1
+        finally:
+            pool._put_conn(conn)
+
+    def _pool_for(self, adapter, url):
+        """ה-pool שבקשה ל-url תקבל - עם אותן הגדרות verify / proxies / cert כמו ב-session.get"""
+        settings = self.session.merge_environment_settings(url, {}, None, None, None)
+        if hasattr(adapter, 'get_connection_with_tls_context'):  # requests 2.32+
+            request = requests.Request('GET', url).prepare()
+            return adapter.get_connection_with_tls_context(request, settings['verify'],
+                                                           settings['proxies'], settings['cert'])
+        pool = adapter.get_connection(url, settings['proxies'])
+        adapter.cert_verify(pool, url, settings['verify'], settings['cert'])
+        return pool
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        """
+        חיבורים שנפתחו בחימום מול חיבורים שהגירוד פתח בעצמו לאותם hosts;
+        זמן ההתחברות של הגירוד מוערך לפי הזמן הממוצע שנמדד בחימום
+        """
+        with self._lock:
+            prewarmed = sum(self._pools.values())
+            opened = sum(pool.num_connections for pool in self._pools)
+            connect_seconds = self.connect_seconds
+        on_path = max(opened - prewarmed, 0)
+        mean = connect_seconds / prewarmed if prewarmed else 0.0
+        paid = on_path * mean
+        return {
+            'hosts_warmed': self.hosts_warmed,
+            'failures': self.failures,
+            'connections_prewarmed': prewarmed,
+            'connections_on_path': on_path,
+            'connect_seconds_saved': round(connect_seconds, 3),
+            'connect_seconds_paid': round(paid, 3),
+            'saved_share': round(connect_seconds / (connect_seconds + paid), 3) if connect_seconds + paid else 0.0
+        }
+
+
+def format_connect_stats(dns_cache=None, prewarmer=None):
+    """שורת סיכום לסוף האצווה"""
+    parts = []
+    saved = paid = 0.0
+    if dns_cache is not None:
+        dns = dns_cache.stats()
+        saved += dns['saved_seconds']
+        paid += dns['lookup_seconds']
+        parts.append(f"DNS: {dns['hits']} פגיעות / {dns['misses']} חיפושים, "
+                     f"נחסכו {dns['saved_seconds']:.2f}s ({dns['saved_share'] * 100:.0f}%)")
+    if prewarmer is not None and prewarmer.session is not None:
+        conn = prewarmer.stats()
+        saved += conn['connect_seconds_saved']
+        paid += conn['connect_seconds_paid']
+        parts.append(f"חיבורים: {conn['connections_prewarmed']} חוממו מראש / {conn['connections_on_path']} בזמן הגירוד, "
+                     f"נחסכו {conn['connect_seconds_saved']:.2f}s ({conn['saved_share'] * 100:.0f}%)")
+    if len(parts) > 1 and saved + paid:
+        parts.append(f"זמן התחברות שנחסך: {saved / (saved + paid) * 100:.0f}%")
+    return ' | '.join(parts)
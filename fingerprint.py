@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+טביעות אצבע לתוכן דפים: hash מדויק ו-SimHash של הטקסט
+אינדקס SQLite מזהה כמעט-כפילויות (מראות, גרסאות הדפסה) בלי לסרוק את כל הדפים,
+ומאפשר לדלג על דפים שלא השתנו מאז הגירוד הקודם
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime
+
+SIMHASH_BITS = 64
+SHINGLE_SIZE = 3
+# מרחק Hamming מקסימלי לכמעט-כפילות; 4 רצועות של 16 ביט -
+# לפי עקרון שובך היונים, שתי טביעות במרחק 3 לכל היותר זהות לפחות ברצועה אחת
+MAX_DISTANCE = 3
+BANDS = MAX_DISTANCE + 1
+BAND_BITS = SIMHASH_BITS // BANDS
+MAX_CANDIDATES = 1000
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS fingerprints (
+    url TEXT PRIMARY KEY,
+    body_hash TEXT,
+    content_hash TEXT NOT NULL,
+    simhash INTEGER NOT NULL,
+    {', '.join(f'band{i} INTEGER NOT NULL' for i in range(BANDS))},
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_fingerprints_content ON fingerprints (content_hash);
+""" + ''.join(f"CREATE INDEX IF NOT EXISTS idx_fingerprints_band{i} ON fingerprints (band{i});\n"
+              for i in range(BANDS))
+
+_WORD = re.compile(r'\w+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def body_hash(content):
+    """hash מדויק של גוף התגובה (bytes) - לזיהוי דף שלא השתנה לפני החילוץ"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def content_hash(text):
+    """hash מדויק של הטקסט שחולץ (לאחר כיווץ רווחים)"""
+    normalized = _WHITESPACE.sub(' ', text or '').strip()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def simhash(text, bits=SIMHASH_BITS):
+    """SimHash של הטקסט לפי shingles של 3 מילים - טקסטים דומים מקבלים טביעות קרובות"""
+    words = _WORD.findall((text or '').lower())
+    if len(words) >= SHINGLE_SIZE:
+        features = Counter(' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1))
+    else:
+        features = Counter(words)
+
+    weights = [0] * bits
+    for feature, count in features.items():
+        value = int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=bits // 8).digest(), 'big')
+        for bit in range(bits):
+            weights[bit] += count if value >> bit & 1 else -count
+
+    result = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            result |= 1 << bit
+    return result
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def fingerprint_text(text):
+    """(content_hash, simhash) עבור הטקסט שחולץ"""
+    return content_hash(text), simhash(text)
+
+
+def fingerprint_fields(text):
+    """שדות טביעת האצבע לתוצאה (ללא אינדקס)"""
+    text_hash, text_simhash = fingerprint_text(text)
+    return {'content_hash': text_hash, 'simhash': f'{text_simhash:016x}'}
+
+
+def _bands(value):
+    mask = (1 << BAND_BITS) - 1
+    return [value >> (i * BAND_BITS) & mask for i in range(BANDS)]
+
+
+def _to_signed(value):
+    """SQLite שומר מספרים שלמים עם סימן (64 ביט)"""
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+
+def _to_unsigned(value):
+    return value + (1 << SIMHASH_BITS) if value < 0 else value
+
+
+class FingerprintIndex:
+    def __init__(self, path='fingerprints.db', max_distance=MAX_DISTANCE):
+        if max_distance > MAX_DISTANCE:
+            raise ValueError(f"max_distance must be at most {MAX_DISTANCE}")
+        self.max_distance = max_distance
+        self._lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def previous_body_hash(self, url):
+        """hash גוף התגובה מהגירוד הקודם של ה-URL (או None)"""
+        with self._lock:
+            row = self.conn.execute('SELECT body_hash FROM fingerprints WHERE url = ?', (url,)).fetchone()
+        return row[0] if row else None
+
+    def is_unchanged(self, url, page_hash):
+        """האם גוף התגובה זהה לגירוד הקודם - אפשר לדלג על חילוץ ושמירה"""
+        return page_hash is not None and self.previous_body_hash(url) == page_hash
+
+    def find_duplicate(self, url, text_hash, text_simhash):
+        """
+        כמעט-כפילות של הדף בין הדפים האחרים באינדקס
+
+        Returns:
+            dict: {'url': ..., 'distance': מרחק Hamming} או None
+        """
+        with self._lock:
+            return self._find_duplicate_locked(url, text_hash, text_simhash)
+
+    def _find_duplicate_locked(self, url, text_hash, text_simhash):
+        row = self.conn.execute('SELECT url FROM fingerprints WHERE content_hash = ? AND url != ? LIMIT 1',
+                                (text_hash, url)).fetchone()
+        if row:
+            return {'url': row[0], 'distance': 0}
+
+        # מועמדים - דפים שזהים לפחות ברצועה אחת (חיפוש באינדקס, לא סריקה)
+        where = ' OR '.join(f'band{i} = ?' for i in range(BANDS))
+        candidates = self.conn.execute(
+            f'SELECT url, simhash FROM fingerprints WHERE ({where}) AND url != ? LIMIT {MAX_CANDIDATES}',
+            _bands(text_simhash) + [url]
+        )
+        best = None
+        for candidate_url, candidate_simhash in candidates:
+            distance = hamming_distance(text_simhash, _to_unsigned(candidate_simhash))
+            if distance <= self.max_distance and (best is None or distance < best['distance']):
+                best = {'url': candidate_url, 'distance': distance}
+        return best
+
+    def record(self, url, page_hash, text):
+        """
+        חישוב טביעת האצבע של הטקסט, חיפוש כמעט-כפילות ועדכון האינדקס
+
+        Returns:
+            dict: content_hash, simhash (hex) ו-near_duplicate_of
+        """
+        text_hash, text_simhash = fingerprint_text(text)
+        with self._lock:
+            duplicate = self._find_duplicate_locked(url, text_hash, text_simhash)
+            columns = ', '.join(f'band{i}' for i in range(BANDS))
+            # טרנזקציה קצרה לכל עדכון (זולה ב-WAL) - לא מחזיקים נעילת כתיבה בין גירודים,
+            # כך שמספר תהליכים (למשל workers של השרת) יכולים לעבוד על אותו קובץ
+            with self.conn:
+                self.conn.execute(
+                    f'INSERT OR REPLACE INTO fingerprints (url, body_hash, content_hash, simhash, {columns}, updated_at) '
+                    f'VALUES (?, ?, ?, ?, {", ".join("?" * BANDS)}, ?)',
+                    [url, page_hash, text_hash, _to_signed(text_simhash)] + _bands(text_simhash) +
+                    [datetime.now().isoformat()]
+                )
+        return {
+            'content_hash': text_hash,
+            'simhash': f'{text_simhash:016x}',
+            'near_duplicate_of': duplicate
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
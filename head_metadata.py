@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מצב מטא-דאטה: קריאת ה-<head> בלבד
+התגובה נקראת בזרימה בחלקים קטנים, מפוענחת תוך כדי, והקריאה נעצרת ב-</head> (או בתחילת ה-<body>,
+או אחרי MAX_HEAD_BYTES) - שאר הדף לא מורד. מחולצים title, meta, OpenGraph / Twitter ו-canonical
+"""
+
+import codecs
+import urllib.parse
+from html.parser import HTMLParser
+
+from low_memory import detect_encoding
+
+HEAD_CHUNK_SIZE = 8 * 1024
+MAX_HEAD_BYTES = 128 * 1024  # דף בלי </head> (או עם head ענק) לא נקרא עד הסוף
+# תגיות שיכולות להופיע ב-<head>; כל תגית אחרת (או <body>) פירושה שה-head נגמר
+HEAD_CONTENT_TAGS = frozenset(['html', 'head', 'title', 'meta', 'link', 'base', 'script', 'style',
+                               'noscript', 'template'])
+SOCIAL_PREFIXES = ('og:', 'twitter:', 'article:')
+
+
+class HeadParser(HTMLParser):
+    """
+    מפענח מבוסס-אירועים ל-<head> שמקבל את התגובה בחלקים (feed_chunk)
+    done - ה-head נקרא במלואו; truncated - נעצר בגלל תקרת הבתים
+    """
+
+    def __init__(self, encoding='utf-8', max_bytes=MAX_HEAD_BYTES):
+        super().__init__(convert_charrefs=True)
+        self.max_bytes = max_bytes
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+
+        self.title = None
+        self.meta = {}        # name -> content (מופע ראשון)
+        self.properties = {}  # og:* / twitter:* -> content
+        self.canonical = None
+        self.base = None
+        self.lang = None
+        self.bytes_read = 0
+        self.done = False
+        self.truncated = False
+
+        self._title_parts = None
+
+    def feed_chunk(self, chunk):
+        """חלק נוסף מהתגובה; True כשאין צורך להמשיך לקרוא"""
+        self.bytes_read += len(chunk)
+        self.feed(self._decoder.decode(chunk))
+        if not self.done and self.bytes_read >= self.max_bytes:
+            self.truncated = True
+        return self.done or self.truncated
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag not in HEAD_CONTENT_TAGS:
+            self._finish()
+            return
+        attrs = {name: value or '' for name, value in attrs}
+
+        if tag == 'html':
+            self.lang = self.lang or attrs.get('lang') or None
+        elif tag == 'title' and self.title is None:
+            self._title_parts = []
+        elif tag == 'meta':
+            name = attrs.get('name', '').lower()
+            prop = attrs.get('property', '').lower()
+            if name and name not in self.meta:
+                self.meta[name] = attrs.get('content', '')
+            # יש אתרים שמסמנים og:* עם name ו-twitter:* עם property
+            for key in (prop, name):
+                if key.startswith(SOCIAL_PREFIXES) and key not in self.properties:
+                    self.properties[key] = attrs.get('content', '')
+        elif tag == 'link' and self.canonical is None:
+            if 'canonical' in attrs.get('rel', '').lower().split() and attrs.get('href', '').strip():
+                self.canonical = attrs['href'].strip()
+        elif tag == 'base' and self.base is None and attrs.get('href', '').strip():
+            self.base = attrs['href'].strip()
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if tag == 'title' and self._title_parts is not None:
+            self.title = ''.join(self._title_parts)
+            self._title_parts = None
+        elif tag == 'head':
+            self._finish()
+
+    def handle_data(self, data):
+        if self._title_parts is not None and not self.done:
+            self._title_parts.append(data)
+
+    def _finish(self):
+        if self._title_parts is not None:  # <title> שלא נסגר
+            self.title = ''.join(self._title_parts)
+            self._title_parts = None
+        self.done = True
+
+    def absolute(self, url, href):
+        """כתובת מוחלטת ל-href מה-head (לפי <base> אם יש)"""
+        return urllib.parse.urljoin(urllib.parse.urljoin(url, self.base or ''), href) if href else None
+
+    def social(self):
+        """שדות OpenGraph / Twitter כ-dict (og:title -> title, twitter:card -> twitter:card)"""
+        return {(key[3:] if key.startswith('og:') else key): value for key, value in self.properties.items()}
+
+
+def read_head(response, max_bytes=MAX_HEAD_BYTES, chunk_size=HEAD_CHUNK_SIZE):
+    """
+    קריאת ה-head מתגובה שנפתחה עם stream=True (requests או Http2Response)
+    הקריאה נעצרת כשה-head הסתיים; הקורא סוגר את התגובה - החיבור נסגר ושאר הדף לא מורד
+    """
+    parser = None
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if not chunk:
+            continue
+        if parser is None:
+            parser = HeadParser(detect_encoding(response, chunk[:4096]), max_bytes)
+        if parser.feed_chunk(chunk):
+            break
+    return parser if parser is not None else HeadParser(max_bytes=max_bytes)
+
+
+async def aread_head(response, max_bytes=MAX_HEAD_BYTES, chunk_size=HEAD_CHUNK_SIZE):
+    """read_head לתגובת httpx אסינכרונית (client.stream)"""
+    parser = None
+    async for chunk in response.aiter_bytes(chunk_size):
+        if not chunk:
+            continue
+        if parser is None:
+            parser = HeadParser(detect_encoding(response, chunk[:4096]), max_bytes)
+        if parser.feed_chunk(chunk):
+            break
+    return parser if parser is not None else HeadParser(max_bytes=max_bytes)
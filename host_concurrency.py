@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מקביליות אדפטיבית לכל host (AIMD)
+כל תגובה תקינה מעלה את המגבלה בהדרגה (+1 לכל "חלון" של limit תגובות) כל עוד ה-latency יציב;
+429 / 503 חותכים את המגבלה בחצי ועוצרים את ה-host לזמן קצר, וקפיצת latency מורידה אותה ב-20%.
+המגבלות שנלמדו נשמרות ב-SQLite וריצה הבאה מתחילה מהן
+"""
+
+import re
+import sqlite3
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+
+INITIAL_LIMIT = 2
+MIN_LIMIT = 1
+MAX_LIMIT = 16
+BACKOFF_FACTOR = 0.5  # 429 / 503
+LATENCY_BACKOFF_FACTOR = 0.8
+LATENCY_SPIKE = 2.0  # latency אחרון (ממוצע קצר) פי 2 מהבסיס נחשב קפיצה
+MIN_SAMPLES = 5  # תגובות לפני שמזהים קפיצת latency
+BASELINE_ALPHA = 0.002  # הבסיס (ה-latency "הרגיל" של ה-host) עולה לאט מאוד...
+BASELINE_DROP_ALPHA = 0.3  # ...ויורד מהר - עלייה הדרגתית בעומס לא נבלעת בבסיס
+RECENT_ALPHA = 0.3
+PAUSE_SECONDS = 5.0  # עצירת ה-host אחרי 429 / 503 (אין גישה ל-Retry-After מתוך התוצאה)
+BACKOFF_STATUSES = frozenset([429, 503])
+HOST_LIMITS_PATH = 'host_limits.db'
+
+_HTTP_ERROR = re.compile(r'^(\d{3}) (?:Client|Server) Error')
+
+
+def result_status(result):
+    """קוד ה-HTTP של תוצאה שנכשלה (מהודעת raise_for_status), או None"""
+    match = _HTTP_ERROR.match(result.get('error') or '')
+    return int(match.group(1)) if match else None
+
+
+class _HostState:
+    __slots__ = ('limit', 'in_flight', 'baseline', 'recent', 'samples', 'paused_until', 'last_backoff',
+                 'backoffs', 'throttled', 'peak_limit')
+
+    def __init__(self, limit, baseline=None):
+        self.limit = float(limit)
+        self.in_flight = 0
+        self.baseline = baseline
+        self.recent = baseline
+        self.samples = MIN_SAMPLES if baseline else 0  # latency שמור נחשב בסיס מוכן
+        self.paused_until = 0.0
+        self.last_backoff = 0.0
+        self.backoffs = 0
+        self.throttled = 0  # תגובות 429 / 503
+        self.peak_limit = self.limit
+
+
+class HostLimitStore:
+    """המגבלה וה-latency הבסיסי שנלמדו לכל host (SQLite)"""
+
+    def __init__(self, path=HOST_LIMITS_PATH):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS host_limits (host TEXT PRIMARY KEY, concurrency REAL NOT NULL, '
+                          'latency REAL, updated_at TEXT NOT NULL)')
+
+    def load(self, host):
+        """(מגבלה, latency בסיסי) או None"""
+        return self.conn.execute('SELECT concurrency, latency FROM host_limits WHERE host = ?', (host,)).fetchone()
+
+    def save(self, limits):
+        """limits - {host: (מגבלה, latency)}"""
+        now = datetime.now().isoformat()
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO host_limits (host, concurrency, latency, updated_at) '
+                                  'VALUES (?, ?, ?, ?)',
+                                  [(host, limit, latency, now) for host, (limit, latency) in limits.items()])
+
+    def close(self):
+        self.conn.close()
+
+
+class AdaptiveHostLimiter:
+    """
+    מגבלת בקשות במקביל לכל host שמתכווננת לפי התגובות
+
+    Args:
+        store (HostLimitStore): מגבלות מריצות קודמות (None - מתחילים מ-initial בכל ריצה)
+        initial (int): מגבלה ל-host חדש
+        max_limit (int): תקרה לכל host
+    """
+
+    def __init__(self, store=None, initial=INITIAL_LIMIT, max_limit=MAX_LIMIT, min_limit=MIN_LIMIT):
+        self.store = store
+        self.initial = min(initial, max_limit)
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url):
+        return urllib.parse.urlparse(url).netloc.lower()
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            saved = self.store.load(host) if self.store is not None else None
+            if saved is not None:
+                state = _HostState(min(max(saved[0], self.min_limit), self.max_limit), saved[1])
+            else:
+                state = _HostState(self.initial)
+            self._hosts[host] = state
+        return state
+
+    def try_acquire(self, url):
+        """מקום לבקשה ל-host אם יש (ואינו בעצירה אחרי 429 / 503) - בלי להמתין"""
+        with self._lock:
+            state = self._state(self._host(url))
+            if state.paused_until > time.monotonic() or state.in_flight >= int(state.limit):
+                return False
+            state.in_flight += 1
+            return True
+
+    def release(self, url, seconds, failed=False, status=None):
+        """
+        סיום בקשה ל-host: עדכון המגבלה לפי זמן התגובה והסטטוס
+
+        Args:
+            seconds (float): זמן הבקשה
+            failed (bool): הבקשה נכשלה - לא מעלים את המגבלה
+            status (int): קוד HTTP של הכישלון (429 / 503 מורידים את המגבלה ועוצרים את ה-host)
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(self._host(url))
+            state.in_flight -= 1
+            if status in BACKOFF_STATUSES:
+                state.throttled += 1
+                state.paused_until = max(state.paused_until, now + PAUSE_SECONDS)
+                self._backoff(state, BACKOFF_FACTOR, now)
+            elif not failed:
+                self._observe_latency(state, seconds, now)
+
+    def _observe_latency(self, state, seconds, now):
+        if state.baseline is None:
+            state.baseline = state.recent = seconds
+        else:
+            state.recent += RECENT_ALPHA * (seconds - state.recent)
+        state.samples += 1
+
+        if state.samples >= MIN_SAMPLES and state.recent > state.baseline * LATENCY_SPIKE:
+            self._backoff(state, LATENCY_BACKOFF_FACTOR, now)
+            return
+        # הבסיס מתעדכן רק מתגובות ללא קפיצה - עומס מתמשך לא הופך ל"רגיל"
+        alpha = BASELINE_DROP_ALPHA if seconds < state.baseline else BASELINE_ALPHA
+        state.baseline += alpha * (seconds - state.baseline)
+        # עלייה אדיטיבית: +1 לכל limit תגובות תקינות
+        state.limit = min(self.max_limit, state.limit + 1 / state.limit)
+        state.peak_limit = max(state.peak_limit, state.limit)
+
+    def _backoff(self, state, factor, now):
+        """ירידה כפלית - פעם אחת לכל זמן תגובה (הבקשות שכבר נשלחו לא מורידות שוב)"""
+        if now - state.last_backoff < (state.recent or 0):
+            return
+        state.last_backoff = now
+        state.backoffs += 1
+        state.limit = max(self.min_limit, state.limit * factor)
+        if state.recent is not None and state.baseline is not None:
+            state.recent = state.baseline  # מתחילים למדוד מחדש אחרי הירידה
+
+    def save(self):
+        if self.store is not None:
+            with self._lock:
+                limits = {host: (state.limit, state.baseline) for host, state in self._hosts.items()}
+            if limits:
+                self.store.save(limits)
+
+    def stats(self):
+        with self._lock:
+            return {host: {'limit': round(state.limit, 2), 'peak_limit': round(state.peak_limit, 2),
+                           'latency_ms': round(state.baseline * 1000, 1) if state.baseline else None,
+                           'throttled': state.throttled, 'backoffs': state.backoffs}
+                    for host, state in self._hosts.items()}
+
+    def format_stats(self, top=5):
+        """שורת סיכום - ה-hosts עם הכי הרבה האטות"""
+        stats = self.stats()
+        if not stats:
+            return ''
+        throttled = sum(host['throttled'] for host in stats.values())
+        busiest = sorted(stats.items(), key=lambda item: (item[1]['throttled'], item[1]['backoffs']), reverse=True)
+        hosts = ', '.join(f"{host} {info['limit']:g} (שיא {info['peak_limit']:g})" for host, info in busiest[:top])
+        return f"מקביליות אדפטיבית: {len(stats)} hosts, {throttled} תגובות 429/503 | {hosts}"
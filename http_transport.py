@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+תעבורת HTTP חלופית ל-requests: HTTP/2 עם דחיסת brotli / zstd (httpx)
+Http2Session חושף את החלק של requests.Session שהסקריפטים משתמשים בו (headers, proxies, get),
+כך שהבחירה בתעבורה לא משנה את קוד החילוץ; שגיאות מתורגמות לחריגות של requests
+"""
+
+import importlib.util
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+from requests.structures import CaseInsensitiveDict
+
+
+def _installed(*modules):
+    """האם אחת החבילות מותקנת - בלי לטעון אותה (בדיקה זולה בעליית הסקריפט)"""
+    return any(importlib.util.find_spec(module) is not None for module in modules)
+
+
+# אופציונלי - נדרש רק לתעבורת http2; httpx נטען רק כשנוצר Http2Session
+HTTPX_AVAILABLE = _installed('httpx')
+HTTP2_AVAILABLE = HTTPX_AVAILABLE and _installed('h2')  # httpx מנהל HTTP/2 רק אם h2 מותקן
+BROTLI_AVAILABLE = _installed('brotli', 'brotlicffi')
+ZSTD_AVAILABLE = _installed('zstandard')
+
+TRANSPORTS = ('requests', 'http2')
+MAX_CONNECTIONS = 100
+# hosts שה-pool שלהם נשמר ב-session משותף (ברירת המחדל של requests היא 10 - ברשימה
+# שמפוזרת על יותר hosts החיבורים נסגרים ונפתחים מחדש)
+POOLED_HOSTS = 256
+# כותרות של חיבור HTTP/1.1 - אסורות ב-HTTP/2, ו-httpx מנהל keep-alive בעצמו
+HOP_BY_HOP_HEADERS = frozenset(['connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade'])
+
+
+def accept_encoding(transport='requests'):
+    """ערך Accept-Encoding לתעבורה - br / zstd רק אם המפענח מותקן"""
+    encodings = ['gzip', 'deflate']
+    if transport == 'http2':
+        if BROTLI_AVAILABLE:
+            encodings.append('br')
+        if ZSTD_AVAILABLE:
+            encodings.append('zstd')
+    return ', '.join(encodings)
+
+
+def make_session(transport='requests', pool_size=None):
+    """
+    session לפי שם התעבורה ('requests' או 'http2')
+    pool_size - חיבורים שמורים לכל host, ל-session של requests שמשותף לכמה threads
+    """
+    if transport == 'requests':
+        session = requests.Session()
+        if pool_size:
+            adapter = HTTPAdapter(pool_connections=POOLED_HOSTS, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        return session
+    if transport == 'http2':
+        return Http2Session()
+    raise ValueError(f"transport must be one of {', '.join(TRANSPORTS)}")
+
+
+@contextmanager
+def _translated_errors():
+    """שגיאות httpx כחריגות requests (הסקריפטים תופסים requests.exceptions.RequestException)"""
+    import httpx
+    try:
+        yield
+    except httpx.TimeoutException as e:
+        raise requests.exceptions.Timeout(str(e)) from e
+    except httpx.ProxyError as e:
+        raise requests.exceptions.ProxyError(str(e)) from e
+    except httpx.NetworkError as e:
+        raise requests.exceptions.ConnectionError(str(e)) from e
+    except httpx.TooManyRedirects as e:
+        raise requests.exceptions.TooManyRedirects(str(e)) from e
+    except httpx.HTTPError as e:
+        raise requests.exceptions.RequestException(str(e)) from e
+
+
+class Http2Response:
+    """תגובת httpx בממשק של requests.Response (status_code, headers, content, iter_content...)"""
+
+    def __init__(self, response, elapsed):
+        self._response = response
+        self._content = None
+        self.elapsed = elapsed  # זמן עד קבלת הכותרות, כמו ב-requests
+        self.encoding = response.charset_encoding
+
+    @property
+    def status_code(self):
+        return self._response.status_code
+
+    @property
+    def reason(self):
+        return self._response.reason_phrase
+
+    @property
+    def headers(self):
+        return self._response.headers
+
+    @property
+    def url(self):
+        return str(self._response.url)
+
+    @property
+    def http_version(self):
+        return self._response.http_version
+
+    @property
+    def bytes_downloaded(self):
+        """בתים שהתקבלו ברשת (לפני פענוח הדחיסה)"""
+        return self._response.num_bytes_downloaded
+
+    @property
+    def content(self):
+        if self._content is None:
+            with _translated_errors():
+                self._content = self._response.read()
+        return self._content
+
+    @property
+    def apparent_encoding(self):
+        return chardet.detect(self.content)['encoding']
+
+    @property
+    def text(self):
+        encoding = self.encoding or self.apparent_encoding or 'utf-8'
+        try:
+            return str(self.content, encoding, errors='replace')
+        except LookupError:
+            return str(self.content, errors='replace')
+
+    def iter_content(self, chunk_size=1):
+        """גוף התגובה בחלקים, לאחר פענוח Content-Encoding"""
+        if self._content is not None:
+            for start in range(0, len(self._content), chunk_size):
+                yield self._content[start:start + chunk_size]
+            return
+        with _translated_errors():
+            yield from self._response.iter_bytes(chunk_size)
+
+    def raise_for_status(self):
+        if 400 <= self.status_code < 600:
+            kind = 'Client Error' if self.status_code < 500 else 'Server Error'
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} {kind}: {self.reason} for url: {self.url}", response=self
+            )
+
+    def close(self):
+        self._response.close()
+
+
+class Http2Session:
+    """
+    session בממשק של requests.Session מעל httpx.Client עם HTTP/2
+    לקוח אחד משותף לכל ה-threads - בקשות במקביל לאותו host עוברות כ-streams על חיבור אחד
+    """
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, http2=True):
+        if not HTTPX_AVAILABLE:
+            raise RuntimeError("תעבורת http2 דורשת את httpx: pip install 'httpx[http2,brotli,zstd]'")
+        self.headers = CaseInsensitiveDict({'Accept-Encoding': accept_encoding('http2')})
+        self.proxies = {}
+        self.verify = True  # כמו requests.Session.verify - False או נתיב לקובץ CA
+        self.max_connections = max_connections
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._clients = {}  # proxy -> לקוח (None - לפי self.proxies); לכל proxy חיבורים משלו
+        self._lock = threading.Lock()
+
+    def _get_client(self, proxy=None):
+        """הלקוח נוצר בבקשה הראשונה - אחרי שה-proxies וה-verify הוגדרו"""
+        import httpx
+        with self._lock:
+            client = self._clients.get(proxy)
+            if client is None:
+                proxies = self.proxies if proxy is None else {'http': proxy, 'https': proxy}
+                mounts = {f'{scheme}://': httpx.HTTPTransport(proxy=url, http2=self.http2, verify=self.verify)
+                          for scheme, url in proxies.items() if url}
+                client = self._clients[proxy] = httpx.Client(
+                    http2=self.http2,
+                    verify=self.verify,
+                    follow_redirects=True,
+                    limits=httpx.Limits(max_connections=self.max_connections),
+                    mounts=mounts or None
+                )
+            return client
+
+    def _request_headers(self):
+        return {name: value for name, value in self.headers.items() if name.lower() not in HOP_BY_HOP_HEADERS}
+
+    def get(self, url, timeout=None, stream=False, proxies=None):
+        """proxies - כמו ב-requests ({'http': ..., 'https': ...}) לבקשה הזו בלבד"""
+        proxy = proxies.get(url.split(':', 1)[0].lower()) if proxies else None
+        client = self._get_client(proxy)
+        request = client.build_request('GET', url, headers=self._request_headers(), timeout=timeout)
+        started = time.perf_counter()
+        with _translated_errors():
+            response = client.send(request, stream=True)
+        wrapped = Http2Response(response, timedelta(seconds=time.perf_counter() - started))
+        if not stream:
+            try:
+                wrapped.content
+            finally:
+                response.close()
+        return wrapped
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מדידת זמן הייבוא של מודולי הגירוד - כל מדידה בתהליך Python חדש (ללא מטמון מודולים),
+בתיקייה זמנית כדי שקבצי לוג / מאגרים שנוצרים בייבוא לא יכתבו לתיקיית הפרויקט
+
+שימוש:
+    python import_benchmark.py --repeat 10
+    python import_benchmark.py advanced_web_scraper batch_runner --top 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+MODULES = (
+    'advanced_web_scraper',
+    'web_scraper',
+    'web_scraper_fixed',
+    'simple_scraper',
+    'batch_runner',
+    'http_transport',
+    'columnar_export',
+    'real_scraper_server',
+    'async_scraper_server',
+)
+TOP_IMPORTS = 5
+
+_TIMED_IMPORT = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def _run(args, cwd):
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.run([sys.executable] + args, cwd=cwd, env=env, capture_output=True, text=True)
+
+
+def time_import(module, repeat, cwd):
+    """זמני ייבוא (שניות) של המודול ב-repeat תהליכים חדשים, או None אם הייבוא נכשל"""
+    samples = []
+    for _ in range(repeat):
+        completed = _run(['-c', _TIMED_IMPORT.format(module=module)], cwd)
+        if completed.returncode != 0:
+            return None, completed.stderr.strip().splitlines()[-1:]
+        samples.append(float(completed.stdout.strip().splitlines()[-1]))
+    return samples, None
+
+
+def heaviest_imports(module, cwd, top=TOP_IMPORTS):
+    """הייבואים הישירים של המודול שלקחו הכי הרבה זמן (לפי python -X importtime)"""
+    completed = _run(['-X', 'importtime', '-c', f'import {module}'], cwd)
+    direct = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        # רמת הקינון לפי ההזחה - ייבוא ישיר של המודול מוזח ברמה אחת
+        if name.startswith('   ') and not name.startswith('     ') and cumulative.strip().isdigit():
+            direct.append((int(cumulative), name.strip()))
+    return sorted(direct, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="זמן ייבוא של מודולי הגירוד (תהליך חדש לכל מדידה)")
+    parser.add_argument('modules', nargs='*', default=list(MODULES))
+    parser.add_argument('--repeat', type=int, default=5, help='מדידות לכל מודול')
+    parser.add_argument('--top', type=int, default=TOP_IMPORTS, help='כמה ייבואים כבדים להציג לכל מודול')
+    args = parser.parse_args(argv)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as cwd:
+        print(f"{'מודול':<24}{'חציון (ms)':>12}{'מינימום (ms)':>14}   ייבואים כבדים")
+        for module in args.modules:
+            samples, error = time_import(module, args.repeat, cwd)
+            if samples is None:
+                failed = True
+                print(f"{module:<24}{'-':>12}{'-':>14}   נכשל: {' '.join(error)}")
+                continue
+            heavy = ', '.join(f"{name} {micros / 1000:.0f}" for micros, name in heaviest_imports(module, cwd, args.top))
+            print(f"{module:<24}{statistics.median(samples) * 1000:>12.1f}{min(samples) * 1000:>14.1f}   {heavy}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+עיבוד דפים גדולים בזיכרון חסום
+קריאה בחלקים, מפענח מבוסס-אירועים (ללא עץ) לדפים מעל סף, ומדידת שיא זיכרון לכל דף
+"""
+
+import codecs
+import re
+import threading
+import tracemalloc
+from html.parser import HTMLParser
+
+from text_extraction import TextBudget
+
+
+# דפים גדולים מסף זה מעובדים בזרימה במקום לבנות עץ BeautifulSoup
+LOW_MEMORY_STREAM_THRESHOLD = 2 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+VOID_TAGS = frozenset(['area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                       'link', 'meta', 'param', 'source', 'track', 'wbr'])
+
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+def read_body(response, threshold=LOW_MEMORY_STREAM_THRESHOLD, chunk_size=CHUNK_SIZE):
+    """
+    קריאת גוף תגובה שנפתחה עם stream=True עד לסף
+
+    Returns:
+        tuple: (bytes, None) אם הדף קטן מהסף,
+               או (None, iterator) שמחזיר את כל החלקים - כולל אלו שכבר נקראו - לעיבוד בזרימה
+    """
+    length = response.headers.get('content-length', '')
+    chunks = response.iter_content(chunk_size=chunk_size)
+    if length.isdigit() and int(length) > threshold:
+        return None, chunks
+
+    buffered = []
+    size = 0
+    for chunk in chunks:
+        buffered.append(chunk)
+        size += len(chunk)
+        if size > threshold:
+            return None, _chain(buffered, chunks)
+    return b''.join(buffered), None
+
+
+def _chain(buffered, rest):
+    """החלקים שכבר נקראו ואחריהם שאר התגובה"""
+    while buffered:
+        yield buffered.pop(0)
+    yield from rest
+
+
+def _matches_selector(selector, tag, attrs):
+    """התאמת selector פשוט (תגית, .class או #id) לתגית פותחת"""
+    if selector.startswith('.'):
+        return selector[1:] in attrs.get('class', '').split()
+    if selector.startswith('#'):
+        return attrs.get('id') == selector[1:]
+    return tag == selector
+
+
+def detect_encoding(response, head):
+    """קידוד מתוך Content-Type או מ-<meta charset> בתחילת הדף (ללא apparent_encoding שדורש את כל התוכן)"""
+    if 'charset' in response.headers.get('content-type', '').lower() and response.encoding:
+        return response.encoding
+    match = _META_CHARSET.search(head)
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode('ascii')).name
+        except LookupError:
+            pass
+    return 'utf-8'
+
+
+class StreamingPageParser(HTMLParser):
+    """
+    מפענח HTML מבוסס-אירועים שאוסף את נתוני הדף תוך כדי קריאה
+    הזיכרון חסום במגבלות (קישורים, תמונות, אורך טקסט) ולא בגודל הדף
+    """
+
+    def __init__(self, max_links, max_images, text_budget, text_skip_tags=(),
+                 accept_link=None, accept_image=None, text_containers=()):
+        super().__init__(convert_charrefs=True)
+        self.max_links = max_links
+        self.max_images = max_images
+        self.text_budget = text_budget
+        self.text_skip_tags = frozenset(text_skip_tags)
+        self.accept_link = accept_link
+        self.accept_image = accept_image
+        # אזורי תוכן עיקרי לפי עדיפות (למשל 'main', '.content', '#content') - עד סוף הדף לא ידוע איזה מהם קיים,
+        # לכן לכל אחד נאסף טקסט נפרד מהמופע הראשון שלו (כל אחד חסום ב-max_length של text_budget)
+        self.text_containers = tuple(text_containers)
+        self._container_budgets = {}  # selector -> TextBudget
+        self._open_containers = []    # [selector, tag, עומק תגיות באותו שם]
+
+        self.title = None
+        self.meta = {}        # name -> content (מופע ראשון)
+        self.properties = {}  # property (og:*) -> content
+        self.headings = {}
+        self.links = []       # (attrs, text)
+        self.images = []      # attrs
+        self.bytes_read = 0
+
+        self._title_parts = None
+        self._heading = None  # (tag, parts)
+        self._link = None     # (attrs, parts)
+        self._skip_depth = 0
+
+    def feed_bytes(self, chunks, encoding):
+        """פענוח החלקים לפי הסדר עם מפענח קידוד מצטבר"""
+        decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        for chunk in chunks:
+            self.bytes_read += len(chunk)
+            self.feed(decoder.decode(chunk))
+        self.feed(decoder.decode(b'', final=True))
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value or '' for name, value in attrs}
+
+        if tag in self.text_skip_tags and tag not in VOID_TAGS:
+            self._skip_depth += 1
+
+        if self.text_containers and tag not in VOID_TAGS:
+            self._open_container(tag, attrs)
+
+        if tag == 'title' and self.title is None:
+            self._title_parts = []
+        elif tag == 'meta':
+            name = attrs.get('name', '').lower()
+            prop = attrs.get('property', '').lower()
+            if name and name not in self.meta:
+                self.meta[name] = attrs.get('content', '')
+            if prop and prop not in self.properties:
+                self.properties[prop] = attrs.get('content', '')
+        elif tag in ('h1', 'h2', 'h3', 'h4', 'h5', 'h6') and self._heading is None:
+            self._heading = (tag, [])
+        elif tag == 'a' and 'href' in attrs and self._link is None and len(self.links) < self.max_links:
+            if self.accept_link is None or self.accept_link(attrs):
+                self._link = (attrs, [])
+        elif tag == 'img' and len(self.images) < self.max_images:
+            if self.accept_image is None or self.accept_image(attrs):
+                self.images.append(attrs)
+
+    def handle_endtag(self, tag):
+        if tag in self.text_skip_tags and tag not in VOID_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+        if self._open_containers:
+            for container in self._open_containers:
+                if container[1] == tag:
+                    container[2] -= 1
+            self._open_containers = [container for container in self._open_containers if container[2] > 0]
+
+        if tag == 'title' and self._title_parts is not None:
+            self.title = ''.join(self._title_parts)
+            self._title_parts = None
+        elif self._heading is not None and tag == self._heading[0]:
+            self.headings.setdefault(tag, []).append(''.join(self._heading[1]).strip())
+            self._heading = None
+        elif tag == 'a' and self._link is not None:
+            attrs, parts = self._link
+            self.links.append((attrs, ''.join(parts)))
+            self._link = None
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+        if self._heading is not None:
+            self._heading[1].append(data)
+        if self._link is not None:
+            self._link[1].append(data)
+        if not self._skip_depth:
+            if not self.text_budget.full:
+                self.text_budget.add(data)
+            for selector, _, _ in self._open_containers:
+                self._container_budgets[selector].add(data)
+
+    def _open_container(self, tag, attrs):
+        """מעקב אחרי אזורי התוכן הפתוחים ופתיחת המופע הראשון של selector (מחוץ לתגיות מדולגות)"""
+        for container in self._open_containers:
+            if container[1] == tag:
+                container[2] += 1
+        if self._skip_depth:
+            return
+        for selector in self.text_containers:
+            if selector not in self._container_budgets and _matches_selector(selector, tag, attrs):
+                budget = self.text_budget
+                self._container_budgets[selector] = TextBudget(budget.max_length, budget.separator,
+                                                               budget.strip, budget.min_line_length)
+                self._open_containers.append([selector, tag, 1])
+
+    def text(self):
+        """טקסט אזור התוכן העיקרי הראשון לפי סדר text_containers שנמצא בדף, ואם אין - טקסט כל הדף"""
+        for selector in self.text_containers:
+            budget = self._container_budgets.get(selector)
+            if budget is not None:
+                return budget.getvalue()
+        return self.text_budget.getvalue()
+
+
+_measure_lock = threading.Lock()
+
+
+def measure_peak_memory(func, *args, **kwargs):
+    """
+    הרצת פונקציה ומדידת שיא הזיכרון שהוקצה במהלכה (tracemalloc)
+
+    tracemalloc גלובלי לתהליך - דף אחד נמדד בכל רגע; דפים שרצים במקביל
+    למדידה פעילה לא נמדדים (None), והמדידה עצמה כוללת גם את ההקצאות שלהם
+
+    Returns:
+        tuple: (תוצאת הפונקציה, שיא זיכרון בבתים או None)
+    """
+    if not _measure_lock.acquire(blocking=False):
+        return func(*args, **kwargs), None
+
+    started_here = not tracemalloc.is_tracing()
+    try:
+        if started_here:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        result = func(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        return result, max(peak, 0)
+    finally:
+        if started_here:
+            tracemalloc.stop()
+        _measure_lock.release()
@@ -36,6 +36,7 @@ class RealWebScraperApp {
         this.isScraping = false;
         this.currentIndex = 0;
         this.selectedExportFormat = null;
+        this.abortController = null;
         this.apiBaseUrl = 'http://localhost:5000/api';
         this.init();
     }
@@ -108,6 +109,7 @@ class RealWebScraperApp {
             li.innerHTML = `
                 <div class="url-text">${url}</div>
                 <div>
+                    <span class="url-stage" id="stage-${index}"></span>
                     <span class="status-indicator" id="status-${index}"></span>
                     <button onclick="app.removeUrl(${index})" class="btn btn-danger btn-sm">הסר</button>
                 </div>
@@ -165,6 +167,7 @@ class RealWebScraperApp {
         this.isScraping = true;
         this.currentIndex = 0;
         this.results = [];
+        this.updateUrlList(); // ניקוי סטטוסים מהריצה הקודמת
         
         // עדכון UI
         this.updateScrapingUI(true);
@@ -174,31 +177,149 @@ class RealWebScraperApp {
         const settings = this.getSettings();
         
         try {
-            // גירוד אתר אחר אתר
-            for (let i = 0; i < this.urls.length; i++) {
-                if (!this.isScraping) break; // אם המשתמש עצר
-                
-                this.currentIndex = i;
-                this.updateProgress();
-                this.updateUrlStatus(i, 'pending');
-                
-                this.showToast(`מגרד אתר ${i + 1}/${this.urls.length}: ${this.getDomainFromUrl(this.urls[i])}`);
-                
-                const result = await this.scrapeUrlReal(this.urls[i], settings);
-                this.results.push(result);
-                
-                this.updateUrlStatus(i, result.status);
-                this.updateProgress();
-            }
+            await this.scrapeWithProgress(settings);
             
-            this.showToast('גירוד הושלם בהצלחה! 🎉');
-            this.displayResults();
+            if (this.isScraping) {
+                this.showToast('גירוד הושלם בהצלחה! 🎉');
+            }
             
         } catch (error) {
-            this.showToast('שגיאה בגירוד: ' + error.message, 'error');
+            if (error.name !== 'AbortError') {
+                this.showToast('שגיאה בגירוד: ' + error.message, 'error');
+            }
         } finally {
+            this.isScraping = false;
+            this.abortController = null;
+            this.results = this.results.filter(Boolean);
             this.updateScrapingUI(false);
             this.hideProgress();
+            this.displayResults();
+        }
+    }
+
+    // גירוד כל האתרים בבקשה אחת עם התקדמות חיה מהשרת (Server-Sent Events)
+    async scrapeWithProgress(settings) {
+        this.abortController = new AbortController();
+        const response = await fetch(`${this.apiBaseUrl}/scrape_stream`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                urls: this.urls,
+                settings: settings
+            }),
+            signal: this.abortController.signal
+        });
+
+        // שרת ישן ללא /api/scrape_stream - גירוד אתר אחר אתר
+        if (response.status === 404) {
+            return this.scrapeSequentially(settings);
+        }
+        if (!response.ok || !response.body) {
+            throw await this.responseError(response);
+        }
+
+        // EventSource תומך רק ב-GET, לכן הזרם נקרא ישירות מגוף התגובה
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += value;
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const frame = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                const event = this.parseSseFrame(frame);
+                if (event) {
+                    this.handleProgressEvent(event.type, event.data);
+                }
+            }
+        }
+    }
+
+    // שגיאה מתגובת השרת - כולל הודעת השרת וזמן ההמתנה כשהשרת עמוס (429/503 עם Retry-After)
+    async responseError(response) {
+        let message = `HTTP ${response.status}: ${response.statusText}`;
+        try {
+            const body = await response.json();
+            if (body.error) message = `HTTP ${response.status}: ${body.error}`;
+        } catch (e) {
+            // גוף שאינו JSON - נשארים עם שורת הסטטוס
+        }
+        const retryAfter = response.headers.get('Retry-After');
+        if (retryAfter) {
+            message += ` (נסה שוב בעוד ${retryAfter} שניות)`;
+        }
+        return new Error(message);
+    }
+
+    // פענוח אירוע SSE בודד (שורות event: / data:, הערות keep-alive מתעלמים מהן)
+    parseSseFrame(frame) {
+        let type = 'message';
+        const dataLines = [];
+        frame.split('\n').forEach(line => {
+            if (line.startsWith('event:')) {
+                type = line.slice(6).trim();
+            } else if (line.startsWith('data:')) {
+                dataLines.push(line.slice(5).trim());
+            }
+        });
+        if (dataLines.length === 0) return null;
+        return { type: type, data: JSON.parse(dataLines.join('\n')) };
+    }
+
+    // עדכון ה-UI לפי אירוע התקדמות מהשרת
+    handleProgressEvent(type, data) {
+        switch (type) {
+            case 'started':
+                this.updateUrlStatus(data.index, 'pending');
+                this.updateUrlStage(data.index, 'מתחבר...');
+                break;
+            case 'fetched':
+                this.updateUrlStage(data.index, `הורד (${data.statusCode}) ${Math.round(data.fetchMs)}ms`);
+                break;
+            case 'parsed':
+                this.updateUrlStage(data.index, `חולץ ${Math.round(data.parseMs)}ms`);
+                break;
+            case 'done':
+            case 'error': {
+                this.results[data.index] = data.result;
+                this.currentIndex = data.completed;
+                this.updateUrlStatus(data.index, data.status);
+                const fromCache = data.cache === 'HIT' || data.cache === 'COALESCED' ? ' · מהמטמון' : '';
+                this.updateUrlStage(data.index, type === 'error'
+                    ? `שגיאה: ${data.error}`
+                    : `הושלם ${Math.round(data.totalMs || 0)}ms${fromCache}`);
+                this.updateProgress(data.pagesPerSecond);
+                break;
+            }
+            case 'end':
+                this.currentIndex = data.completed;
+                this.updateProgress(data.pagesPerSecond);
+                break;
+        }
+    }
+
+    // גירוד אתר אחר אתר (שרת ללא זרם התקדמות)
+    async scrapeSequentially(settings) {
+        for (let i = 0; i < this.urls.length; i++) {
+            if (!this.isScraping) break; // אם המשתמש עצר
+            
+            this.currentIndex = i;
+            this.updateProgress();
+            this.updateUrlStatus(i, 'pending');
+            
+            this.showToast(`מגרד אתר ${i + 1}/${this.urls.length}: ${this.getDomainFromUrl(this.urls[i])}`);
+            
+            const result = await this.scrapeUrlReal(this.urls[i], settings);
+            this.results.push(result);
+            
+            this.updateUrlStatus(i, result.status);
+            this.currentIndex = i + 1;
+            this.updateProgress();
         }
     }
 
@@ -217,7 +338,7 @@ class RealWebScraperApp {
             });
 
             if (!response.ok) {
-                throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+                throw await this.responseError(response);
             }
 
             const result = await response.json();
@@ -238,13 +359,10 @@ class RealWebScraperApp {
         if (!this.isScraping) return;
         
         this.isScraping = false;
-        this.showToast('גירוד הופסק על ידי המשתמש');
-        this.updateScrapingUI(false);
-        this.hideProgress();
-        
-        if (this.results.length > 0) {
-            this.displayResults();
+        if (this.abortController) {
+            this.abortController.abort(); // סגירת הזרם - השרת מפסיק להתחיל אתרים חדשים
         }
+        this.showToast('גירוד הופסק על ידי המשתמש');
     }
 
     // קבלת הגדרות מהטופס
@@ -277,11 +395,18 @@ class RealWebScraperApp {
     }
 
     // עדכון פס התקדמות
-    updateProgress() {
+    updateProgress(pagesPerSecond) {
         const progress = ((this.currentIndex) / this.urls.length) * 100;
         document.getElementById('progressBar').style.width = progress + '%';
         document.getElementById('progressText').textContent = 
             `${Math.round(progress)}% (${this.currentIndex}/${this.urls.length})`;
+        
+        const details = document.getElementById('progressDetails');
+        if (details) {
+            details.textContent = pagesPerSecond !== undefined
+                ? `קצב: ${pagesPerSecond.toFixed(2)} דפים לשנייה`
+                : '';
+        }
     }
 
     // הסתרת פס התקדמות
@@ -297,6 +422,14 @@ class RealWebScraperApp {
         }
     }
 
+    // עדכון שלב הגירוד של URL (מתחבר / הורד / חולץ / הושלם, עם זמנים)
+    updateUrlStage(index, text) {
+        const stageElement = document.getElementById(`stage-${index}`);
+        if (stageElement) {
+            stageElement.textContent = text;
+        }
+    }
+
     // הצגת תוצאות
     displayResults() {
         if (this.results.length === 0) return;
@@ -5,10 +5,11 @@
 מאפשר לאפליקציית HTML לגרד תוכן אמיתי
 """
 
-from flask import Flask, request, jsonify, render_template_string, send_from_directory
+from flask import Flask, request, jsonify, render_template_string, send_from_directory, Response
 from flask_cors import CORS
 import requests
-from bs4 import BeautifulSoup
+from requests.compat import chardet
+from bs4 import BeautifulSoup, SoupStrainer
 import json
 import time
 import urllib.parse
@@ -16,7 +17,22 @@ import logging
 from datetime import datetime
 import os
 import threading
+import itertools
+import hashlib
+import math
+import queue
 from urllib.robotparser import RobotFileParser
+from result_cache import ScrapeResultCache
+from result_store import ResultStore
+from search_index import SearchIndex
+from fingerprint import FingerprintIndex, body_hash, fingerprint_fields
+from admission import AdmissionController, Rejected
+from static_assets import StaticAssets
+from http_transport import make_session, accept_encoding
+from scrape_events import BatchProgress, format_sse, format_heartbeat, SSE_HEADERS, HEARTBEAT_INTERVAL
+from text_extraction import extract_text, TextBudget, head_section
+from low_memory import StreamingPageParser, read_body, detect_encoding, measure_peak_memory
+from head_metadata import read_head
 
 # הגדרת לוגים
 logging.basicConfig(level=logging.INFO)
@@ -25,20 +41,82 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # מאפשר CORS לכל הדומיינים
 
+# תגיות שהתוכן שלהן לא נכלל בטקסט העמוד
+TEXT_SKIP_TAGS = frozenset(['script', 'style', 'nav', 'header', 'footer', 'aside', 'noscript'])
+# אזורי התוכן העיקרי לפי עדיפות - textContent נלקח מהראשון שנמצא (גם בעץ וגם בחילוץ הזורם)
+MAIN_CONTENT_SELECTORS = ('main', 'article', '.content', '.main-content', '.post-content', '#content', '.entry-content')
+
+# שדות התוכן שאפשר לבקש ב-settings['fields'] (ברירת מחדל - כולם)
+RESULT_FIELDS = ('title', 'description', 'keywords', 'headings', 'links', 'images', 'textContent', 'fullHtml')
+# התגיות שכל שדה צריך - כש-textContent לא נדרש, רק הן נבנות בעץ
+FIELD_TAGS = {
+    'title': ('title', 'meta'),
+    'description': ('meta',),
+    'keywords': ('meta',),
+    'headings': ('h1', 'h2', 'h3', 'h4', 'h5', 'h6'),
+    'links': ('a',),
+    'images': ('img',)
+}
+# שדות שנמצאים ב-<head> - כשרק הם נדרשים, המסמך מפוענח רק עד </head>
+HEAD_FIELDS = frozenset(['title', 'description', 'keywords'])
+# טביעת התוכן (contentHash / simhash) מחושבת מהכותרת והטקסט
+FINGERPRINT_FIELDS = frozenset(['title', 'textContent'])
+
+def requested_fields(settings):
+    """
+    השדות שנדרשו ב-settings['fields'] (רשימה או מחרוזת מופרדת בפסיקים) כ-frozenset
+    שדות לא מוכרים - ValueError
+    """
+    fields = settings.get('fields')
+    if not fields:
+        return frozenset(RESULT_FIELDS)
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    fields = frozenset(field.strip() for field in fields if field.strip())
+    unknown = fields - set(RESULT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))} (available: {', '.join(RESULT_FIELDS)})")
+    return fields
+
+def _hashing_chunks(chunks, hasher):
+    """העברת חלקי התגובה הלאה תוך עדכון ה-hash"""
+    for chunk in chunks:
+        hasher.update(chunk)
+        yield chunk
+
+def _ms_since(started):
+    """מילישניות מאז time.perf_counter()"""
+    return round((time.perf_counter() - started) * 1000, 1)
+
+def _decode_html(content):
+    """פענוח גוף התגובה לפי הקידוד המזוהה (כמו response.text עם apparent_encoding)"""
+    encoding = chardet.detect(content)['encoding'] or 'utf-8'
+    try:
+        return str(content, encoding, errors='replace')
+    except LookupError:
+        return str(content, errors='replace')
+
 class RealWebScraper:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, fingerprints=None, transport='requests'):
+        self.fingerprints = fingerprints  # FingerprintIndex - כמעט-כפילויות ודילוג על דפים שלא השתנו
+        self.transport = transport  # 'requests' (HTTP/1.1) או 'http2' (httpx, brotli/zstd)
+        self.session = make_session(transport)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'he-IL,he;q=0.8,en-US;q=0.5,en;q=0.3',
-            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Encoding': accept_encoding(transport),
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         })
     
-    def scrape_url(self, url, settings=None):
-        """גירוד URL אמיתי"""
+    def scrape_url(self, url, settings=None, progress=None):
+        """
+        גירוד URL אמיתי
+        
+        Args:
+            progress (callable): progress(stage, **fields) - דיווח על השלבים fetched / parsed
+        """
         if not settings:
             settings = {
                 'delay': 1,
@@ -64,33 +142,13 @@ class RealWebScraper:
             # השהיה
             time.sleep(settings.get('delay', 1))
             
-            # ביצוע הבקשה
-            response = self.session.get(url, timeout=15)
-            response.raise_for_status()
-            response.encoding = response.apparent_encoding or 'utf-8'
-            
-            # פירוק HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # חילוץ נתונים אמיתיים כולל HTML מלא
-            result = {
-                'url': url,
-                'title': self._extract_title(soup),
-                'description': self._extract_meta_description(soup),
-                'keywords': self._extract_meta_keywords(soup),
-                'headings': self._extract_headings(soup),
-                'links': self._extract_links(soup, url, settings.get('maxLinks', 20)),
-                'images': self._extract_images(soup, url, settings.get('maxImages', 10)),
-                'textContent': self._extract_text_content(soup, settings.get('textLength', 1000)),
-                'responseTime': int(response.elapsed.total_seconds() * 1000),
-                'pageSize': len(response.content),
-                'statusCode': response.status_code,
-                'contentType': response.headers.get('content-type', ''),
-                'lastModified': response.headers.get('last-modified', ''),
-                'scrapedAt': datetime.now().isoformat(),
-                'status': 'success',
-                'fullHtml': response.text
-            }
+            # ביצוע הבקשה וחילוץ (עם מדידת שיא זיכרון אם נדרש)
+            # tracemalloc גלובלי לתהליך ומאט כל הקצאה - רק לפי בקשה מפורשת
+            if settings.get('reportMemory', False):
+                result, peak_memory = measure_peak_memory(self._fetch_and_extract, url, settings, progress)
+                result['peakMemory'] = peak_memory
+            else:
+                result = self._fetch_and_extract(url, settings, progress)
             
             logger.info(f"גירוד הושלם בהצלחה: {url}")
             return result
@@ -112,6 +170,277 @@ class RealWebScraper:
                 'scrapedAt': datetime.now().isoformat()
             }
     
+    def _fetch_and_extract(self, url, settings, progress=None):
+        """הורדת הדף וחילוץ הנתונים"""
+        if settings.get('headOnly', False):
+            return self._fetch_head(url, progress)
+        if settings.get('lowMemory', False):
+            return self._fetch_and_extract_low_memory(url, settings, progress)
+        
+        fetch_started = time.perf_counter()
+        response = self.session.get(url, timeout=15)
+        response.raise_for_status()
+        if progress:
+            progress('fetched', statusCode=response.status_code, bytes=len(response.content),
+                     fetchMs=_ms_since(fetch_started))
+        
+        parse_started = time.perf_counter()
+        result = self.extract_response(url, settings, response.content, response)
+        if progress and not result.get('unchanged'):
+            progress('parsed', parseMs=_ms_since(parse_started))
+        return result
+    
+    def extract_response(self, url, settings, content, response):
+        """
+        חילוץ מגוף תגובה שכבר הורד (משותף לשרת הזה ולמצב האסינכרוני)
+        
+        Args:
+            content (bytes): גוף התגובה
+            response: אובייקט התגובה (status_code, headers, elapsed) - requests או httpx
+        """
+        page_hash = body_hash(content)
+        if self._is_unchanged(url, page_hash, settings):
+            return self._unchanged_result(url, page_hash, response)
+        fields = requested_fields(settings)
+        
+        # פירוק HTML
+        soup = self._parse(content, fields)
+        
+        # חילוץ נתונים אמיתיים כולל HTML מלא
+        result = self._extract_fields(soup, url, settings, fields)
+        result.update(self._response_fields(response, len(content)))
+        if 'fullHtml' in fields:
+            result['fullHtml'] = _decode_html(content)
+        self._add_fingerprint(result, url, page_hash)
+        return result
+    
+    @staticmethod
+    def _parse(markup, fields):
+        """
+        העץ לחילוץ: מלא כש-textContent נדרש, אחרת רק התגיות של השדות שנדרשו
+        (ולשדות <head> בלבד - רק עד </head>)
+        """
+        if 'textContent' in fields:
+            return BeautifulSoup(markup, 'html.parser')
+        tags = {tag for field in fields for tag in FIELD_TAGS.get(field, ())}
+        if not tags:
+            return BeautifulSoup('', 'html.parser')
+        if fields <= HEAD_FIELDS:
+            markup = head_section(markup)
+        return BeautifulSoup(markup, 'html.parser', parse_only=SoupStrainer(sorted(tags)))
+    
+    def _fetch_head(self, url, progress=None):
+        """מצב מטא-דאטה: קריאה בזרימה עד </head> וסגירת החיבור - גוף הדף לא מורד"""
+        fetch_started = time.perf_counter()
+        response = self.session.get(url, timeout=15, stream=True)
+        try:
+            response.raise_for_status()
+            if progress:
+                progress('fetched', statusCode=response.status_code, bytes=None, fetchMs=_ms_since(fetch_started))
+            parse_started = time.perf_counter()
+            parser = read_head(response)
+        finally:
+            response.close()
+        result = self.head_result(url, parser, response)
+        if progress:
+            progress('parsed', parseMs=_ms_since(parse_started))
+        return result
+    
+    def head_result(self, url, parser, response):
+        """תוצאת מצב מטא-דאטה מ-HeadParser (משותף לשרת הזה ולמצב האסינכרוני)"""
+        social = parser.social()
+        if parser.title is not None:
+            title = parser.title.strip()
+        else:
+            title = social.get('title', '').strip() or "ללא כותרת"
+        result = {
+            'url': url,
+            'title': title,
+            'description': (parser.meta.get('description') or social.get('description', '')).strip(),
+            'keywords': parser.meta.get('keywords', '').strip(),
+            'canonical': parser.absolute(url, parser.canonical),
+            'openGraph': social,
+            'lang': parser.lang,
+            'headOnly': True,
+            'headComplete': parser.done
+        }
+        result.update(self._response_fields(response, parser.bytes_read))
+        return result
+    
+    def _fetch_and_extract_low_memory(self, url, settings, progress=None):
+        """
+        הורדה וחילוץ בזיכרון חסום:
+        עותק אחד של ה-HTML (ללא content + text), שחרור העץ מיד בסיום החילוץ,
+        ומפענח מבוסס-אירועים ללא עץ לדפים מעל LOW_MEMORY_STREAM_THRESHOLD
+        """
+        fetch_started = time.perf_counter()
+        response = self.session.get(url, timeout=15, stream=True)
+        try:
+            response.raise_for_status()
+            if progress:
+                # בזרימה ההורדה והחילוץ משולבים - fetched מדווח עם קבלת הכותרות
+                progress('fetched', statusCode=response.status_code,
+                         bytes=int(response.headers.get('Content-Length') or 0) or None,
+                         fetchMs=_ms_since(fetch_started))
+            parse_started = time.perf_counter()
+            content, chunks = read_body(response)
+            
+            fields = requested_fields(settings)
+            if content is not None:
+                page_hash = body_hash(content)
+                if self._is_unchanged(url, page_hash, settings):
+                    return self._unchanged_result(url, page_hash, response)
+                encoding = chardet.detect(content)['encoding'] or 'utf-8'
+                html = content.decode(encoding, errors='replace')
+                page_size = len(content)
+                del content
+                
+                soup = self._parse(html, fields)
+                result = self._extract_fields(soup, url, settings, fields)
+                soup.decompose()
+                
+                result.update(self._response_fields(response, page_size))
+                if 'fullHtml' in fields:
+                    result['fullHtml'] = html
+                self._add_fingerprint(result, url, page_hash)
+                if progress:
+                    progress('parsed', parseMs=_ms_since(parse_started))
+                return result
+            
+            # דף גדול - חילוץ בזרימה, ה-HTML המלא לא נשמר; ה-hash מחושב תוך כדי הקריאה
+            hasher = hashlib.sha256()
+            first_chunk = next(chunks, b'')
+            encoding = detect_encoding(response, first_chunk[:4096])
+            parser = self._stream_extract(_hashing_chunks(itertools.chain([first_chunk], chunks), hasher),
+                                          encoding, url, settings, fields)
+            page_hash = hasher.hexdigest()
+            if self._is_unchanged(url, page_hash, settings):
+                return self._unchanged_result(url, page_hash, response)
+            result = self._streamed_fields(parser, url, fields)
+            result.update(self._response_fields(response, parser.bytes_read))
+            if 'fullHtml' in fields:
+                result['fullHtml'] = ''
+                result['fullHtmlOmitted'] = True
+            self._add_fingerprint(result, url, page_hash)
+            if progress:
+                progress('parsed', parseMs=_ms_since(parse_started))
+            return result
+        finally:
+            response.close()
+    
+    def _is_unchanged(self, url, page_hash, settings):
+        """האם לדלג על הדף - skipUnchanged והתגובה זהה לגירוד הקודם"""
+        return (settings.get('skipUnchanged', False) and self.fingerprints is not None and
+                self.fingerprints.is_unchanged(url, page_hash))
+    
+    def _unchanged_result(self, url, page_hash, response):
+        """תוצאה מקוצרת לדף שלא השתנה (ללא חילוץ)"""
+        logger.info(f"הדף לא השתנה מאז הגירוד הקודם: {url}")
+        return {
+            'url': url,
+            'unchanged': True,
+            'bodyHash': page_hash,
+            'statusCode': response.status_code,
+            'scrapedAt': datetime.now().isoformat(),
+            'status': 'success'
+        }
+    
+    def _add_fingerprint(self, result, url, page_hash):
+        """hash מדויק ו-SimHash של הטקסט, וכמעט-כפילות מהאינדקס אם קיים"""
+        result['bodyHash'] = page_hash
+        if not FINGERPRINT_FIELDS <= result.keys():
+            return  # בלי הכותרת והטקסט אין טביעת תוכן (והאינדקס לא מתעדכן)
+        text = f"{result['title']} {result['textContent']}"
+        if self.fingerprints is not None:
+            fields = self.fingerprints.record(url, page_hash, text)
+        else:
+            fields = fingerprint_fields(text)
+        result['contentHash'] = fields['content_hash']
+        result['simhash'] = fields['simhash']
+        if 'near_duplicate_of' in fields:
+            result['nearDuplicateOf'] = fields['near_duplicate_of']
+    
+    def _stream_extract(self, chunks, encoding, url, settings, fields=RESULT_FIELDS):
+        """הרצת המפענח הזורם על חלקי התגובה (קישורים / תמונות / טקסט נאספים רק אם נדרשו)"""
+        def accept_link(attrs):
+            href = attrs.get('href', '').strip()
+            return bool(href) and not href.startswith('#') and not href.startswith('javascript:')
+        
+        def accept_image(attrs):
+            return bool(attrs.get('src', '').strip() or attrs.get('data-src', '').strip())
+        
+        parser = StreamingPageParser(
+            settings.get('maxLinks', 20) if 'links' in fields else 0,
+            settings.get('maxImages', 10) if 'images' in fields else 0,
+            TextBudget(settings.get('textLength', 1000) if 'textContent' in fields else 0,
+                       separator=' ', strip=True, min_line_length=4),
+            text_skip_tags=TEXT_SKIP_TAGS | {'head', 'title'},
+            accept_link=accept_link,
+            accept_image=accept_image,
+            text_containers=MAIN_CONTENT_SELECTORS if 'textContent' in fields else ()
+        )
+        parser.feed_bytes(chunks, encoding)
+        return parser
+    
+    def _streamed_fields(self, parser, url, fields=RESULT_FIELDS):
+        """המרת נתוני המפענח הזורם לפורמט התוצאה הרגיל (השדות שנדרשו בלבד)"""
+        if parser.title is not None:
+            title = parser.title.strip()
+        elif 'og:title' in parser.properties:
+            title = parser.properties['og:title'].strip()
+        else:
+            title = "ללא כותרת"
+        
+        if 'description' in parser.meta:
+            description = parser.meta['description'].strip()
+        else:
+            description = parser.properties.get('og:description', '').strip()
+        
+        base_domain = urllib.parse.urlparse(url).netloc
+        images = []
+        for attrs in parser.images:
+            attrs['class'] = attrs.get('class', '').split()
+            images.append(self._image_entry(attrs, url))
+        
+        result = {
+            'url': url,
+            'title': title,
+            'description': description,
+            'keywords': parser.meta.get('keywords', '').strip(),
+            'headings': {tag: [text for text in texts if text] for tag, texts in sorted(parser.headings.items())},
+            'links': [self._link_entry(attrs, text.strip(), url, base_domain) for attrs, text in parser.links],
+            'images': images,
+            'textContent': parser.text()
+        }
+        return {name: value for name, value in result.items() if name == 'url' or name in fields}
+    
+    def _extract_fields(self, soup, url, settings, fields=RESULT_FIELDS):
+        """חילוץ שדות התוכן מהעץ - רק המחלצים של השדות שנדרשו רצים"""
+        extractors = {
+            'title': lambda: self._extract_title(soup),
+            'description': lambda: self._extract_meta_description(soup),
+            'keywords': lambda: self._extract_meta_keywords(soup),
+            'headings': lambda: self._extract_headings(soup),
+            'links': lambda: self._extract_links(soup, url, settings.get('maxLinks', 20)),
+            'images': lambda: self._extract_images(soup, url, settings.get('maxImages', 10)),
+            'textContent': lambda: self._extract_text_content(soup, settings.get('textLength', 1000))
+        }
+        result = {'url': url}
+        result.update((name, extract()) for name, extract in extractors.items() if name in fields)
+        return result
+    
+    def _response_fields(self, response, page_size):
+        """שדות מטא-דאטה של התגובה"""
+        return {
+            'responseTime': int(response.elapsed.total_seconds() * 1000),
+            'pageSize': page_size,
+            'statusCode': response.status_code,
+            'contentType': response.headers.get('content-type', ''),
+            'lastModified': response.headers.get('last-modified', ''),
+            'scrapedAt': datetime.now().isoformat(),
+            'status': 'success'
+        }
+    
     def _check_robots_txt(self, url):
         """בדיקת robots.txt"""
         try:
@@ -181,25 +510,28 @@ class RealWebScraper:
             if not href or href.startswith('#') or href.startswith('javascript:'):
                 continue
             
-            # המרה לכתובת מוחלטת
-            absolute_url = urllib.parse.urljoin(base_url, href)
-            link_domain = urllib.parse.urlparse(absolute_url).netloc
-            
-            # חילוץ טקסט הקישור
-            link_text = link.get_text().strip()
-            if not link_text:
-                # נסיון לחלץ מ-title או aria-label
-                link_text = link.get('title', '').strip() or link.get('aria-label', '').strip() or 'קישור ללא טקסט'
-            
-            links.append({
-                'text': link_text[:100],  # מגביל אורך טקסט
-                'url': absolute_url,
-                'isInternal': link_domain == base_domain,
-                'title': link.get('title', '').strip()
-            })
+            links.append(self._link_entry(link, link.get_text().strip(), base_url, base_domain))
         
         return links
     
+    def _link_entry(self, link, link_text, base_url, base_domain):
+        """רשומת קישור (link - תגית או מילון מאפיינים)"""
+        # המרה לכתובת מוחלטת
+        absolute_url = urllib.parse.urljoin(base_url, link['href'].strip())
+        link_domain = urllib.parse.urlparse(absolute_url).netloc
+        
+        # חילוץ טקסט הקישור
+        if not link_text:
+            # נסיון לחלץ מ-title או aria-label
+            link_text = link.get('title', '').strip() or link.get('aria-label', '').strip() or 'קישור ללא טקסט'
+        
+        return {
+            'text': link_text[:100],  # מגביל אורך טקסט
+            'url': absolute_url,
+            'isInternal': link_domain == base_domain,
+            'title': link.get('title', '').strip()
+        }
+    
     def _extract_images(self, soup, base_url, max_images):
         """חילוץ תמונות אמיתיות"""
         images = []
@@ -208,41 +540,47 @@ class RealWebScraper:
             if len(images) >= max_images:
                 break
                 
-            src = img.get('src', '').strip()
-            if not src:
-                # נסיון לחלץ מ-data-src (lazy loading)
-                src = img.get('data-src', '').strip()
-            
-            if not src:
+            if not (img.get('src', '').strip() or img.get('data-src', '').strip()):
                 continue
             
-            # המרה לכתובת מוחלטת
-            absolute_url = urllib.parse.urljoin(base_url, src)
-            
-            images.append({
-                'src': absolute_url,
-                'alt': img.get('alt', '').strip(),
-                'title': img.get('title', '').strip(),
-                'width': img.get('width', ''),
-                'height': img.get('height', ''),
-                'loading': img.get('loading', ''),
-                'class': ' '.join(img.get('class', []))
-            })
+            images.append(self._image_entry(img, base_url))
         
         return images
     
+    def _image_entry(self, img, base_url):
+        """רשומת תמונה (img - תגית או מילון מאפיינים)"""
+        src = img.get('src', '').strip()
+        if not src:
+            # נסיון לחלץ מ-data-src (lazy loading)
+            src = img.get('data-src', '').strip()
+        
+        # המרה לכתובת מוחלטת
+        absolute_url = urllib.parse.urljoin(base_url, src)
+        
+        return {
+            'src': absolute_url,
+            'alt': img.get('alt', '').strip(),
+            'title': img.get('title', '').strip(),
+            'width': img.get('width', ''),
+            'height': img.get('height', ''),
+            'loading': img.get('loading', ''),
+            'class': ' '.join(img.get('class', []))
+        }
+    
     def _extract_text_content(self, soup, max_length):
         """חילוץ תוכן טקסט אמיתי"""
-        # הסרת אלמנטים לא רלוונטיים
-        for element in soup(['script', 'style', 'nav', 'header', 'footer', 'aside', 'noscript']):
-            element.decompose()
+        # אלמנטים לא רלוונטיים - מדלגים עליהם במקום להסיר אותם מהעץ
+        skip_tags = TEXT_SKIP_TAGS
         
         # חיפוש תוכן עיקרי
         main_content = None
         
         # נסיון למצוא תוכן עיקרי לפי תגיות ומחלקות נפוצות
-        for selector in ['main', 'article', '.content', '.main-content', '.post-content', '#content', '.entry-content']:
-            main_content = soup.select_one(selector)
+        for selector in MAIN_CONTENT_SELECTORS:
+            for candidate in soup.select(selector):
+                if candidate.name not in skip_tags and not any(parent.name in skip_tags for parent in candidate.parents):
+                    main_content = candidate
+                    break
             if main_content:
                 break
         
@@ -250,35 +588,160 @@ class RealWebScraper:
         if not main_content:
             main_content = soup.find('body') or soup
         
-        # חילוץ טקסט נקי
-        text = main_content.get_text(separator=' ', strip=True)
-        
-        # ניקוי טקסט מתקדם
-        lines = [line.strip() for line in text.splitlines()]
-        lines = [line for line in lines if line and len(line) > 3]  # הסרת שורות קצרות מדי
-        
-        # איחוד שורות
-        text = ' '.join(lines)
-        
-        # ניקוי רווחים מיותרים
-        import re
-        text = re.sub(r'\s+', ' ', text)
-        
-        # החזרת טקסט חתוך לפי הגבלה
-        return text[:max_length] if text else ""
+        # חילוץ טקסט נקי - נעצר ברגע שהגענו להגבלה (שורות של עד 3 תווים מושמטות)
+        return extract_text(main_content, max_length, skip_tags=skip_tags,
+                            separator=' ', strip=True, min_line_length=4)
 
 # יצירת instance גלובלי
-scraper = RealWebScraper()
+# טביעות אצבע של התוכן - כמעט-כפילויות בין דפים וזיהוי דפים שלא השתנו
+FINGERPRINT_INDEX_PATH = 'fingerprints.db'
+fingerprint_index = FingerprintIndex(FINGERPRINT_INDEX_PATH)
+# תעבורת HTTP - 'requests' או 'http2' (חיבור אחד לכל host, brotli/zstd; דורש httpx[http2])
+SCRAPER_TRANSPORT = os.environ.get('SCRAPER_TRANSPORT', 'requests')
+scraper = RealWebScraper(fingerprint_index, SCRAPER_TRANSPORT)
+
+# מטמון תוצאות - בקשות זהות (URL + הגדרות) מוגשות מהזיכרון או מאוחדות לגירוד אחד
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+RESULT_CACHE_TTL = 300
+MAX_CACHE_TTL = 24 * 3600  # cacheTtl מהלקוח מוגבל לזה - ערך ענק לא מקבע רשומות במטמון
+result_cache = ScrapeResultCache(max_bytes=RESULT_CACHE_MAX_BYTES, default_ttl=RESULT_CACHE_TTL)
+
+# הגדרות שמשפיעות על התוצאה וערכי ברירת המחדל שלהן (delay לא משנה את התוצאה)
+RESULT_AFFECTING_SETTINGS = {
+    'maxLinks': 20,
+    'maxImages': 10,
+    'textLength': 1000,
+    'respectRobots': True,
+    'lowMemory': False,
+    'reportMemory': False,
+    'skipUnchanged': False,
+    'fields': None,
+    'headOnly': False
+}
+
+# מאגר תוצאות - כל גירוד בפועל (לא תוצאה מהמטמון) נשמר באצוות ל-SQLite
+RESULT_STORE_PATH = 'scraped_results.db'
+MAX_QUERY_LIMIT = 1000
+result_store = ResultStore(RESULT_STORE_PATH)
+
+# אינדקס חיפוש טקסט מלא - מתעדכן עם כל גירוד מוצלח
+SEARCH_INDEX_PATH = 'search_index.db'
+MAX_SEARCH_LIMIT = 100
+search_index = SearchIndex(SEARCH_INDEX_PATH)
+
+# בקרת קבלה - תקציב גירודים במקביל, תור הוגן בין לקוחות (לפי IP) ומכסות לכל לקוח
+admission = AdmissionController()
+# מאחורי reverse proxy כל הבקשות מגיעות מאותה כתובת - הלקוח נלקח מ-X-Forwarded-For
+TRUST_FORWARDED_FOR = os.environ.get('SCRAPER_TRUST_PROXY') == '1'
+
+# קבצי האפליקציה - נטענים ונדחסים (gzip / brotli) פעם אחת בעליית השרת
+static_assets = StaticAssets('.')
+
+def _cache_key(url, settings):
+    """מפתח מטמון מה-URL וההגדרות שמשפיעות על התוצאה"""
+    normalized = {name: settings.get(name, default) for name, default in RESULT_AFFECTING_SETTINGS.items()}
+    normalized['fields'] = sorted(requested_fields(settings))
+    return ScrapeResultCache.make_key(url, normalized)
+
+def _persist(url, result):
+    """
+    שמירת גירוד בפועל במאגר ובאינדקס החיפוש
+    לדף שלא השתנה מוחזרת התוצאה השמורה (None אם אין כזו - יש לגרד שוב ללא skipUnchanged)
+    """
+    if result.get('unchanged'):
+        previous = result_store.latest(url)
+        if previous is None:
+            return None
+        return dict(previous, unchanged=True, checkedAt=result['scrapedAt'])
+    result_store.add(result)
+    search_index.add(result)
+    return result
+
+def _scrape_cached(url, settings, bypass=False, ttl=None, progress=None, admitted=None):
+    """
+    גירוד דרך המטמון - מחזיר (תוצאה, סטטוס מטמון)
+    admitted - מכסה מבקרת הקבלה; גירוד בפועל ממתין ל-slot, תוצאה מהמטמון לא
+    """
+    settings = settings or {}
+    
+    def scrape_and_store():
+        if admitted is None:
+            return scrape_and_persist()
+        with admitted.slot():
+            return scrape_and_persist()
+    
+    def scrape_and_persist():
+        result = _persist(url, scraper.scrape_url(url, settings, progress))
+        if result is None:
+            result = _persist(url, scraper.scrape_url(url, dict(settings, skipUnchanged=False), progress))
+        return result
+    
+    return result_cache.get_or_compute(_cache_key(url, settings), scrape_and_store, bypass=bypass, ttl=ttl)
+
+def _invalid_fields(settings):
+    """הודעת שגיאה אם settings['fields'] לא תקין (אחרת None)"""
+    try:
+        requested_fields(settings)
+    except ValueError as e:
+        return str(e)
+    return None
+
+def _cache_ttl(data):
+    """
+    cacheTtl מהבקשה בשניות (None - ברירת המחדל של המטמון), מוגבל ל-MAX_CACHE_TTL
+    ערך שאינו מספר או שלילי - ValueError
+    """
+    value = data.get('cacheTtl')
+    if value is None:
+        return None
+    try:
+        if isinstance(value, bool):
+            raise TypeError
+        ttl = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"cacheTtl must be a number of seconds, got {value!r}")
+    if not math.isfinite(ttl) or ttl < 0:
+        raise ValueError(f"cacheTtl must be a non-negative number of seconds, got {value!r}")
+    return min(ttl, MAX_CACHE_TTL)
+
+def _client_id():
+    """מזהה הלקוח למכסות ולתור ההוגן"""
+    if TRUST_FORWARDED_FOR and request.headers.get('X-Forwarded-For'):
+        return request.headers['X-Forwarded-For'].split(',')[0].strip()
+    return request.remote_addr or 'unknown'
+
+def _rejected_response(rejected):
+    """תגובת 413/429/503 מהירה, עם Retry-After כשיש הערכה"""
+    body = {'error': str(rejected), 'admission': admission.stats()}
+    if rejected.retry_after is not None:
+        body['retryAfter'] = rejected.retry_after
+    response = jsonify(body)
+    response.status_code = rejected.status
+    if rejected.retry_after is not None:
+        response.headers['Retry-After'] = str(rejected.retry_after)
+    return response
+
+def _store_filters():
+    """מסנני שאילתה מה-query string"""
+    return {name: request.args.get(name) for name in ('url', 'domain', 'status', 'since', 'until')}
+
+def _asset_response(filename):
+    """קובץ מהזיכרון (ETag, 304, גרסה דחוסה) או מהדיסק אם לא נטען מראש"""
+    served = static_assets.respond(filename, request.headers, request.args.get('v'))
+    if served is None:
+        return send_from_directory('.', filename)
+    status, headers, body = served
+    return Response(body, status=status, headers=headers)
 
 @app.route('/')
 def home():
     """דף בית עם ממשק הגירוד"""
-    return send_from_directory('.', 'scraper-app.html')
+    return _asset_response('scraper-app.html')
 
 @app.route('/<path:filename>')
 def static_files(filename):
     """קבצים סטטיים"""
-    return send_from_directory('.', filename)
+    return _asset_response(filename)
 
 @app.route('/api/scrape', methods=['POST'])
 def api_scrape():
@@ -290,10 +753,24 @@ def api_scrape():
         
         if not url:
             return jsonify({'error': 'URL is required'}), 400
+        fields_error = _invalid_fields(settings)
+        if fields_error:
+            return jsonify({'error': fields_error}), 400
+        try:
+            ttl = _cache_ttl(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        result = scraper.scrape_url(url, settings)
-        return jsonify(result)
+        # גירוד יחיד הוא אינטראקטיבי - קודם לאצוות ויש לו slots שמורים
+        with admission.admit(_client_id(), 1, interactive=True) as admitted:
+            result, cache_status = _scrape_cached(url, settings, data.get('bypassCache', False), ttl,
+                                                  admitted=admitted)
+        response = jsonify(result)
+        response.headers['X-Cache'] = cache_status
+        return response
         
+    except Rejected as e:
+        return _rejected_response(e)
     except Exception as e:
         logger.error(f"שגיאה ב-API: {e}")
         return jsonify({'error': str(e)}), 500
@@ -308,25 +785,173 @@ def api_scrape_multiple():
         
         if not urls:
             return jsonify({'error': 'URLs are required'}), 400
+        fields_error = _invalid_fields(settings)
+        if fields_error:
+            return jsonify({'error': fields_error}), 400
+        try:
+            ttl = _cache_ttl(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
+        bypass = data.get('bypassCache', False)
         results = []
-        for url in urls:
-            result = scraper.scrape_url(url, settings)
-            results.append(result)
+        with admission.admit(_client_id(), len(urls)) as admitted:
+            for url in urls:
+                result, _ = _scrape_cached(url, settings, bypass, ttl, admitted=admitted)
+                results.append(result)
+                admitted.completed()
         
         return jsonify({'results': results})
         
+    except Rejected as e:
+        return _rejected_response(e)
     except Exception as e:
         logger.error(f"שגיאה ב-API מרובה: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/scrape_stream', methods=['POST'])
+def api_scrape_stream():
+    """
+    גירוד מרובה עם התקדמות חיה (text/event-stream) - אותה בקשה כמו /api/scrape_multiple
+    האירועים: batch, started, fetched, parsed, done/error (עם התוצאה), end
+    """
+    data = request.json or {}
+    urls = data.get('urls', [])
+    settings = data.get('settings', {})
+    if not urls:
+        return jsonify({'error': 'URLs are required'}), 400
+    fields_error = _invalid_fields(settings)
+    if fields_error:
+        return jsonify({'error': fields_error}), 400
+    try:
+        ttl = _cache_ttl(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # הבדיקה לפני פתיחת הזרם - דחייה מגיעה כתגובת 429/503 רגילה
+    try:
+        admitted = admission.admit(_client_id(), len(urls))
+    except Rejected as e:
+        return _rejected_response(e)
+    
+    bypass = data.get('bypassCache', False)
+    events = queue.Queue()
+    stop = threading.Event()
+    
+    def run_batch():
+        batch = BatchProgress(len(urls), lambda event, payload: events.put(format_sse(event, payload)))
+        batch.begin()
+        try:
+            # ביציאה URLs שלא רצו (הלקוח התנתק) חוזרים למכסת הלקוח
+            with admitted:
+                for index, url in enumerate(urls):
+                    if stop.is_set():
+                        break
+                    reporter = batch.url_started(index, url)
+                    try:
+                        result, cache_status = _scrape_cached(url, settings, bypass, ttl, reporter, admitted)
+                    except Exception as e:
+                        logger.error(f"שגיאה בגירוד זורם {url}: {e}")
+                        result, cache_status = {'url': url, 'error': str(e), 'status': 'error',
+                                                'scrapedAt': datetime.now().isoformat()}, 'MISS'
+                    batch.url_done(index, url, result, cache_status, reporter)
+                    admitted.completed()
+        finally:
+            batch.end(stopped=stop.is_set())
+            events.put(None)
+    
+    worker = threading.Thread(target=run_batch, name='scrape-stream', daemon=True)
+    
+    def stream():
+        worker.start()
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield format_heartbeat()
+                    continue
+                if event is None:
+                    break
+                yield event
+        finally:
+            # הלקוח התנתק (או שהאצווה הסתיימה) - לא מתחילים URLs נוספים
+            stop.set()
+    
+    def release_unstarted():
+        # הלקוח התנתק לפני החלק הראשון (או שהתגובה לא נקראה) - run_batch לא ירוץ ולא ישחרר את המכסה
+        if worker.ident is None:
+            admitted.__exit__(None, None, None)
+    
+    response = Response(stream(), mimetype='text/event-stream', headers=SSE_HEADERS)
+    response.call_on_close(release_unstarted)
+    return response
+
+@app.route('/api/results')
+def api_results():
+    """שאילתת תוצאות שמורות (סינון לפי url/domain/status/since/until, עימוד limit/offset)"""
+    try:
+        limit = min(int(request.args.get('limit', 100)), MAX_QUERY_LIMIT)
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    if limit < 1 or offset < 0:
+        return jsonify({'error': 'limit must be at least 1 and offset must not be negative'}), 400
+    
+    results = result_store.query(limit=limit, offset=offset, **_store_filters())
+    return jsonify({'results': results, 'limit': limit, 'offset': offset})
+
+@app.route('/api/results/latest')
+def api_results_latest():
+    """התוצאה האחרונה עבור URL"""
+    url = request.args.get('url')
+    if not url:
+        return jsonify({'error': 'URL is required'}), 400
+    
+    result = result_store.latest(url)
+    if result is None:
+        return jsonify({'error': 'No results for URL'}), 404
+    return jsonify(result)
+
+@app.route('/api/results/export')
+def api_results_export():
+    """ייצוא תוצאות שמורות בזרימה (format=jsonl או csv)"""
+    fmt = request.args.get('format', 'jsonl')
+    if fmt not in ('jsonl', 'csv'):
+        return jsonify({'error': 'format must be jsonl or csv'}), 400
+    
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = Response(result_store.export(fmt, **_store_filters()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=scraped_results.{fmt}'
+    return response
+
+@app.route('/api/search')
+def api_search():
+    """חיפוש טקסט מלא בתוכן שנגרד (q, עימוד limit/offset) - מדורג לפי רלוונטיות"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    try:
+        limit = min(int(request.args.get('limit', 20)), MAX_SEARCH_LIMIT)
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'}), 400
+    if limit < 1 or offset < 0:
+        return jsonify({'error': 'limit must be at least 1 and offset must not be negative'}), 400
+    
+    found = search_index.search(query, limit=limit, offset=offset)
+    return jsonify({'query': query, 'total': found['total'], 'results': found['results'],
+                    'limit': limit, 'offset': offset})
+
 @app.route('/api/test')
 def api_test():
     """בדיקת חיבור API"""
     return jsonify({
         'status': 'OK',
         'message': 'Real Web Scraper API is running',
-        'timestamp': datetime.now().isoformat()
+        'timestamp': datetime.now().isoformat(),
+        'cache': result_cache.stats(),
+        'admission': admission.stats()
     })
 
 if __name__ == '__main__':
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+רשומות קומפקטיות (__slots__) לקישורים, תמונות ותוצאות גירוד
+מחליפות את ה-dict לכל פריט ב-scraped_data לאורך כל הריצה; ניתנות לקריאה כמו dict
+ומומרות לסכמת ה-dict/JSON הרגילה רק ביציאה (שמירה לקובץ / החזרה מ-scrape_url)
+"""
+
+import sys
+from collections.abc import Mapping, MutableMapping
+
+
+def _intern(value):
+    """מחרוזות חוזרות (קישורי ניווט, alt, מידות) נשמרות פעם אחת בזיכרון"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class _SlottedRecord(Mapping):
+    """בסיס לרשומה קבועת שדות - קריאה כמו dict (record['url'], record.get(...))"""
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class LinkRecord(_SlottedRecord):
+    __slots__ = ('text', 'url', 'is_internal')
+
+    def __init__(self, text, url, is_internal):
+        self.text = _intern(text)
+        self.url = _intern(url)
+        self.is_internal = is_internal
+
+
+class ImageRecord(_SlottedRecord):
+    __slots__ = ('alt', 'src', 'title', 'width', 'height')
+
+    def __init__(self, alt, src, title, width, height):
+        self.alt = _intern(alt)
+        self.src = _intern(src)
+        self.title = _intern(title)
+        self.width = _intern(width)
+        self.height = _intern(height)
+
+
+class PageRecord(MutableMapping):
+    """
+    תוצאת גירוד מוצלחת: שדות הבסיס ב-slots, קישורים ותמונות כ-tuple של רשומות,
+    ושדות נוספים (custom_data, body_hash, simhash...) ב-dict שנוצר רק כשצריך
+    שדה תוכן שלא נדרש (fields) הוא None ולא נכלל ב-to_dict
+    """
+    FIELDS = ('url', 'title', 'meta_description', 'meta_keywords', 'headings', 'links', 'images',
+              'text_content', 'page_size', 'scraped_at')
+    __slots__ = FIELDS + ('_extra',)
+
+    def __init__(self, url, title, meta_description, meta_keywords, headings, links, images,
+                 text_content, page_size, scraped_at):
+        self.url = url
+        self.title = title
+        self.meta_description = meta_description
+        self.meta_keywords = meta_keywords
+        self.headings = headings
+        self.links = tuple(links) if links is not None else None
+        self.images = tuple(images) if images is not None else None
+        self.text_content = text_content
+        self.page_size = page_size
+        self.scraped_at = scraped_at
+        self._extra = None
+
+    def __getitem__(self, key):
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if self._extra is None:
+            raise KeyError(key)
+        return self._extra[key]
+
+    def __setitem__(self, key, value):
+        if key in self.FIELDS:
+            setattr(self, key, value)
+            return
+        if self._extra is None:
+            self._extra = {}
+        self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self.FIELDS:
+            raise KeyError(f"{key} is a required field")
+        if self._extra is None:
+            raise KeyError(key)
+        del self._extra[key]
+
+    def __iter__(self):
+        yield from self.FIELDS
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return len(self.FIELDS) + len(self._extra or ())
+
+    def to_dict(self):
+        """המרה לסכמת ה-dict הרגילה (אותו סדר שדות כמו קודם)"""
+        data = {name: getattr(self, name) for name in self.FIELDS if getattr(self, name) is not None}
+        if self.links is not None:
+            data['links'] = [link.to_dict() for link in self.links]
+        if self.images is not None:
+            data['images'] = [image.to_dict() for image in self.images]
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+
+def as_dict(item):
+    """פריט מ-scraped_data בסכמת ה-dict (רשומות שגיאה נשמרות כ-dict רגיל)"""
+    return item.to_dict() if isinstance(item, PageRecord) else item
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ארכיון תגובות גולמיות בסגנון WARC
+כל תגובה שהורדה נשמרת כרשומת WARC response (כותרות HTTP וגוף) במקטע gzip עצמאי שנוסף לסוף הקובץ,
+ואינדקס SQLite לצידו שומר לכל רשומה URL, offset ואורך - כל רשומה נקראת ישירות בלי לפרוס את הקובץ.
+שינוי בלוגיקת החילוץ לא מחייב גירוד מחדש: extract מריץ את החילוץ על הארכיון (mmap) בכמה תהליכים במקביל
+
+שימוש:
+    python advanced_web_scraper.py -i urls.txt -o results.jsonl --archive crawl.warc.gz
+    python response_archive.py extract crawl.warc.gz -o reextracted.jsonl --selectors selectors.json
+    python response_archive.py show crawl.warc.gz https://example.com/
+    python response_archive.py reindex crawl.warc.gz
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import uuid
+import zlib
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+# נעילת הקובץ בין תהליכים (POSIX); בלעדיה (Windows) הכתיבה מוגנת רק בין threads של אותו תהליך
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+ARCHIVE_PATH = 'responses.warc.gz'
+INDEX_SUFFIX = '.index.db'
+COMPRESS_LEVEL = 6
+INDEX_BATCH = 200
+READ_CHUNK = 64 * 1024
+SPOOL_BYTES = 1024 * 1024  # גוף שנקרא בזרימה (ורשומה דחוסה) נשמרים בזיכרון עד הגודל הזה ואז בקובץ זמני
+EXTRACT_CHUNK = 200  # רשומות לכל משימה של תהליך חילוץ
+# הגוף נשמר אחרי פענוח הדחיסה - כותרות הקידוד והאורך המקוריות כבר לא מתאימות לו
+DROPPED_HEADERS = frozenset(['content-encoding', 'transfer-encoding', 'content-length'])
+_HTTP_VERSIONS = {10: 'HTTP/1.0', 11: 'HTTP/1.1', 20: 'HTTP/2'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    status INTEGER,
+    content_type TEXT,
+    body_hash TEXT,
+    archived_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_records_url ON records (url);
+"""
+
+ArchivedResponse = namedtuple('ArchivedResponse', 'url archived_at status headers body')
+
+
+def _status_line(response):
+    """שורת הסטטוס (requests או Http2Response)"""
+    version = getattr(response, 'http_version', None)
+    if version is None:
+        version = _HTTP_VERSIONS.get(getattr(getattr(response, 'raw', None), 'version', 11), 'HTTP/1.1')
+    return f"{version} {response.status_code} {response.reason or ''}".rstrip()
+
+
+def _body_chunks(body):
+    """bytes או קובץ בינארי - בחלקים"""
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        yield body
+        return
+    body.seek(0)
+    while True:
+        chunk = body.read(READ_CHUNK)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _body_size(body):
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        return len(body)
+    body.seek(0, os.SEEK_END)
+    return body.tell()
+
+
+def build_record(url, response, body, archived_at, body_hash=None):
+    """
+    רשומת WARC response דחוסה כמקטע gzip עצמאי - נדחסת בחלקים לקובץ זמני (בזיכרון עד SPOOL_BYTES),
+    כך שגם גוף גדול שנקרא בזרימה לא נטען כולו לזיכרון
+
+    Args:
+        body_hash (str): sha256 של הגוף אם כבר חושב - חוסך מעבר נוסף על הגוף
+
+    Returns:
+        tuple: (קובץ זמני עם הרשומה הדחוסה, אורך בבתים, sha256 של הגוף)
+    """
+    if body_hash is None:
+        digest = hashlib.sha256()
+        for chunk in _body_chunks(body):
+            digest.update(chunk)
+        body_hash = digest.hexdigest()
+    size = _body_size(body)
+
+    http_headers = ''.join(f"{name}: {value}\r\n" for name, value in response.headers.items()
+                           if name.lower() not in DROPPED_HEADERS)
+    http_block = f"{_status_line(response)}\r\n{http_headers}Content-Length: {size}\r\n\r\n".encode('utf-8')
+    warc_header = (
+        "WARC/1.1\r\n"
+        "WARC-Type: response\r\n"
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+        f"WARC-Date: {archived_at}\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        f"WARC-Payload-Digest: sha256:{body_hash}\r\n"  # אותו hash כמו body_hash בתוצאות
+        "Content-Type: application/http;msgtype=response\r\n"
+        f"Content-Length: {len(http_block) + size}\r\n\r\n"
+    ).encode('utf-8')
+
+    member = tempfile.SpooledTemporaryFile(SPOOL_BYTES)
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)  # 31 - מעטפת gzip
+    member.write(compressor.compress(warc_header))
+    member.write(compressor.compress(http_block))
+    for chunk in _body_chunks(body):
+        member.write(compressor.compress(chunk))
+    member.write(compressor.compress(b'\r\n\r\n'))
+    member.write(compressor.flush())
+    return member, member.tell(), body_hash
+
+
+def parse_record(data):
+    """רשומת WARC (אחרי פריסה) -> ArchivedResponse"""
+    warc_header, _, block = data.partition(b'\r\n\r\n')
+    warc = dict(line.split(': ', 1) for line in warc_header.decode('utf-8').split('\r\n')[1:] if ': ' in line)
+    block = block[:int(warc.get('Content-Length', len(block)))]
+    http_header, _, body = block.partition(b'\r\n\r\n')
+    lines = http_header.decode('iso-8859-1').split('\r\n')
+    status = lines[0].split(' ', 2)
+    headers = dict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+    return ArchivedResponse(warc.get('WARC-Target-URI', ''), warc.get('WARC-Date'),
+                            int(status[1]) if len(status) > 1 and status[1].isdigit() else None, headers, body)
+
+
+class ResponseArchive:
+    """
+    כתיבת תגובות לארכיון (בטוח לשימוש מכמה threads, ומכמה תהליכים על אותו קובץ בדיסק מקומי)
+    הדחיסה מתבצעת מחוץ למנעול; ההוספה לסוף הקובץ - בחלקים, תחת מנעול (ו-flock בין תהליכים),
+    והאינדקס נכתב באצוות
+    """
+
+    def __init__(self, path=ARCHIVE_PATH, index_path=None, batch_size=INDEX_BATCH):
+        self.path = path
+        self.index_path = index_path or path + INDEX_SUFFIX
+        self.batch_size = batch_size
+        self.records = 0
+        self.bytes_written = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0), 0o644)
+        self.conn = sqlite3.connect(self.index_path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def write(self, url, response, body, body_hash=None):
+        """
+        שמירת תגובה
+
+        Args:
+            response: תגובת requests / Http2Response (סטטוס וכותרות)
+            body: הגוף - bytes, או קובץ בינארי פתוח (גוף שנקרא בזרימה)
+            body_hash (str): sha256 של הגוף אם כבר חושב
+        """
+        archived_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        member, length, body_hash = build_record(url, response, body, archived_at, body_hash)
+        with member, self._lock:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                # תחת המנעול אף כותב אחר לא מוסיף לקובץ - הרשומה נכתבת ברצף מהסוף הנוכחי
+                offset = os.lseek(self._fd, 0, os.SEEK_END)
+                member.seek(0)
+                for chunk in iter(lambda: member.read(READ_CHUNK), b''):
+                    while chunk:
+                        chunk = chunk[os.write(self._fd, chunk):]
+            finally:
+                if FCNTL_AVAILABLE:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._pending.append((url, offset, length, response.status_code,
+                                  response.headers.get('content-type'), body_hash, archived_at))
+            self.records += 1
+            self.bytes_written += length
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        with self.conn:
+            self.conn.executemany('INSERT INTO records (url, offset, length, status, content_type, body_hash, '
+                                  'archived_at) VALUES (?, ?, ?, ?, ?, ?, ?)', self._pending)
+        self._pending.clear()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            os.close(self._fd)
+            self.conn.close()
+
+    def format_stats(self):
+        return f"ארכיון: {self.records} תגובות, {self.bytes_written / 1024 / 1024:.1f}MB דחוסים -> {self.path}"
+
+
+class ArchiveReader:
+    """קריאת רשומות מהארכיון דרך mmap - כל רשומה היא פריסה של מקטע gzip אחד לפי offset ואורך"""
+
+    def __init__(self, path, index_path=None):
+        self.path = path
+        self.index_path = index_path or path + INDEX_SUFFIX
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    def read(self, offset, length):
+        return parse_record(zlib.decompress(self._mm[offset:offset + length], 31))
+
+    def entries(self, latest=False, url=None):
+        """(url, offset, length) מהאינדקס לפי סדר בקובץ; latest - רק הרשומה האחרונה לכל URL"""
+        conn = sqlite3.connect(self.index_path)
+        if url is not None:
+            query, params = 'SELECT url, offset, length FROM records WHERE url = ? ORDER BY id DESC', (url,)
+        elif latest:
+            query, params = ('SELECT url, offset, length FROM records WHERE id IN '
+                             '(SELECT MAX(id) FROM records GROUP BY url) ORDER BY offset'), ()
+        else:
+            query, params = 'SELECT url, offset, length FROM records ORDER BY offset', ()
+        try:
+            yield from conn.execute(query, params)
+        finally:
+            conn.close()
+
+    def scan(self):
+        """
+        מעבר על הקובץ בלי האינדקס: (offset, אורך, ArchivedResponse) לכל מקטע gzip
+        רשומה אחרונה קטועה (הכתיבה נעצרה באמצע) מדולגת
+        """
+        offset = 0
+        while offset < self.size:
+            decompressor = zlib.decompressobj(31)
+            parts = []
+            position = offset
+            while not decompressor.eof and position < self.size:
+                parts.append(decompressor.decompress(self._mm[position:position + READ_CHUNK]))
+                position = min(position + READ_CHUNK, self.size)
+            if not decompressor.eof:
+                sys.stderr.write(f"רשומה קטועה ב-offset {offset} - מדולגת\n")
+                return
+            length = position - offset - len(decompressor.unused_data)
+            yield offset, length, parse_record(b''.join(parts))
+            offset += length
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+
+def reindex(path, index_path=None):
+    """בניית האינדקס מחדש מהקובץ (אחרי קריסה לפני שהאצווה האחרונה נכתבה לאינדקס)"""
+    reader = ArchiveReader(path, index_path)
+    conn = sqlite3.connect(reader.index_path)
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            conn.execute('DELETE FROM records')
+            conn.executemany(
+                'INSERT INTO records (url, offset, length, status, content_type, body_hash, archived_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((record.url, offset, length, record.status,
+                  next((value for name, value in record.headers.items() if name.lower() == 'content-type'), None),
+                  hashlib.sha256(record.body).hexdigest(), record.archived_at)
+                 for offset, length, record in reader.scan())
+            )
+        return conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+    finally:
+        conn.close()
+        reader.close()
+
+
+# --- חילוץ מחדש בכמה תהליכים: כל תהליך פותח את ה-mmap ויוצר scraper פעם אחת ---
+_worker = {}
+
+
+def _init_extract_worker(path, index_path, custom_selectors, fields):
+    from advanced_web_scraper import AdvancedWebScraper
+    _worker['reader'] = ArchiveReader(path, index_path)
+    _worker['scraper'] = AdvancedWebScraper(fields=fields)
+    _worker['selectors'] = custom_selectors
+
+
+def _extract_chunk(entries):
+    from records import as_dict
+    reader, scraper = _worker['reader'], _worker['scraper']
+    results = []
+    for url, offset, length in entries:
+        try:
+            record = reader.read(offset, length)
+            results.append(as_dict(scraper.extract_archived(record, _worker['selectors'])))
+        except Exception as e:
+            results.append({'url': url, 'error': str(e), 'scraped_at': datetime.now().isoformat()})
+    return results
+
+
+def _chunks(entries, size):
+    chunk = []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def extract_archive(path, sink, custom_selectors=None, fields=None, workers=None, latest=False, index_path=None):
+    """
+    הרצת החילוץ של AdvancedWebScraper על כל הארכיון בכמה תהליכים; התוצאות נכתבות ל-sink לפי סדר הקובץ
+
+    Returns:
+        int: מספר הרשומות שחולצו
+    """
+    workers = workers or os.cpu_count() or 1
+    reader = ArchiveReader(path, index_path)
+    count = 0
+    try:
+        with ProcessPoolExecutor(workers, initializer=_init_extract_worker,
+                                 initargs=(path, index_path, custom_selectors, fields)) as executor:
+            # חלון משימות חסום - האינדקס נקרא בזרימה גם לארכיון של מיליוני דפים
+            window = deque()
+            for chunk in _chunks(reader.entries(latest), EXTRACT_CHUNK):
+                window.append(executor.submit(_extract_chunk, chunk))
+                if len(window) >= workers * 2:
+                    count += _write_results(window.popleft().result(), sink)
+            while window:
+                count += _write_results(window.popleft().result(), sink)
+    finally:
+        reader.close()
+    return count
+
+
+def _write_results(results, sink):
+    for result in results:
+        sink.write(result)
+    return len(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='ארכיון תגובות גולמיות: חילוץ מחדש בלי גירוד, הצגה ובניית אינדקס')
+    commands = parser.add_subparsers(dest='command', required=True)
+    extract = commands.add_parser('extract', help='חילוץ מחדש מכל הרשומות שבארכיון (בכמה תהליכים)')
+    extract.add_argument('archive')
+    extract.add_argument('-o', '--output', default='-', help="קובץ פלט ('-' עבור stdout)")
+    extract.add_argument('-f', '--format', choices=['jsonl', 'csv', 'sqlite', 'parquet'], default='jsonl')
+    extract.add_argument('--selectors', help='קובץ JSON עם CSS selectors מותאמים')
+    extract.add_argument('--fields', help='שדות התוכן לחילוץ, מופרדים בפסיקים (ברירת מחדל - כולם)')
+    extract.add_argument('-w', '--workers', type=int, default=None, help='מספר תהליכים (ברירת מחדל - מספר הליבות)')
+    extract.add_argument('--latest', action='store_true', help='רק הרשומה האחרונה לכל URL')
+    show = commands.add_parser('show', help='הגוף השמור האחרון של URL')
+    show.add_argument('archive')
+    show.add_argument('url')
+    show.add_argument('--headers', action='store_true', help='הצגת שורת הסטטוס והכותרות בלבד')
+    reindex_parser = commands.add_parser('reindex', help='בניית האינדקס מחדש מקובץ הארכיון')
+    reindex_parser.add_argument('archive')
+    args = parser.parse_args(argv)
+
+    if args.command == 'reindex':
+        print(f"נבנה אינדקס ל-{reindex(args.archive)} רשומות", file=sys.stderr)
+    elif args.command == 'show':
+        reader = ArchiveReader(args.archive)
+        try:
+            entry = next(reader.entries(url=args.url), None)
+            if entry is None:
+                print(f"ה-URL לא נמצא בארכיון: {args.url}", file=sys.stderr)
+                return 1
+            record = reader.read(entry[1], entry[2])
+        finally:
+            reader.close()
+        if args.headers:
+            print(f"{record.status} ({record.archived_at})")
+            for name, value in record.headers.items():
+                print(f"{name}: {value}")
+        else:
+            sys.stdout.buffer.write(record.body)
+    else:
+        # advanced_web_scraper מייבא את המודול הזה - הייבוא ההפוך רק בהרצה כסקריפט
+        from advanced_web_scraper import parse_fields
+        from batch_runner import open_sink
+        try:
+            fields = sorted(parse_fields(args.fields)) if args.fields else None
+        except ValueError as e:
+            parser.error(str(e))
+        custom_selectors = None
+        if args.selectors:
+            with open(args.selectors, encoding='utf-8') as f:
+                custom_selectors = json.load(f)
+        sink = open_sink(args.output, args.format)
+        try:
+            count = extract_archive(args.archive, sink, custom_selectors, fields, args.workers, args.latest)
+        finally:
+            sink.close()
+        print(f"חולצו {count} רשומות מהארכיון", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
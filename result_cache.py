@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מטמון תוצאות גירוד בזיכרון
+LRU לפי גודל בבתים, TTL לכל רשומה ואיחוד בקשות זהות שרצות במקביל
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class _InFlight:
+    """בקשה שנמצאת כרגע בביצוע - ממתינים נוספים מחכים לתוצאה שלה"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ScrapeResultCache:
+    def __init__(self, max_bytes=64 * 1024 * 1024, default_ttl=300):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # key -> (result, size, expires_at)
+        self._inflight = {}
+        self._inflight_async = {}  # key -> asyncio.Future (מצב ההגשה האסינכרוני)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'bypassed': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(url, settings):
+        """מפתח מטמון מ-URL והגדרות מנורמלות"""
+        return json.dumps([url, settings or {}], sort_keys=True, ensure_ascii=False)
+
+    def get_or_compute(self, key, compute, bypass=False, ttl=None):
+        """
+        החזרת תוצאה מהמטמון או חישובה פעם אחת בלבד
+
+        Args:
+            key (str): מפתח המטמון
+            compute (callable): פונקציה שמבצעת את הגירוד בפועל
+            bypass (bool): דילוג על המטמון וביצוע גירוד טרי
+            ttl (float): זמן חיים לרשומה בשניות (ברירת מחדל: default_ttl)
+
+        Returns:
+            tuple: (תוצאה, סטטוס מטמון - HIT/MISS/COALESCED/BYPASS)
+        """
+        if bypass:
+            with self._lock:
+                self._stats['bypassed'] += 1
+            result = compute()
+            self._store(key, result, ttl)
+            return result, 'BYPASS'
+
+        with self._lock:
+            result = self._lookup(key)
+            if result is not None:
+                return result, 'HIT'
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                inflight = _InFlight()
+                self._inflight[key] = inflight
+                leader = True
+                self._stats['misses'] += 1
+            else:
+                leader = False
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            inflight.event.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.result, 'COALESCED'
+
+        try:
+            inflight.result = compute()
+            self._store(key, inflight.result, ttl)
+            return inflight.result, 'MISS'
+        except Exception as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            inflight.event.set()
+
+    async def get_or_compute_async(self, key, compute, bypass=False, ttl=None):
+        """
+        כמו get_or_compute עבור coroutine - בקשות זהות ממתינות ל-Future משותף בלי לחסום thread
+
+        Args:
+            compute (callable): פונקציה שמחזירה coroutine של הגירוד
+        """
+        if bypass:
+            with self._lock:
+                self._stats['bypassed'] += 1
+            result = await compute()
+            self._store(key, result, ttl)
+            return result, 'BYPASS'
+
+        while True:
+            with self._lock:
+                result = self._lookup(key)
+                if result is not None:
+                    return result, 'HIT'
+
+                future = self._inflight_async.get(key)
+                leader = future is None
+                if leader:
+                    future = asyncio.get_running_loop().create_future()
+                    self._inflight_async[key] = future
+                    self._stats['misses'] += 1
+                else:
+                    self._stats['coalesced'] += 1
+
+            if leader:
+                break
+            try:
+                return await asyncio.shield(future), 'COALESCED'
+            except asyncio.CancelledError:
+                # המוביל בוטל (הלקוח שלו התנתק) - זו לא תוצאת הגירוד; אחד הממתינים הופך למוביל החדש
+                if future.cancelled():
+                    continue
+                raise
+
+        try:
+            result = await compute()
+            self._store(key, result, ttl)
+            future.set_result(result)
+            return result, 'MISS'
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # מסומן כנקרא גם כשאין ממתינים
+            raise
+        finally:
+            with self._lock:
+                self._inflight_async.pop(key, None)
+
+    def _lookup(self, key):
+        """תוצאה בתוקף מהמטמון או None (יש להחזיק את המנעול)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        result, size, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        self._stats['hits'] += 1
+        return result
+
+    def _store(self, key, result, ttl):
+        """שמירת תוצאה מוצלחת במטמון ופינוי רשומות ישנות לפי LRU"""
+        if not isinstance(result, dict) or result.get('status') == 'error':
+            return  # לא שומרים שגיאות
+
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        size = len(json.dumps(result, ensure_ascii=False).encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (result, size, time.monotonic() + ttl)
+            self._total_bytes += size
+
+            while self._total_bytes > self.max_bytes and self._entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._stats['evictions'] += 1
+
+    def _remove(self, key):
+        """הסרת רשומה (יש להחזיק את המנעול)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[1]
+
+    def clear(self):
+        """ניקוי המטמון"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """סטטיסטיקות מטמון"""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._total_bytes,
+                        max_bytes=self.max_bytes, in_flight=len(self._inflight) + len(self._inflight_async))
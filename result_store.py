@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+מאגר תוצאות גירוד מבוסס SQLite (מצב WAL)
+כתיבה באצוות טרנזקציוניות, אינדקסים על url / domain / status / scraped_at,
+שאילתות מהירות וייצוא ל-JSONL/CSV
+"""
+
+import csv
+import io
+import json
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    status TEXT NOT NULL,
+    status_code INTEGER,
+    scraped_at TEXT NOT NULL,
+    title TEXT,
+    error TEXT,
+    data TEXT NOT NULL,
+    UNIQUE (url, scraped_at)
+);
+CREATE INDEX IF NOT EXISTS idx_results_url ON results (url, scraped_at);
+CREATE INDEX IF NOT EXISTS idx_results_domain ON results (domain, status, scraped_at);
+CREATE INDEX IF NOT EXISTS idx_results_status ON results (status, scraped_at);
+CREATE INDEX IF NOT EXISTS idx_results_scraped_at ON results (scraped_at);
+"""
+
+UPSERT = """
+INSERT INTO results (url, domain, status, status_code, scraped_at, title, error, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (url, scraped_at) DO UPDATE SET
+    domain = excluded.domain,
+    status = excluded.status,
+    status_code = excluded.status_code,
+    title = excluded.title,
+    error = excluded.error,
+    data = excluded.data
+"""
+
+# שדות שלא נשמרים במאגר (HTML מלא)
+EXCLUDED_FIELDS = ('fullHtml',)
+
+EXPORT_CSV_FIELDS = ['url', 'domain', 'status', 'status_code', 'scraped_at', 'title', 'error']
+
+
+def _to_row(record):
+    """המרת תוצאה (בפורמט השרת או הסקריפט המתקדם) לשורה בטבלה"""
+    url = record.get('url', '')
+    scraped_at = record.get('scrapedAt') or record.get('scraped_at') or ''
+    status = record.get('status') or ('error' if 'error' in record else 'success')
+    if status == 'failed':
+        status = 'error'
+    data = {key: value for key, value in record.items() if key not in EXCLUDED_FIELDS}
+    return (
+        url,
+        urllib.parse.urlparse(url).netloc.lower(),
+        status,
+        record.get('statusCode'),
+        scraped_at,
+        record.get('title'),
+        record.get('error'),
+        json.dumps(data, ensure_ascii=False)
+    )
+
+
+class ResultStore:
+    def __init__(self, path='scraped_results.db', batch_size=200, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        # חיבור כתיבה יחיד (מוגן במנעול); קריאות דרך חיבור נפרד לכל thread - WAL מאפשר קריאה במקביל לכתיבה
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def add(self, record):
+        """הוספת תוצאה לאצווה - נכתבת כשהאצווה מלאה או אחרי flush_interval שניות"""
+        with self._lock:
+            self._pending.append(_to_row(record))
+            if (len(self._pending) >= self.batch_size or
+                    time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def add_many(self, records):
+        """הוספת מספר תוצאות בטרנזקציה אחת"""
+        with self._lock:
+            self._pending.extend(_to_row(record) for record in records)
+            self._flush_locked()
+
+    def flush(self):
+        """כתיבת האצווה הממתינה"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        with self.conn:  # טרנזקציה אחת לכל האצווה
+            self.conn.executemany(UPSERT, self._pending)
+        self._pending.clear()
+
+    def latest(self, url):
+        """התוצאה האחרונה עבור URL"""
+        rows = self.query(url=url, limit=1)
+        return rows[0] if rows else None
+
+    def query(self, url=None, domain=None, status=None, since=None, until=None, limit=100, offset=0):
+        """
+        שאילתת תוצאות (מהחדשה לישנה)
+
+        Args:
+            url (str): URL מדויק
+            domain (str): דומיין (netloc)
+            status (str): 'success' או 'error'
+            since / until (str): טווח scraped_at בפורמט ISO
+            limit / offset (int): עימוד (limit=None - ללא הגבלה)
+
+        Returns:
+            list: רשימת התוצאות המקוריות (dict)
+        """
+        return [json.loads(row[-1]) for row in self._select(url, domain, status, since, until, limit, offset)]
+
+    def count(self, url=None, domain=None, status=None, since=None, until=None):
+        """מספר התוצאות שתואמות לסינון"""
+        where, params = self._where(url, domain, status, since, until)
+        self.flush()
+        return self._reader().execute(f'SELECT COUNT(*) FROM results{where}', params).fetchone()[0]
+
+    def urls(self):
+        """כל ה-URLs במאגר (איטרטור)"""
+        self.flush()
+        return (row[0] for row in self._reader().execute('SELECT DISTINCT url FROM results'))
+
+    def export(self, fmt='jsonl', **filters):
+        """
+        ייצוא בזרימה - מחזיר איטרטור של שורות טקסט
+
+        Args:
+            fmt (str): 'jsonl' או 'csv'
+            **filters: אותם מסננים כמו ב-query
+        """
+        filters.setdefault('limit', None)
+        rows = self._select(**filters)
+        if fmt == 'csv':
+            return self._export_csv(rows)
+        return (row[-1] + '\n' for row in rows)
+
+    def _export_csv(self, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_CSV_FIELDS)
+        for row in rows:
+            writer.writerow(row[:len(EXPORT_CSV_FIELDS)])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()  # כותרת בלבד כשאין תוצאות
+
+    def _select(self, url=None, domain=None, status=None, since=None, until=None, limit=100, offset=0):
+        where, params = self._where(url, domain, status, since, until)
+        sql = (f'SELECT url, domain, status, status_code, scraped_at, title, error, data '
+               f'FROM results{where} ORDER BY scraped_at DESC')
+        if limit is not None:
+            # LIMIT שלילי ב-SQLite פירושו "ללא הגבלה" - מקבעים ל-0 כדי שלא יעקוף את התקרה של הקורא
+            sql += ' LIMIT ? OFFSET ?'
+            params += [max(int(limit), 0), max(int(offset or 0), 0)]
+        self.flush()
+        return self._reader().execute(sql, params)
+
+    def _reader(self):
+        """חיבור קריאה של ה-thread הנוכחי"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _where(url, domain, status, since, until):
+        clauses = []
+        params = []
+        for column, op, value in (('url', '=', url), ('domain', '=', domain and domain.lower()),
+                                  ('status', '=', status), ('scraped_at', '>=', since),
+                                  ('scraped_at', '<', until)):
+            if value:
+                clauses.append(f'{column} {op} ?')
+                params.append(value)
+        return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def close(self):
+        self.flush()
+        self.conn.close()
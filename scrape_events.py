@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+אירועי התקדמות לגירוד מרובה (Server-Sent Events)
+כל URL מדווח started -> fetched -> parsed -> done/error עם זמנים,
+וכל אירוע done/error כולל את מספר הדפים שהושלמו וקצב (דפים לשנייה) מתחילת האצווה
+"""
+
+import json
+import time
+from datetime import datetime
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'  # ללא buffering ב-nginx - האירועים מגיעים מיד
+}
+HEARTBEAT_INTERVAL = 15  # שניות - הערת keep-alive כשאין אירועים (proxies סוגרים חיבורים שקטים)
+
+
+def format_sse(event, data):
+    """אירוע בפורמט text/event-stream"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def format_heartbeat():
+    return ": keep-alive\n\n"
+
+
+class BatchProgress:
+    """
+    מעקב אחר אצוות גירוד ובניית האירועים שלה
+
+    Args:
+        total (int): מספר ה-URLs באצווה
+        emit (callable): emit(event, data) - שליחת אירוע ללקוח
+    """
+
+    def __init__(self, total, emit):
+        self.total = total
+        self.emit = emit
+        self.started = time.monotonic()
+        self.completed = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def throughput(self):
+        """דפים לשנייה מתחילת האצווה"""
+        elapsed = self.elapsed()
+        return round(self.completed / elapsed, 3) if elapsed > 0 else 0.0
+
+    def begin(self):
+        self.emit('batch', {'total': self.total, 'startedAt': datetime.now().isoformat()})
+
+    def url_started(self, index, url):
+        """
+        אירוע started - מחזיר reporter(stage, **fields) לשלבי fetched / parsed של ה-URL
+        """
+        url_started = time.monotonic()
+        self.emit('started', {'index': index, 'url': url})
+
+        def reporter(stage, **fields):
+            self.emit(stage, dict(fields, index=index, url=url,
+                                  elapsedMs=round((time.monotonic() - url_started) * 1000, 1)))
+
+        reporter.started = url_started
+        return reporter
+
+    def url_done(self, index, url, result, cache_status, reporter=None):
+        """אירוע done (או error לתוצאה שנכשלה) עם התוצאה המלאה והקצב הנוכחי"""
+        self.completed += 1
+        failed = result.get('status') == 'error'
+        if failed:
+            self.failed += 1
+        else:
+            self.succeeded += 1
+
+        data = {
+            'index': index,
+            'url': url,
+            'status': result.get('status'),
+            'cache': cache_status,
+            'completed': self.completed,
+            'total': self.total,
+            'pagesPerSecond': self.throughput(),
+            'result': result
+        }
+        if reporter is not None:
+            data['totalMs'] = round((time.monotonic() - reporter.started) * 1000, 1)
+        if failed:
+            data['error'] = result.get('error')
+        self.emit('error' if failed else 'done', data)
+
+    def end(self, stopped=False):
+        self.emit('end', {
+            'completed': self.completed,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'total': self.total,
+            'elapsedMs': round(self.elapsed() * 1000, 1),
+            'pagesPerSecond': self.throughput(),
+            'stopped': stopped
+        })
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+לוג לא-חוסם לסקריפטי הגירוד
+ה-workers רק מכניסים רשומות לתור; thread רקע כותב אותן לקובץ מתחלף (עם תקרת גודל) ולמסך.
+תומך בפלט JSON (שורה לכל רשומה) ובדגימה לפי URL - כל השורות של URL שנדגם נשמרות,
+ואזהרות / שגיאות נשמרות תמיד
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import logging.handlers
+import queue
+from datetime import datetime
+
+LOG_FILE = 'scraper.log'
+MAX_BYTES = 10 * 1024 * 1024  # גודל קובץ לפני החלפה
+BACKUP_COUNT = 5  # קבצים ישנים שנשמרים (scraper.log.1 ...) - עד 60MB בסך הכל
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# שדות של LogRecord שאינם extra={...} של הקורא
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """רשומה כשורת JSON: זמן, רמה, logger, הודעה ושדות extra (למשל url)"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_FIELDS)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def url_bucket(url):
+    """מספר קבוע בטווח [0, 1) לכל URL - אותה החלטת דגימה בכל הרשומות של ה-URL"""
+    return int.from_bytes(hashlib.blake2b(url.encode('utf-8'), digest_size=8).digest(), 'big') / 2 ** 64
+
+
+class UrlSampler(logging.Filter):
+    """
+    דגימה לפי URL: רשומות עם extra={'url': ...} נשמרות רק עבור sample_rate מה-URLs
+    אזהרות, שגיאות ורשומות ללא url עוברות תמיד
+    """
+
+    def __init__(self, sample_rate):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        url = getattr(record, 'url', None)
+        if url is None or record.levelno >= logging.WARNING or self.sample_rate >= 1:
+            return True
+        return url_bucket(url) < self.sample_rate
+
+
+def configure_logging(log_file=LOG_FILE, json_format=False, sample_rate=1.0, max_bytes=MAX_BYTES,
+                      backup_count=BACKUP_COUNT, level=logging.INFO):
+    """
+    הפעלת הלוג דרך תור - הכתיבה לדיסק ולמסך מתבצעת ב-thread רקע
+
+    Args:
+        log_file (str): קובץ הלוג (None - מסך בלבד)
+        json_format (bool): שורת JSON לכל רשומה במקום טקסט
+        sample_rate (float): חלק ה-URLs שהרשומות שלהם נשמרות (1 - כולם)
+        max_bytes (int): גודל קובץ לפני החלפה (0 - ללא החלפה)
+        backup_count (int): קבצים ישנים שנשמרים
+    """
+    global _listener
+    stop_logging()
+
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes,
+                                                             backupCount=backup_count, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    # הדגימה לפני התור - רשומות שלא נדגמו לא עולות דבר מעבר לבדיקה
+    queue_handler.addFilter(UrlSampler(sample_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging():
+    """ריקון התור וסגירת הקבצים (נקרא אוטומטית ביציאה)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+def output_handlers():
+    """ה-handlers שכותבים בפועל - של ה-listener במצב תור, אחרת של ה-root logger"""
+    if _listener is not None:
+        return list(_listener.handlers)
+    return list(logging.getLogger().handlers)
+
+
+def add_logging_arguments(parser):
+    """ארגומנטי הלוג למצב אצווה"""
+    parser.add_argument('--log-file', default=LOG_FILE,
+                        help="קובץ הלוג ('' - מסך בלבד)")
+    parser.add_argument('--log-json', action='store_true',
+                        help='שורת JSON לכל רשומה (עם שדה url)')
+    parser.add_argument('--log-sample', type=float, default=1.0,
+                        help='חלק ה-URLs שנרשמים בלוג (למשל 0.01); אזהרות ושגיאות נרשמות תמיד')
+    parser.add_argument('--log-max-bytes', type=int, default=MAX_BYTES,
+                        help='גודל קובץ הלוג לפני החלפה (0 - ללא הגבלה)')
+    parser.add_argument('--log-backups', type=int, default=BACKUP_COUNT,
+                        help='כמה קבצי לוג ישנים לשמור')
+
+
+def configure_logging_from_args(args):
+    return configure_logging(args.log_file or None, args.log_json, args.log_sample,
+                             args.log_max_bytes, args.log_backups)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+סטטיסטיקות גירוד בזרימה ובזיכרון קבוע
+כל תוצאה מעדכנת מונים, latency לכל דומיין (אחוזונים משרטוט לוגריתמי - שגיאה יחסית של 1%),
+בתים שהורדו, שגיאות לפי סוג, תפוקה לאורך זמן ואת ה-URLs האיטיים ביותר - בלי לשמור את התוצאות
+"""
+
+import heapq
+import math
+import threading
+import time
+from datetime import datetime
+
+import requests
+
+RELATIVE_ACCURACY = 0.01
+MAX_SKETCH_BUCKETS = 512
+MIN_LATENCY = 1e-4  # שניות - ערכים קטנים יותר נספרים בדלי הראשון
+MAX_DOMAINS = 1000  # דומיינים נוספים מצטברים תחת OTHER_DOMAIN
+OTHER_DOMAIN = '(other)'
+SLOWEST_URLS = 20
+MAX_FAILED_SAMPLES = 100
+THROUGHPUT_BUCKETS = 120  # כשהריצה ארוכה יותר, כל שני דליים מתאחדים והמרווח מוכפל
+THROUGHPUT_INTERVAL = 1.0
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class LatencySketch:
+    """
+    שרטוט אחוזונים (בסגנון DDSketch): דליים לוגריתמיים, כל ערך נשמר כמונה בדלי שלו
+    אחוזון מוחזר בשגיאה יחסית של עד relative_accuracy; הזיכרון חסום ב-max_buckets
+    (מעבר לזה הדליים הנמוכים מתאחדים - האחוזונים הגבוהים נשארים מדויקים)
+    """
+
+    __slots__ = ('gamma', 'log_gamma', 'max_buckets', 'buckets', 'count', 'total', 'min', 'max')
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY, max_buckets=MAX_SKETCH_BUCKETS):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        index = math.ceil(math.log(max(value, MIN_LATENCY)) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        """איחוד שני הדליים הנמוכים ביותר"""
+        lowest, second = sorted(self.buckets)[:2]
+        self.buckets[second] += self.buckets.pop(lowest)
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # נקודת האמצע של הדלי - שגיאה יחסית של עד relative_accuracy
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        """אחוזונים ב-ms"""
+        if not self.count:
+            return {}
+        result = {f'p{round(q * 100)}_ms': round(self.quantile(q) * 1000, 1) for q in QUANTILES}
+        result.update(mean_ms=round(self.total / self.count * 1000, 1), max_ms=round(self.max * 1000, 1))
+        return result
+
+
+class ThroughputSeries:
+    """מספר התוצאות (והשגיאות) בכל מרווח זמן - מספר הדליים חסום, המרווח גדל בריצות ארוכות"""
+
+    def __init__(self, interval=THROUGHPUT_INTERVAL, max_buckets=THROUGHPUT_BUCKETS):
+        self.interval = interval
+        self.max_buckets = max_buckets
+        self.started = time.monotonic()
+        self.completed = []
+        self.failed = []
+
+    def add(self, failed=False, now=None):
+        index = int(((now or time.monotonic()) - self.started) / self.interval)
+        while index >= self.max_buckets:
+            self._merge()
+            index //= 2
+        while len(self.completed) <= index:
+            self.completed.append(0)
+            self.failed.append(0)
+        self.completed[index] += 1
+        if failed:
+            self.failed[index] += 1
+
+    def _merge(self):
+        self.completed = [sum(self.completed[i:i + 2]) for i in range(0, len(self.completed), 2)]
+        self.failed = [sum(self.failed[i:i + 2]) for i in range(0, len(self.failed), 2)]
+        self.interval *= 2
+
+    def series(self):
+        return [{'start_s': round(i * self.interval, 1), 'pages': completed,
+                 'pages_per_second': round(completed / self.interval, 2), 'failed': failed}
+                for i, (completed, failed) in enumerate(zip(self.completed, self.failed))]
+
+
+class _DomainStats:
+    __slots__ = ('pages', 'failed', 'bytes', 'latency', 'errors')
+
+    def __init__(self):
+        self.pages = 0
+        self.failed = 0
+        self.bytes = 0
+        self.latency = LatencySketch()
+        self.errors = {}
+
+
+def error_category(error):
+    """סוג השגיאה לדוח: timeout, dns, connection, ssl, redirects, http_<status>, robots או שם החריגה"""
+    if isinstance(error, str):
+        return 'robots' if 'robots.txt' in error else 'other'
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return f'http_{error.response.status_code}'
+    if isinstance(error, requests.exceptions.Timeout):
+        return 'timeout'
+    if isinstance(error, requests.exceptions.SSLError):
+        return 'ssl'
+    if isinstance(error, requests.exceptions.TooManyRedirects):
+        return 'redirects'
+    if isinstance(error, requests.exceptions.ConnectionError):
+        message = str(error)
+        if 'NameResolution' in message or 'Name or service not known' in message or 'getaddrinfo' in message:
+            return 'dns'
+        return 'connection'
+    return type(error).__name__
+
+
+class ScrapeStats:
+    """
+    סטטיסטיקות מצטברות לריצה (בטוח לשימוש מכמה threads)
+    record() לכל URL, report() לדוח המלא בכל רגע
+    """
+
+    def __init__(self, max_domains=MAX_DOMAINS, slowest=SLOWEST_URLS):
+        self.max_domains = max_domains
+        self.slowest_count = slowest
+        self.started = datetime.now()
+        self.pages = 0
+        self.failed = 0
+        self.unchanged = 0
+        self.bytes = 0
+        self.latency = LatencySketch()
+        self.errors = {}
+        self.domains = {}
+        self.throughput = ThroughputSeries()
+        self._slowest = []  # min-heap של (שניות, url)
+        self._failed_samples = []
+        self._lock = threading.Lock()
+
+    def record(self, url, seconds, bytes_downloaded=0, error=None, unchanged=False):
+        """
+        תוצאה אחת
+
+        Args:
+            seconds (float): זמן הגירוד של ה-URL
+            bytes_downloaded (int): גודל התגובה
+            error: החריגה (או הודעת השגיאה) אם הגירוד נכשל
+        """
+        domain = url.split('://', 1)[-1].split('/', 1)[0].lower()
+        category = error_category(error) if error is not None else None
+        with self._lock:
+            self.pages += 1
+            self.bytes += bytes_downloaded
+            self.latency.add(seconds)
+            self.throughput.add(failed=category is not None)
+            if unchanged:
+                self.unchanged += 1
+
+            stats = self.domains.get(domain)
+            if stats is None:
+                if len(self.domains) >= self.max_domains:
+                    domain = OTHER_DOMAIN
+                stats = self.domains.setdefault(domain, _DomainStats())
+            stats.pages += 1
+            stats.bytes += bytes_downloaded
+            stats.latency.add(seconds)
+
+            if category is not None:
+                self.failed += 1
+                stats.failed += 1
+                self.errors[category] = self.errors.get(category, 0) + 1
+                stats.errors[category] = stats.errors.get(category, 0) + 1
+                if len(self._failed_samples) < MAX_FAILED_SAMPLES:
+                    self._failed_samples.append({'url': url, 'error': str(error), 'category': category})
+
+            entry = (seconds, url)
+            if len(self._slowest) < self.slowest_count:
+                heapq.heappush(self._slowest, entry)
+            elif entry > self._slowest[0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def report(self):
+        """הדוח המלא - ניתן לקרוא גם באמצע הריצה"""
+        with self._lock:
+            elapsed = (datetime.now() - self.started).total_seconds()
+            successful = self.pages - self.failed
+            domains = sorted(self.domains.items(), key=lambda item: item[1].pages, reverse=True)
+            return {
+                'summary': {
+                    'total_sites': self.pages,
+                    'successful': successful,
+                    'failed': self.failed,
+                    'unchanged': self.unchanged,
+                    'success_rate': f"{(successful / self.pages * 100):.1f}%" if self.pages else "0.0%",
+                    'bytes_downloaded': self.bytes,
+                    'elapsed_s': round(elapsed, 1),
+                    'pages_per_second': round(self.pages / elapsed, 2) if elapsed > 0 else 0.0,
+                    'latency': self.latency.summary()
+                },
+                'errors': dict(sorted(self.errors.items(), key=lambda item: item[1], reverse=True)),
+                'domains': {
+                    domain: {
+                        'pages': stats.pages,
+                        'failed': stats.failed,
+                        'bytes_downloaded': stats.bytes,
+                        'latency': stats.latency.summary(),
+                        'errors': stats.errors
+                    }
+                    for domain, stats in domains
+                },
+                'throughput': {'interval_s': self.throughput.interval, 'series': self.throughput.series()},
+                'slowest_urls': [{'url': url, 'ms': round(seconds * 1000, 1)}
+                                 for seconds, url in sorted(self._slowest, reverse=True)],
+                'failed_sites': list(self._failed_samples),
+                'started_at': self.started.isoformat(),
+                'generated_at': datetime.now().isoformat()
+            }
+
+    def format_summary(self, top_domains=5):
+        """שורות סיכום קצרות לסוף ריצת אצווה"""
+        report = self.report()
+        summary = report['summary']
+        latency = summary['latency']
+        lines = [f"{summary['total_sites']} דפים, {summary['failed']} נכשלו, "
+                 f"{summary['bytes_downloaded'] / 1024 / 1024:.1f}MB, {summary['pages_per_second']} דפים/שנייה"]
+        if latency:
+            lines.append(f"latency: p50 {latency['p50_ms']}ms | p90 {latency['p90_ms']}ms | p99 {latency['p99_ms']}ms")
+        if report['errors']:
+            lines.append('שגיאות: ' + ', '.join(f"{category} {count}" for category, count in report['errors'].items()))
+        for domain, stats in list(report['domains'].items())[:top_domains]:
+            domain_latency = stats['latency']
+            lines.append(f"  {domain}: {stats['pages']} דפים, {stats['failed']} נכשלו, "
+                         f"p50 {domain_latency.get('p50_ms')}ms, p90 {domain_latency.get('p90_ms')}ms")
+        return '\n'.join(lines)
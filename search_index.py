@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+אינדקס חיפוש טקסט מלא על התוכן שנגרד (SQLite FTS5)
+עדכון הדרגתי לכל URL, נרמול עברית (ניקוד, גרשיים, אותיות שימוש) ודירוג BM25
+"""
+
+import html
+import re
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT,
+    description TEXT,
+    scraped_at TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5 (
+    title, description, headings, body, variants,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# משקלות BM25 לעמודות: title, description, headings, body, variants
+BM25_WEIGHTS = (10.0, 5.0, 3.0, 1.0, 0.5)
+
+# סימוני ההתאמה שה-snippet של FTS5 מוסיף - תווי בקרה שלא מופיעים בטקסט שנגרד,
+# כדי שאפשר יהיה לבצע escape לטקסט (HTML מדפים זרים) ורק אז להוסיף <mark>
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+_NIQQUD = re.compile('[\u0591-\u05c7]')  # ניקוד וטעמים
+_GERSHAYIM = re.compile('(?<=[\u05d0-\u05ea])["\u05f4\'\u05f3](?=[\u05d0-\u05ea])')  # צה"ל -> צהל
+_TOKEN = re.compile(r'\w+')
+_HEBREW_WORD = re.compile('^[\u05d0-\u05ea]+$')
+
+# אותיות שימוש (מו"ש וכל"ב)
+HEBREW_PREFIXES = frozenset('משהוכלב')
+MAX_PREFIX_LETTERS = 3
+MIN_STEM_LENGTH = 3
+
+
+def normalize_hebrew(text):
+    """הסרת ניקוד וגרשיים כך שהאינדקס והשאילתה מנורמלים באותה צורה"""
+    if not text:
+        return ''
+    return _GERSHAYIM.sub('', _NIQQUD.sub('', text))
+
+
+def prefix_variants(word):
+    """צורות המילה ללא אותיות שימוש בתחילתה: 'ולבית' -> ['לבית', 'בית']"""
+    variants = []
+    if not _HEBREW_WORD.match(word):
+        return variants
+    for count in range(1, MAX_PREFIX_LETTERS + 1):
+        if len(word) - count < MIN_STEM_LENGTH or word[count - 1] not in HEBREW_PREFIXES:
+            break
+        variants.append(word[count:])
+    return variants
+
+
+def _variants_text(*texts):
+    """כל צורות המילים ללא אותיות שימוש - לעמודה variants"""
+    variants = set()
+    for text in texts:
+        for word in _TOKEN.findall(text):
+            variants.update(prefix_variants(word))
+    return ' '.join(sorted(variants))
+
+
+def build_match_query(query):
+    """
+    המרת שאילתת משתמש לביטוי FTS5 בטוח
+    כל המילים נדרשות (AND), '*' בסוף מילה - חיפוש תחילית
+    """
+    terms = []
+    for raw in normalize_hebrew(query).split():
+        prefix = raw.endswith('*')
+        for token in _TOKEN.findall(raw):
+            terms.append(f'"{token}"')
+        if prefix and terms:
+            terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _document_fields(record):
+    """שדות לאינדקס מתוצאה (בפורמט השרת או הסקריפט המתקדם)"""
+    headings = record.get('headings') or {}
+    headings_text = ' '.join(text for level in sorted(headings) for text in headings[level])
+    return {
+        'url': record.get('url', ''),
+        'title': record.get('title') or '',
+        'description': record.get('description') or record.get('meta_description') or '',
+        'headings': headings_text,
+        'body': record.get('textContent') or record.get('text_content') or '',
+        'scraped_at': record.get('scrapedAt') or record.get('scraped_at') or ''
+    }
+
+
+def _snippet_html(snippet):
+    """קטע תוצאה כ-HTML בטוח: הטקסט מהדף עובר escape, ורק סימוני ההתאמה הופכים ל-<mark>"""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+class SearchIndex:
+    def __init__(self, path='search_index.db', batch_size=200, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = {}  # url -> fields (עדכון אחרון מנצח)
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def add(self, record):
+        """הוספת/עדכון דף באינדקס (תוצאות שגיאה לא נכנסות)"""
+        if 'error' in record or record.get('status') == 'error':
+            return
+        if record.get('textContent') is None and record.get('text_content') is None:
+            return  # תוצאה בלי טקסט (fields חלקי) לא מחליפה את הדף המלא באינדקס
+        fields = _document_fields(record)
+        if not fields['url']:
+            return
+        with self._lock:
+            self._pending[fields['url']] = fields
+            if (len(self._pending) >= self.batch_size or
+                    time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self):
+        """כתיבת העדכונים הממתינים"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        with self.conn:
+            for fields in self._pending.values():
+                self._upsert(fields)
+        self._pending.clear()
+
+    def _upsert(self, fields):
+        title = normalize_hebrew(fields['title'])
+        description = normalize_hebrew(fields['description'])
+        headings = normalize_hebrew(fields['headings'])
+        body = normalize_hebrew(fields['body'])
+
+        row = self.conn.execute('SELECT id FROM docs WHERE url = ?', (fields['url'],)).fetchone()
+        if row:
+            doc_id = row[0]
+            self.conn.execute('DELETE FROM docs_fts WHERE rowid = ?', (doc_id,))
+            self.conn.execute('UPDATE docs SET title = ?, description = ?, scraped_at = ? WHERE id = ?',
+                              (fields['title'], fields['description'], fields['scraped_at'], doc_id))
+        else:
+            doc_id = self.conn.execute('INSERT INTO docs (url, title, description, scraped_at) VALUES (?, ?, ?, ?)',
+                                       (fields['url'], fields['title'], fields['description'],
+                                        fields['scraped_at'])).lastrowid
+
+        self.conn.execute(
+            'INSERT INTO docs_fts (rowid, title, description, headings, body, variants) VALUES (?, ?, ?, ?, ?, ?)',
+            (doc_id, title, description, headings, body, _variants_text(title, description, headings, body))
+        )
+
+    def search(self, query, limit=20, offset=0):
+        """
+        חיפוש מדורג (BM25)
+
+        Args:
+            query (str): מילות החיפוש
+            limit / offset (int): עימוד
+
+        Returns:
+            dict: {'total': מספר התוצאות, 'results': [...]}
+        """
+        match = build_match_query(query)
+        if not match:
+            return {'total': 0, 'results': []}
+
+        # LIMIT שלילי ב-SQLite פירושו "ללא הגבלה" - מקבעים ל-0 כדי שלא יעקוף את התקרה של הקורא
+        limit, offset = max(int(limit), 0), max(int(offset), 0)
+        self.flush()
+        conn = self._reader()
+        total = conn.execute('SELECT COUNT(*) FROM docs_fts WHERE docs_fts MATCH ?', (match,)).fetchone()[0]
+        weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+        rows = conn.execute(
+            f"""SELECT d.url, d.title, d.description, d.scraped_at,
+                       bm25(docs_fts, {weights}) AS score,
+                       snippet(docs_fts, 3, ?, ?, '…', 24)
+                FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid
+                WHERE docs_fts MATCH ?
+                ORDER BY score LIMIT ? OFFSET ?""",
+            (_MARK_START, _MARK_END, match, limit, offset)
+        ).fetchall()
+
+        return {
+            'total': total,
+            'results': [{
+                'url': url,
+                'title': title,
+                'description': description,
+                'scrapedAt': scraped_at,
+                'score': round(-score, 4),  # bm25 מחזיר ערכים שליליים - גבוה יותר = רלוונטי יותר
+                'snippet': _snippet_html(snippet)
+            } for url, title, description, scraped_at, score, snippet in rows]
+        }
+
+    def _reader(self):
+        """חיבור קריאה של ה-thread הנוכחי"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+גילוי מפות אתר (sitemap) וקריאתן בזרימה
+מפות מתגלות מ-robots.txt ומ-/sitemap.xml, מפוענחות עם iterparse (כולל gzip ו-sitemap index)
+בלי לטעון אותן לזיכרון, ו-URLs שה-lastmod שלהם לא השתנה מאז הריצה הקודמת מדולגים
+"""
+
+import itertools
+import logging
+import sqlite3
+import urllib.parse
+import xml.etree.ElementTree as ET
+import zlib
+
+MAX_INDEX_DEPTH = 3
+
+
+def _local_name(tag):
+    """שם תגית ללא namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def sitemap_candidates(site_url, robots_sitemaps=()):
+    """כתובות מפות אתר: קודם מ-robots.txt ואחר כך /sitemap.xml"""
+    parsed = urllib.parse.urlparse(site_url)
+    default = f"{parsed.scheme}://{parsed.netloc}/sitemap.xml"
+    candidates = list(dict.fromkeys(robots_sitemaps or ()))
+    if default not in candidates:
+        candidates.append(default)
+    return candidates
+
+
+def _open_chunks(get, sitemap_url, timeout=30, chunk_size=64 * 1024):
+    """פתיחת מפת אתר כזרם חלקי בתים (פענוח gzip אם צריך)"""
+    response = get(sitemap_url, timeout=timeout, stream=True)
+    response.raise_for_status()
+    # iter_content מפענח Content-Encoding של ההעברה
+    chunks = response.iter_content(chunk_size=chunk_size)
+    first = next(chunks, b'')
+    chunks = itertools.chain([first], chunks)
+    if first[:2] == b'\x1f\x8b':
+        chunks = _gunzip(chunks)  # קובץ sitemap.xml.gz
+    return response, chunks
+
+
+def _gunzip(chunks):
+    """פריסת gzip בזרימה"""
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+def iter_sitemap_entries(chunks):
+    """
+    פענוח זורם של מפת אתר מחלקי בתים
+
+    Yields:
+        tuple: (סוג - 'url' או 'sitemap', loc, lastmod)
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+    loc = lastmod = None
+
+    def events():
+        for chunk in chunks:
+            parser.feed(chunk)
+            yield from parser.read_events()
+        parser.close()
+        yield from parser.read_events()
+
+    for event, elem in events():
+        if event == 'start':
+            if root is None:
+                root = elem
+            continue
+        name = _local_name(elem.tag)
+        if name == 'loc':
+            loc = (elem.text or '').strip()
+        elif name == 'lastmod':
+            lastmod = (elem.text or '').strip() or None
+        elif name in ('url', 'sitemap'):
+            if loc:
+                yield name, loc, lastmod
+            loc = lastmod = None
+            root.clear()  # שחרור הרשומות שכבר עובדו
+
+
+def iter_sitemap_urls(get, sitemap_urls, max_depth=MAX_INDEX_DEPTH):
+    """
+    URLs מכל מפות האתר (כולל מפות מקוננות ב-sitemap index)
+
+    Args:
+        get (callable): בקשת GET בממשק של session.get (למשל דרך מאגר ה-proxies של הגורד)
+        sitemap_urls (list): כתובות מפות האתר לקריאה
+
+    Yields:
+        tuple: (url, lastmod)
+    """
+    seen = set()
+    queue = [(url, 0) for url in sitemap_urls]
+    while queue:
+        sitemap_url, depth = queue.pop(0)
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+
+        try:
+            response, chunks = _open_chunks(get, sitemap_url)
+        except Exception as e:
+            logging.warning(f"לא ניתן לקרוא מפת אתר {sitemap_url}: {e}")
+            continue
+
+        try:
+            for kind, loc, lastmod in iter_sitemap_entries(chunks):
+                if kind == 'url':
+                    yield loc, lastmod
+                elif depth < max_depth:
+                    queue.append((loc, depth + 1))
+        except (ET.ParseError, zlib.error) as e:
+            logging.warning(f"מפת אתר לא תקינה {sitemap_url}: {e}")
+        finally:
+            response.close()
+
+
+class SitemapState:
+    """lastmod של כל URL מהריצה הקודמת (SQLite - לא נטען לזיכרון)"""
+
+    def __init__(self, path='sitemap_state.db', commit_every=500):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS lastmod (url TEXT PRIMARY KEY, lastmod TEXT NOT NULL)')
+        self.commit_every = commit_every
+        self.skipped = 0
+        self._pending = 0
+
+    def is_unchanged(self, url, lastmod):
+        """האם ה-URL כבר נגרד עם אותו lastmod"""
+        if not lastmod:
+            return False
+        row = self.conn.execute('SELECT lastmod FROM lastmod WHERE url = ?', (url,)).fetchone()
+        if row is not None and row[0] == lastmod:
+            self.skipped += 1
+            return True
+        return False
+
+    def update(self, url, lastmod):
+        """שמירת lastmod אחרי גירוד מוצלח"""
+        if not lastmod:
+            return
+        self.conn.execute('INSERT OR REPLACE INTO lastmod (url, lastmod) VALUES (?, ?)', (url, lastmod))
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.conn.commit()
+            self._pending = 0
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def iter_changed_urls(entries, state=None):
+    """סינון זוגות (url, lastmod) שלא השתנו מאז הריצה הקודמת"""
+    for url, lastmod in entries:
+        if state is not None and state.is_unchanged(url, lastmod):
+            continue
+        yield url, lastmod
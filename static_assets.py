@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+הגשת קבצי האפליקציה (HTML / JS / CSS) מהזיכרון
+בעליית השרת כל קובץ נטען פעם אחת, מקבל ETag לפי hash התוכן וגרסאות gzip / brotli דחוסות מראש.
+דפי HTML מפנים לסקריפטים עם ?v=<hash>, כך שהסקריפטים נשמרים בדפדפן לשנה
+ודף ה-HTML עצמו נבדק מול ה-ETag ומקבל 304 כשלא השתנה
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+# אופציונלי - בלעדיו מוגשות גרסאות gzip בלבד
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+ASSET_EXTENSIONS = frozenset(['.html', '.js', '.css', '.svg', '.json', '.txt'])
+MAX_ASSET_BYTES = 2 * 1024 * 1024
+MIN_COMPRESS_BYTES = 512  # קבצים קטנים יותר לא שווים דחיסה
+VERSION_PARAM = 'v'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# בלי גרסה ב-URL - הדפדפן משתמש בעותק שלו רק אחרי בדיקת ETag (תשובת 304 ללא גוף)
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# src="x.js" / href="x.css" יחסיים בתוך HTML
+_REFERENCE = re.compile(r'''(\b(?:src|href)=["'])([^"'?#:]+\.(?:js|css))(["'])''')
+
+
+class Asset:
+    """קובץ בזיכרון: גוף, ETag וגרסאות דחוסות לפי Content-Encoding"""
+
+    __slots__ = ('name', 'content_type', 'body', 'etag', 'version', 'variants')
+
+    def __init__(self, name, body):
+        self.name = name
+        self.content_type = _content_type(name)
+        self.body = body
+        digest = hashlib.sha256(body).hexdigest()
+        self.etag = f'"{digest[:32]}"'
+        self.version = digest[:12]
+        self.variants = {}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self._add_variant('gzip', gzip.compress(body, compresslevel=9, mtime=0))
+            if BROTLI_AVAILABLE:
+                self._add_variant('br', brotli.compress(body, quality=11))
+
+    def _add_variant(self, encoding, compressed):
+        if len(compressed) < len(self.body):
+            self.variants[encoding] = compressed
+
+    def negotiate(self, accept_encoding):
+        """(Content-Encoding או None, גוף) - brotli, אחר כך gzip, אחר כך ללא דחיסה"""
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ('br', 'gzip'):
+            if encoding in accepted and encoding in self.variants:
+                return encoding, self.variants[encoding]
+        return None, self.body
+
+
+def _content_type(name):
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json',
+                                                           'image/svg+xml'):
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+def _accepted_encodings(header):
+    """קידודים מ-Accept-Encoding (ללא אלה שסומנו q=0)"""
+    accepted = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if name:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # השוואה חלשה - גם W/"..." (למשל אחרי proxy שדחס מחדש) נחשב התאמה
+    return etag in (tag.strip().removeprefix('W/') for tag in if_none_match.split(','))
+
+
+class StaticAssets:
+    """
+    קבצי האפליקציה מתיקייה אחת, טעונים ודחוסים מראש
+
+    Args:
+        directory (str): התיקייה שממנה מוגשים הקבצים (לא כולל תתי-תיקיות)
+    """
+
+    def __init__(self, directory='.'):
+        self.directory = directory
+        self.assets = {}
+        self.load()
+
+    def load(self):
+        """טעינת כל הקבצים (נקרא בעליית השרת - שינוי בקבצים דורש הפעלה מחדש)"""
+        assets = {}
+        for entry in os.scandir(self.directory):
+            extension = os.path.splitext(entry.name)[1].lower()
+            if extension not in ASSET_EXTENSIONS or not entry.is_file() or entry.stat().st_size > MAX_ASSET_BYTES:
+                continue
+            with open(entry.path, 'rb') as f:
+                assets[entry.name] = Asset(entry.name, f.read())
+
+        # קודם הסקריפטים (ה-hash שלהם נכנס ל-HTML), אחר כך דפי ה-HTML עם הפניות בגרסה
+        for name, asset in assets.items():
+            if name.endswith('.html'):
+                assets[name] = Asset(name, self._versioned_html(asset.body, assets))
+        self.assets = assets
+
+    @staticmethod
+    def _versioned_html(body, assets):
+        try:
+            html = body.decode('utf-8')
+        except UnicodeDecodeError:
+            return body
+
+        def versioned(match):
+            asset = assets.get(match.group(2))
+            if asset is None:
+                return match.group(0)
+            return f'{match.group(1)}{match.group(2)}?{VERSION_PARAM}={asset.version}{match.group(3)}'
+
+        return _REFERENCE.sub(versioned, html).encode('utf-8')
+
+    def get(self, name):
+        return self.assets.get(name)
+
+    def respond(self, name, request_headers, version=None):
+        """
+        תשובה לבקשת GET לקובץ
+
+        Args:
+            request_headers: כותרות הבקשה (If-None-Match, Accept-Encoding)
+            version (str): פרמטר ?v= מה-URL - בגרסה הנוכחית הקובץ נשמר בדפדפן לשנה
+
+        Returns:
+            tuple: (status, headers, body) או None אם הקובץ לא נטען מראש
+        """
+        asset = self.assets.get(name)
+        if asset is None:
+            return None
+
+        headers = {
+            'ETag': asset.etag,
+            'Cache-Control': IMMUTABLE_CACHE_CONTROL if version == asset.version else REVALIDATE_CACHE_CONTROL,
+            'Vary': 'Accept-Encoding'
+        }
+        if _etag_matches(request_headers.get('If-None-Match'), asset.etag):
+            return 304, headers, b''
+
+        encoding, body = asset.negotiate(request_headers.get('Accept-Encoding'))
+        headers['Content-Type'] = asset.content_type
+        headers['Content-Length'] = str(len(body))
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        return 200, headers, body
+
+    def stats(self):
+        return {
+            'assets': len(self.assets),
+            'bytes': sum(len(asset.body) for asset in self.assets.values()),
+            'gzip_bytes': sum(len(asset.variants.get('gzip', asset.body)) for asset in self.assets.values()),
+            'br_bytes': sum(len(asset.variants.get('br', asset.body)) for asset in self.assets.values())
+            if BROTLI_AVAILABLE else None
+        }
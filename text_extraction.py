@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+חילוץ טקסט זורם עם תקציב תווים
+עובר על צמתי הטקסט לפי הסדר, מנרמל רווחים תוך כדי ועוצר ברגע שהתקציב מולא
+"""
+
+import re
+from bs4 import NavigableString, Tag
+
+# אותם גבולות שורה ש-str.splitlines מכיר
+_LINE_BREAK = re.compile('\r\n|[\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]')
+
+
+def iter_text_nodes(root, skip_tags=()):
+    """מעבר על צמתי הטקסט לפי סדר המסמך תוך דילוג על תתי-עצים של skip_tags"""
+    # אותם סוגי מחרוזות ש-get_text מחזיר (ללא הערות, סקריפטים וכו')
+    string_types = root.interesting_string_types
+    if isinstance(string_types, type):
+        string_types = (string_types,)
+
+    stack = [iter(root.contents)]
+    while stack:
+        for child in stack[-1]:
+            if isinstance(child, Tag):
+                if child.name in skip_tags:
+                    continue
+                stack.append(iter(child.contents))
+                break
+            if isinstance(child, NavigableString) and type(child) in string_types:
+                yield child
+        else:
+            stack.pop()
+
+
+class _BudgetWriter:
+    """כתיבת טקסט עם כיווץ רווחים ועצירה כשהתקציב מולא"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.parts = []
+        self.length = 0
+        self.pending_space = False
+
+    @property
+    def full(self):
+        return self.limit is not None and self.length >= self.limit
+
+    def write(self, fragment):
+        if not fragment:
+            return
+        if fragment[0].isspace():
+            self.pending_space = True
+        for word in fragment.split():
+            if self.pending_space and self.length:
+                self.parts.append(' ')
+                self.length += 1
+            self.parts.append(word)
+            self.length += len(word)
+            self.pending_space = True
+            if self.full:
+                return
+        self.pending_space = fragment[-1].isspace()
+
+    def separate(self):
+        self.pending_space = True
+
+
+class TextBudget:
+    """
+    צבירת צמתי טקסט לטקסט מנורמל עד max_length תווים
+
+    שקול ל:
+        text = separator.join(nodes)  # אחרי strip לכל צומת אם strip=True
+        lines = [l.strip() for l in text.splitlines() if len(l.strip()) >= min_line_length]
+        re.sub(r'\\s+', ' ', ' '.join(l for l in lines if l))[:max_length]
+    אבל בלי לבנות את המחרוזת המלאה
+    """
+
+    def __init__(self, max_length, separator='', strip=False, min_line_length=0):
+        self.max_length = max_length
+        self.separator = separator
+        self.strip = strip
+        self.min_line_length = min_line_length
+        # חיתוך שלילי חותך מהסוף - דורש את הטקסט המלא
+        limit = max_length if max_length is None or max_length >= 0 else None
+        self._writer = _BudgetWriter(limit)
+        self._line_buffer = []  # תחילת השורה הנוכחית, עד שידוע שהיא ארוכה מספיק
+        self._line_kept = min_line_length <= 1
+        self._first = True
+
+    @property
+    def full(self):
+        return self._writer.full
+
+    def add(self, node):
+        """הוספת צומת טקסט אחד"""
+        if self.full:
+            return
+        if self.strip:
+            node = node.strip()
+            if not node:
+                return
+        if not self._first and self.separator:
+            self._feed(self.separator)
+        self._first = False
+
+        position = 0
+        for match in _LINE_BREAK.finditer(node):
+            self._feed(node[position:match.start()])
+            self._end_line()
+            position = match.end()
+            if self.full:
+                return
+        self._feed(node[position:])
+
+    def _feed(self, segment):
+        if self._line_kept:
+            self._writer.write(segment)
+            return
+        self._line_buffer.append(segment)
+        if len(''.join(self._line_buffer).strip()) >= self.min_line_length:
+            self._line_kept = True
+            self._writer.write(''.join(self._line_buffer))
+            self._line_buffer.clear()
+
+    def _end_line(self):
+        self._line_buffer.clear()
+        self._line_kept = self.min_line_length <= 1
+        self._writer.separate()
+
+    def getvalue(self):
+        text = ''.join(self._writer.parts)
+        return text[:self.max_length] if self.max_length is not None else text
+
+
+def extract_text(root, max_length, skip_tags=(), separator='', strip=False, min_line_length=0):
+    """
+    חילוץ טקסט נקי עד max_length תווים
+
+    Args:
+        root: אלמנט BeautifulSoup שממנו מחלצים
+        max_length (int): תקציב תווים (None - ללא הגבלה)
+        skip_tags (iterable): תגיות שהתוכן שלהן לא נכלל (במקום decompose)
+        separator (str): מפריד בין צמתי טקסט (כמו ב-get_text)
+        strip (bool): הסרת רווחים מכל צומת ודילוג על צמתים ריקים (כמו ב-get_text)
+        min_line_length (int): אורך מינימלי לשורה כדי שתיכלל
+
+    Returns:
+        str: הטקסט המנורמל
+    """
+    budget = TextBudget(max_length, separator, strip, min_line_length)
+    for node in iter_text_nodes(root, frozenset(skip_tags)):
+        budget.add(node)
+        if budget.full:
+            break
+    return budget.getvalue()
+
+
+_HEAD_END = re.compile(r'</head\s*>', re.IGNORECASE)
+_HEAD_END_BYTES = re.compile(rb'</head\s*>', re.IGNORECASE)
+
+
+def head_section(markup):
+    """
+    תחילת המסמך עד </head> כולל (str או bytes; כל המסמך אם אין סגירה)
+    מספיק לחילוץ <title> ו-<meta> בלי לפענח את גוף הדף
+    """
+    match = (_HEAD_END_BYTES if isinstance(markup, bytes) else _HEAD_END).search(markup)
+    return markup[:match.end()] if match else markup
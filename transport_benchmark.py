@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+השוואת תעבורות HTTP: requests (HTTP/1.1, gzip) מול http2 (httpx, brotli/zstd)
+לכל תעבורה: בתים שהועברו ברשת (גוף התגובה לפני פענוח), latency לבקשה וזמן כולל במקביל
+
+שימוש:
+    python transport_benchmark.py -i urls.txt -c 16 --repeat 3
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from batch_runner import normalize_url
+from http_transport import make_session, accept_encoding, TRANSPORTS
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+def _wire_bytes(response):
+    """בתי הגוף שהתקבלו ברשת (דחוסים) - requests דרך urllib3, http2 דרך httpx"""
+    if hasattr(response, 'bytes_downloaded'):
+        return response.bytes_downloaded
+    return response.raw.tell()
+
+
+def _fetch(session, url, timeout):
+    started = time.perf_counter()
+    response = session.get(url, timeout=timeout, stream=True)
+    try:
+        body_size = sum(len(chunk) for chunk in response.iter_content(chunk_size=64 * 1024))
+        return {
+            'latency': time.perf_counter() - started,
+            'wire_bytes': _wire_bytes(response),
+            'body_bytes': body_size,
+            'http_version': getattr(response, 'http_version', None) or 'HTTP/1.1',
+            'encoding': response.headers.get('content-encoding', 'identity'),
+            'status': response.status_code
+        }
+    finally:
+        response.close()
+
+
+def run_transport(transport, urls, concurrency, timeout=15, verify=True):
+    """הרצת כל ה-URLs בתעבורה אחת (session אחד משותף לכל ה-threads)"""
+    session = make_session(transport, pool_size=concurrency)
+    session.verify = verify
+    session.headers.update({'User-Agent': USER_AGENT, 'Accept-Encoding': accept_encoding(transport)})
+
+    samples, errors = [], Counter()
+
+    def fetch(url):
+        try:
+            samples.append(_fetch(session, url, timeout))
+        except Exception as e:
+            errors[type(e).__name__] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(fetch, urls))
+    wall = time.perf_counter() - started
+    session.close()
+    return summarize(transport, samples, errors, wall)
+
+
+def summarize(transport, samples, errors, wall):
+    latencies = sorted(sample['latency'] for sample in samples) or [0.0]
+    return {
+        'transport': transport,
+        'requests': len(samples),
+        'errors': dict(errors),
+        'wire_bytes': sum(sample['wire_bytes'] for sample in samples),
+        'body_bytes': sum(sample['body_bytes'] for sample in samples),
+        'latency_mean_ms': statistics.fmean(latencies) * 1000,
+        'latency_p50_ms': latencies[len(latencies) // 2] * 1000,
+        'latency_p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        'wall_s': wall,
+        'requests_per_s': len(samples) / wall if wall else 0.0,
+        'http_versions': dict(Counter(sample['http_version'] for sample in samples)),
+        'encodings': dict(Counter(sample['encoding'] for sample in samples))
+    }
+
+
+def print_report(results):
+    print(f"{'':<22}" + ''.join(f"{result['transport']:>18}" for result in results))
+    rows = [
+        ('בקשות', 'requests', '{:d}'),
+        ('בתים ברשת', 'wire_bytes', '{:,d}'),
+        ('בתים לאחר פענוח', 'body_bytes', '{:,d}'),
+        ('latency ממוצע (ms)', 'latency_mean_ms', '{:.1f}'),
+        ('latency p50 (ms)', 'latency_p50_ms', '{:.1f}'),
+        ('latency p95 (ms)', 'latency_p95_ms', '{:.1f}'),
+        ('זמן כולל (s)', 'wall_s', '{:.2f}'),
+        ('בקשות לשנייה', 'requests_per_s', '{:.1f}'),
+    ]
+    for label, key, fmt in rows:
+        print(f"{label:<22}" + ''.join(f"{fmt.format(result[key]):>18}" for result in results))
+    for result in results:
+        print(f"{result['transport']}: {result['http_versions']} {result['encodings']}"
+              + (f" שגיאות: {result['errors']}" if result['errors'] else ''))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="השוואת תעבורות HTTP (bytes ו-latency)")
+    parser.add_argument('-i', '--input', default='-', help="קובץ URLs ('-' עבור stdin)")
+    parser.add_argument('-c', '--concurrency', type=int, default=16)
+    parser.add_argument('--repeat', type=int, default=1, help='כמה פעמים לבקש כל URL')
+    parser.add_argument('--transports', nargs='+', choices=TRANSPORTS, default=list(TRANSPORTS))
+    parser.add_argument('--ca-bundle', help='קובץ CA לאימות (למשל שרת בדיקה מקומי עם תעודה עצמית)')
+    args = parser.parse_args(argv)
+
+    stream = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    with stream:
+        urls = [url for url in map(normalize_url, stream) if url]
+    urls = urls * args.repeat
+
+    verify = args.ca_bundle or True
+    print_report([run_transport(transport, urls, args.concurrency, verify=verify) for transport in args.transports])
+
+
+if __name__ == '__main__':
+    main()
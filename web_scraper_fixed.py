@@ -14,16 +14,10 @@ import urllib.parse
 import logging
 from datetime import datetime
 import os
+import sys
+from batch_runner import build_arg_parser, run_batch_cli
+from scrape_logging import configure_logging, configure_logging_from_args
 
-# הגדרות בסיסיות
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('scraper.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
 
 class WebScraper:
     def __init__(self):
@@ -46,7 +40,7 @@ class WebScraper:
             dict: נתונים שנגרדו מהאתר
         """
         try:
-            logging.info(f"מתחיל גירוד: {url}")
+            logging.info(f"מתחיל גירוד: {url}", extra={'url': url})
             
             # השהיה כדי לא להעמיס על השרת
             time.sleep(delay)
@@ -71,11 +65,11 @@ class WebScraper:
                 'scraped_at': datetime.now().isoformat()
             }
             
-            logging.info(f"גירוד הושלם בהצלחה: {url}")
+            logging.info(f"גירוד הושלם בהצלחה: {url}", extra={'url': url})
             return data
             
         except requests.exceptions.RequestException as e:
-            logging.error(f"שגיאה בגירוד {url}: {e}")
+            logging.error(f"שגיאה בגירוד {url}: {e}", extra={'url': url})
             return {
                 'url': url,
                 'error': str(e),
@@ -188,8 +182,27 @@ class WebScraper:
         
         logging.info(f"נתונים נשמרו ל: {filename}")
 
-def main():
+def batch_main(argv):
+    """מצב אצווה לא-אינטראקטיבי (לרשימות גדולות ול-cron)"""
+    parser = build_arg_parser("גירוד אתרים - מצב אצווה", selectors=False, low_memory=False, robots=False)
+    args = parser.parse_args(argv)
+    configure_logging_from_args(args)
+    
+    def make_scrape():
+        scraper = WebScraper()
+        # הקצב נשלט ע"י --per-host-rate ולא ע"י השהיה קבועה
+        return lambda url: scraper.scrape_url(url, 0)
+    
+    progress = run_batch_cli(args, make_scrape)
+    return 1 if progress.done and progress.failed == progress.done else 0
+
+def main(argv=None):
     """פונקציה ראשית להפעלת הסקריפט"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        return batch_main(argv)
+    
+    configure_logging()
     scraper = WebScraper()
     
     print("=== סקריפט גירוד אתרים ===")
@@ -245,4 +258,4 @@ def main():
     print(f"כשלונות: {failed}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
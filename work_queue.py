@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+תור עבודה משותף לכמה תהליכי גירוד (או כמה מחשבים על אותה תיקייה משותפת)
+קובץ SQLite אחד מחזיק את ה-URLs ואת התוצאות: כל worker מקבל URLs בחכירה (lease) לזמן מוגבל,
+מחדש את החכירה כל עוד הוא חי, ותוצאה מסמנת את ה-URL כהושלם. worker שמת - החכירות שלו פגות
+וה-URLs נמסרים לאחרים. בסוף - ייצוא כל התוצאות ליעד אחד (JSONL / CSV / SQLite / Parquet)
+
+שימוש:
+    python work_queue.py enqueue -i urls.txt --queue work.db
+    python advanced_web_scraper.py --queue work.db -c 8      # בכל תהליך / מחשב
+    python work_queue.py status --queue work.db
+    python work_queue.py export --queue work.db -o results.jsonl
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+
+QUEUE_PATH = 'work_queue.db'
+LEASE_SECONDS = 120  # חכירה שלא חודשה בזמן הזה נחשבת ל-worker שמת
+MAX_ATTEMPTS = 3  # URL שה-workers שלו מתו יותר פעמים מזה מסומן כנכשל (למשל דף שמפיל את התהליך)
+POLL_SECONDS = 1.0  # המתנה כשאין URLs פנויים אבל ל-workers אחרים יש חכירות פעילות
+COMPLETE_BATCH = 50
+COMPLETE_INTERVAL = 1.0
+ENQUEUE_BATCH = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_state ON tasks (state, id);
+CREATE TABLE IF NOT EXISTS results (
+    url TEXT PRIMARY KEY,
+    task_id INTEGER,
+    failed INTEGER NOT NULL,
+    worker TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_task ON results (task_id);
+"""
+
+
+def worker_id():
+    """מזהה ה-worker: מחשב ותהליך"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    תור URLs עם חכירות (בטוח לשימוש מכמה threads ומכמה תהליכים)
+    הזמנים בשעון הקיר (time.time) - משותף לתהליכים; בין מחשבים השעונים צריכים להיות מסונכרנים
+    """
+
+    def __init__(self, path=QUEUE_PATH, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # טרנזקציות ידניות (BEGIN IMMEDIATE) - החכירה היא קריאה ועדכון אטומיים מול תהליכים אחרים
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def _transaction(self, work):
+        with self._lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = work()
+            except BaseException:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+            return result
+
+    def enqueue(self, urls):
+        """הוספת URLs (כפילויות ו-URLs שכבר בתור מדולגים); מחזיר כמה נוספו"""
+        added = 0
+        batch = []
+        for url in urls:
+            batch.append((url,))
+            if len(batch) >= ENQUEUE_BATCH:
+                added += self._insert(batch)
+                batch = []
+        if batch:
+            added += self._insert(batch)
+        return added
+
+    def _insert(self, rows):
+        def work():
+            before = self.conn.total_changes
+            self.conn.executemany('INSERT OR IGNORE INTO tasks (url) VALUES (?)', rows)
+            return self.conn.total_changes - before
+        return self._transaction(work)
+
+    def lease(self, worker, count, lease_seconds=LEASE_SECONDS):
+        """
+        חכירת עד count URLs: קודם חכירות שפגו (של workers שמתו), אחר כך URLs חדשים לפי סדר ההוספה
+        """
+        now = time.time()
+
+        def work():
+            expired = self.conn.execute(
+                "SELECT id, url, attempts FROM tasks WHERE state = 'leased' AND lease_expires < ?", (now,)
+            ).fetchall()
+            poisoned = [(task_id, url) for task_id, url, attempts in expired if attempts >= self.max_attempts]
+            if poisoned:
+                self._mark_failed(poisoned, now)
+            leased = [(task_id, url) for task_id, url, attempts in expired
+                      if attempts < self.max_attempts][:count]
+            if len(leased) < count:
+                leased += self.conn.execute("SELECT id, url FROM tasks WHERE state = 'pending' ORDER BY id LIMIT ?",
+                                            (count - len(leased),)).fetchall()
+            self.conn.executemany(
+                "UPDATE tasks SET state = 'leased', lease_owner = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                [(worker, now + lease_seconds, task_id) for task_id, _ in leased]
+            )
+            return [url for _, url in leased]
+        return self._transaction(work)
+
+    def _mark_failed(self, tasks, now):
+        """URLs שנחכרו MAX_ATTEMPTS פעמים בלי תוצאה - נכשלים עם רשומת שגיאה בתוצאות"""
+        self.conn.executemany("UPDATE tasks SET state = 'failed', lease_owner = NULL WHERE id = ?",
+                              [(task_id,) for task_id, _ in tasks])
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO results (url, task_id, failed, worker, data) VALUES (?, ?, 1, NULL, ?)',
+            [(url, task_id, json.dumps({'url': url, 'error': f'lease expired {self.max_attempts} times',
+                                        'scraped_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(now))}))
+             for task_id, url in tasks]
+        )
+
+    def renew(self, worker, lease_seconds=LEASE_SECONDS):
+        """חידוש כל החכירות של ה-worker (דופק חיים)"""
+        def work():
+            return self.conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE state = 'leased' AND lease_owner = ?",
+                (time.time() + lease_seconds, worker)
+            ).rowcount
+        return self._transaction(work)
+
+    def complete(self, worker, records):
+        """שמירת תוצאות וסימון ה-URLs שלהן כהושלמו - בטרנזקציה אחת"""
+        def work():
+            for record in records:
+                url = record.get('url', '')
+                if record.get('unchanged'):
+                    # דף שלא השתנה (--skip-unchanged) - המשימה הושלמה, אין תוצאה חדשה לשמור
+                    self.conn.execute("UPDATE tasks SET state = 'done', lease_owner = NULL WHERE url = ?", (url,))
+                    continue
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO results (url, task_id, failed, worker, data) '
+                    'VALUES (?, (SELECT id FROM tasks WHERE url = ?), ?, ?, ?)',
+                    (url, url, 'error' in record, worker, json.dumps(record, ensure_ascii=False))
+                )
+                # גם אם החכירה כבר עברה ל-worker אחר - התוצאה תקפה
+                self.conn.execute("UPDATE tasks SET state = 'done', lease_owner = NULL WHERE url = ?", (url,))
+        if records:
+            self._transaction(work)
+
+    def release(self, worker):
+        """החזרת ה-URLs שה-worker חכר ולא סיים לתור (יציאה מסודרת - בלי לחכות שהחכירה תפוג)"""
+        def work():
+            return self.conn.execute(
+                "UPDATE tasks SET state = 'pending', lease_owner = NULL, lease_expires = NULL, "
+                "attempts = attempts - 1 WHERE state = 'leased' AND lease_owner = ?", (worker,)
+            ).rowcount
+        return self._transaction(work)
+
+    def requeue_failed(self):
+        """URLs שנכשלו (חכירות שפגו שוב ושוב) חוזרים לתור"""
+        def work():
+            self.conn.execute("DELETE FROM results WHERE url IN (SELECT url FROM tasks WHERE state = 'failed')")
+            return self.conn.execute(
+                "UPDATE tasks SET state = 'pending', attempts = 0, lease_owner = NULL, lease_expires = NULL "
+                "WHERE state = 'failed'"
+            ).rowcount
+        return self._transaction(work)
+
+    def wait_for_work(self, worker, poll=POLL_SECONDS):
+        """
+        המתנה עד שיש URLs לחכירה; False כשהתור הסתיים
+        כל עוד ל-workers אחרים יש חכירות פעילות ממשיכים לחכות - אם ימותו, ה-URLs שלהם יחזרו לכאן
+        (חכירות של ה-worker עצמו לא נספרות - הוא לא מחכה לעצמו)
+        """
+        while True:
+            now = time.time()
+            with self._lock:
+                available = self.conn.execute(
+                    "SELECT 1 FROM tasks WHERE state = 'pending' OR (state = 'leased' AND lease_expires < ?) LIMIT 1",
+                    (now,)
+                ).fetchone()
+                active = self.conn.execute(
+                    "SELECT 1 FROM tasks WHERE state = 'leased' AND lease_expires >= ? AND lease_owner != ? LIMIT 1",
+                    (now, worker)
+                ).fetchone()
+            if available:
+                return True
+            if not active:
+                return False
+            time.sleep(poll)
+
+    def leased_urls(self, worker, batch, lease_seconds=LEASE_SECONDS):
+        """URLs ל-worker בזרימה (חכירה של batch בכל פעם) עד שאין מה לחכור"""
+        while True:
+            urls = self.lease(worker, batch, lease_seconds)
+            if not urls:
+                return
+            yield from urls
+
+    def counts(self):
+        """מספר ה-URLs בכל מצב (pending / leased / done / failed)"""
+        with self._lock:
+            counts = dict(self.conn.execute('SELECT state, COUNT(*) FROM tasks GROUP BY state').fetchall())
+            workers = self.conn.execute(
+                "SELECT COUNT(DISTINCT lease_owner) FROM tasks WHERE state = 'leased' AND lease_expires >= ?",
+                (time.time(),)
+            ).fetchone()[0]
+        counts = {state: counts.get(state, 0) for state in ('pending', 'leased', 'done', 'failed')}
+        counts['active_workers'] = workers
+        return counts
+
+    def results(self):
+        """כל התוצאות לפי סדר ההוספה לתור (איטרטור)"""
+        # חיבור נפרד - הייצוא לא חוסם workers שעדיין כותבים לתור
+        cursor = sqlite3.connect(self.path).execute('SELECT data FROM results ORDER BY task_id')
+        return (json.loads(row[0]) for row in cursor)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class LeaseKeeper:
+    """thread רקע שמחדש את החכירות של ה-worker כל שליש מזמן החכירה"""
+
+    def __init__(self, queue, worker, lease_seconds=LEASE_SECONDS):
+        self.queue = queue
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='lease-keeper', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                self.queue.renew(self.worker, self.lease_seconds)
+            except sqlite3.Error as e:
+                sys.stderr.write(f"חידוש חכירות נכשל: {e}\n")
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class QueueSink:
+    """
+    יעד הפלט של worker: התוצאות נשמרות בקובץ התור באצוות, וכל תוצאה מסמנת את ה-URL שלה כהושלם
+    מקבל גם רשומות unchanged (--skip-unchanged) - הן רק מסמנות את המשימה כהושלמה
+    """
+
+    def __init__(self, queue, worker, batch_size=COMPLETE_BATCH, flush_interval=COMPLETE_INTERVAL):
+        self.queue = queue
+        self.worker = worker
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def write(self, record):
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.queue.complete(self.worker, self._pending)
+        self._pending = []
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+
+
+def format_counts(counts):
+    return (f"תור: {counts['pending']} ממתינים, {counts['leased']} בעבודה ({counts['active_workers']} workers), "
+            f"{counts['done']} הושלמו, {counts['failed']} נכשלו")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='תור עבודה משותף לגירוד בכמה תהליכים / מחשבים')
+    parser.add_argument('--queue', default=QUEUE_PATH, help='קובץ התור (SQLite)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    enqueue = commands.add_parser('enqueue', help='הוספת URLs לתור')
+    enqueue.add_argument('-i', '--input', default='-', help="קובץ URLs (שורה לכל כתובת, '-' עבור stdin)")
+    commands.add_parser('status', help='מצב התור')
+    export = commands.add_parser('export', help='ייצוא כל התוצאות ליעד אחד')
+    export.add_argument('-o', '--output', default='-', help="קובץ פלט ('-' עבור stdout)")
+    export.add_argument('-f', '--format', choices=['jsonl', 'csv', 'sqlite', 'parquet'], default='jsonl')
+    commands.add_parser('requeue-failed', help='החזרת URLs שנכשלו לתור')
+    args = parser.parse_args(argv)
+
+    # batch_runner מייבא את המודול הזה - הייבוא ההפוך רק בהרצה כסקריפט
+    from batch_runner import iter_urls, open_sink
+
+    queue = WorkQueue(args.queue)
+    try:
+        if args.command == 'enqueue':
+            source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8-sig')
+            try:
+                added = queue.enqueue(iter_urls(source))
+            finally:
+                if source is not sys.stdin:
+                    source.close()
+            print(f"נוספו {added} URLs", file=sys.stderr)
+        elif args.command == 'export':
+            sink = open_sink(args.output, args.format)
+            exported = 0
+            try:
+                for record in queue.results():
+                    sink.write(record)
+                    exported += 1
+            finally:
+                sink.close()
+            print(f"יוצאו {exported} תוצאות", file=sys.stderr)
+        elif args.command == 'requeue-failed':
+            print(f"הוחזרו {queue.requeue_failed()} URLs לתור", file=sys.stderr)
+        print(format_counts(queue.counts()), file=sys.stderr)
+    finally:
+        queue.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())